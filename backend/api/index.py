@@ -1,4 +1,9 @@
 # api/index.py
+import os
+
+# Engine dibuat lazy dan dipakai ulang selama function instance warm
+os.environ.setdefault("DB_SERVERLESS", "true")
+
 from app.main import app
 
 # Vercel akan mencari variabel "app" ini
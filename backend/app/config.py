@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 
 
 class Settings(BaseSettings):
@@ -13,6 +13,65 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     # Token expiry: 240 minutes = 4 hours
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 240
+    # Naikkan untuk menolak semua token lama (claim "ver") sekaligus
+    TOKEN_VERSION: int = 0
+    # jose (python-jose) | pyjwt (butuh paket PyJWT, decode lebih cepat)
+    TOKEN_CODEC: str = "jose"
+    # Cache token yang sudah diverifikasi (TTL = sisa umur exp). 0 = disabled.
+    TOKEN_CACHE_SIZE: int = 10000
+
+    # --- Token revocation (logout) ---
+    # Revocation dari worker lain terlihat paling lambat setelah interval ini.
+    REVOCATION_SYNC_SECONDS: int = 5
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+
+    # --- Password hashing (bcrypt) ---
+    # Hash/verify jalan di thread pool terpisah, bukan di event loop.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_CONCURRENCY: int = 4
+
+    # --- Authenticated user cache ---
+    # Principal (id, username, is_active, role) di-cache supaya
+    # get_current_user tidak query DB di setiap request. 0 = disabled.
+    USER_CACHE_TTL_SECONDS: int = 30
+    USER_CACHE_MAX_SIZE: int = 10000
+    # Seberapa sering generasi role (rename/delete role) dibaca ulang dari
+    # backend bersama
+    USER_CACHE_ROLE_SYNC_SECONDS: float = 1
+
+    # --- Shared cache backend ---
+    # none | memory (stand-in lokal/test) | redis (butuh paket `redis`)
+    CACHE_BACKEND: str = "none"
+    REDIS_URL: str = "redis://localhost:6379/0"
+
+    # --- SQL instrumentation (Server-Timing + log line per request) ---
+    SQL_INSTRUMENTATION: bool = True
+    # Dev/test: raise kalau statement yang sama diulang N kali dalam satu request
+    SQL_DETECT_N_PLUS_ONE: bool = False
+    SQL_N_PLUS_ONE_THRESHOLD: int = 5
+
+    # --- Metrics (GET /metrics, format Prometheus, per worker) ---
+    METRICS_ENABLED: bool = True
+    METRICS_LATENCY_BUCKETS: List[float] = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+    METRICS_POOL_WAIT_BUCKETS: List[float] = [0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10]
+    # GET /health/ready: batas waktu checkout + SELECT 1
+    HEALTH_READY_TIMEOUT_SECONDS: float = 2
+
+    # --- Response cache (GET /products, /products/{id}, /categories, /roles) ---
+    # Body JSON di-cache per (role, query params); invalidasi per tag oleh
+    # handler create/update/delete. Kosong = aktif hanya kalau CACHE_BACKEND
+    # di-set (invalidasi terlihat di semua worker/instance). true = paksa
+    # aktif tanpa backend: worker/instance lain bisa stale sampai TTL.
+    RESPONSE_CACHE_ENABLED: Optional[bool] = None
+    # 0 = disabled
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    # Roles & categories jarang berubah -> boleh hidup lebih lama
+    RESPONSE_CACHE_REFERENCE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_SIZE: int = 5000
+    # Seberapa sering versi tag dibaca ulang dari backend bersama
+    RESPONSE_CACHE_TAG_SYNC_SECONDS: float = 1
 
     # --- PostgreSQL ---
     POSTGRES_USER: str
@@ -21,14 +80,89 @@ class Settings(BaseSettings):
     POSTGRES_PORT: str = "5432"
     POSTGRES_DB: str
 
+    # false untuk PostgreSQL lokal tanpa SSL (dev, benchmark)
+    DB_SSL: bool = True
+    # Override URL engine (postgresql+asyncpg://...), mis. database benchmark.
+    # Kosong = dibangun dari POSTGRES_*.
+    DATABASE_URL: str = ""
+
+    # --- PostgreSQL connection pool ---
+    # One engine per process; these size the pool behind it.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_TIMEOUT: int = 10
+    # Serverless (Vercel): engine is created lazily and kept while the
+    # function instance stays warm; lifespan may never run there.
+    DB_SERVERLESS: bool = False
+
     # --- MongoDB ---
+    # mongomock:// = in-memory stand-in (test/dev, butuh paket mongomock-motor)
     MONGODB_URL: str = ""
     MONGODB_DB_NAME: str = ""
+    # Satu client per proses; ukuran pool koneksi di dalamnya
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_IDLE_TIME_MS: int = 300000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
 
     # --- Supabase ---
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
 
+    # --- Bulk product endpoints (/products/bulk) ---
+    PRODUCT_BULK_MAX_ITEMS: int = 5000
+    # Item per statement + commit
+    PRODUCT_BULK_CHUNK_SIZE: int = 500
+
+    # --- Product import (POST /products/import) ---
+    # Baris per batch (validasi + upsert + commit + update progress)
+    PRODUCT_IMPORT_BATCH_SIZE: int = 1000
+
+    # --- Product export (GET /products/export) ---
+    # Baris per partisi server-side cursor
+    PRODUCT_EXPORT_BATCH_SIZE: int = 1000
+
+    # --- Product stats (GET /products/stats) ---
+    # Umur cache agregat per worker. 0 = selalu query.
+    PRODUCT_STATS_CACHE_SECONDS: int = 10
+
+    # --- Stock adjustment (POST /products/.../stock/adjust) ---
+    # Item per batch adjustment (satu UPDATE statement)
+    STOCK_ADJUST_MAX_ITEMS: int = 1000
+    # Berapa kali batch diulang kalau kena deadlock
+    STOCK_ADJUST_DEADLOCK_RETRIES: int = 3
+    # Lama Idempotency-Key diingat (response di-replay saat retry)
+    STOCK_IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # --- Stock ledger (stock_movements + stock_snapshots) ---
+    # Partisi RANGE (created_at) per bulan (PostgreSQL). Hanya berlaku saat
+    # tabel pertama kali dibuat.
+    STOCK_LEDGER_PARTITIONED: bool = False
+    STOCK_LEDGER_PARTITIONS_AHEAD: int = 2
+    # Rollup harian ke stock_snapshots. 0 = disabled.
+    STOCK_ROLLUP_INTERVAL_SECONDS: int = 900
+    # Hari dianggap selesai setelah lewat tengah malam (UTC) + grace ini
+    STOCK_ROLLUP_GRACE_SECONDS: int = 300
+    # Hari maksimum per rollup (mengejar ketertinggalan bertahap)
+    STOCK_ROLLUP_BATCH_DAYS: int = 31
+
+    # --- Product events (GET /products/events, SSE via LISTEN/NOTIFY) ---
+    PRODUCT_EVENTS_ENABLED: bool = True
+    # Event per subscriber yang boleh antre; penuh -> subscriber diputus
+    PRODUCT_EVENTS_QUEUE_SIZE: int = 100
+    PRODUCT_EVENTS_MAX_SUBSCRIBERS: int = 1000
+    PRODUCT_EVENTS_HEARTBEAT_SECONDS: int = 15
+    # Lebih dari ini dalam satu transaksi -> satu event products.changed
+    PRODUCT_EVENTS_MAX_PER_TRANSACTION: int = 50
+
+    # --- Fast JSON responses ---
+    # Model response di-serialize langsung oleh pydantic-core (Rust), tanpa
+    # validasi ulang response_model. Global, atau per router: ["products", "users"]
+    FAST_JSON: bool = False
+    FAST_JSON_ROUTERS: List[str] = []
+
     # --- CORS ---
     CORS_ORIGINS: List[str] = ["*"]
 
@@ -54,6 +188,10 @@ class Settings(BaseSettings):
             f"@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
         )
 
+    @property
+    def database_url(self) -> str:
+        return self.DATABASE_URL or self.async_postgres_url
+
 
 # Singleton instance
 settings = Settings()
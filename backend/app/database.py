@@ -1,59 +1,254 @@
+import asyncio
 import ssl
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+import time
+import asyncpg
+from typing import Optional
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.orm import declarative_base
-from motor.motor_asyncio import AsyncIOMotorClient
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.config import settings
+from app.utils.metrics import db_pool_checkout_timeouts, db_pool_checkout_wait
+from app.utils.query_stats import instrument_engine
 
 Base = declarative_base()
 
 
-# --- PostgreSQL ---
-def get_async_sessionmaker():
-    """
-    Factory sessionmaker aman untuk serverless (Vercel).
-    Engine dibuat fresh di event loop aktif.
-    """
+# ============================================================================
+# PostgreSQL - process-wide engine & connection pool
+# ============================================================================
+# Satu engine per proses. Dibuat oleh `lifespan` di app/main.py dan di-dispose
+# saat shutdown. Pada mode serverless (DB_SERVERLESS=true) engine dibuat lazy
+# pada request pertama dan dipakai ulang selama function instance masih warm.
+# ============================================================================
+_engine: Optional[AsyncEngine] = None
+_sessionmaker: Optional[async_sessionmaker] = None
+_engine_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _build_ssl_context() -> ssl.SSLContext:
     ssl_context = ssl.create_default_context(cafile=None)
     ssl_context.check_hostname = False
     ssl_context.verify_mode = ssl.CERT_NONE
+    return ssl_context
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Pool default engine async + waktu tunggu checkout (GET /metrics)."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            db_pool_checkout_timeouts.inc()
+            raise
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - started)
+
 
+def _create_engine() -> AsyncEngine:
+    url = settings.database_url
+    ssl_args = {"ssl": _build_ssl_context()} if settings.DB_SSL and url.startswith("postgresql") else {}
     engine = create_async_engine(
-        settings.async_postgres_url,
-        connect_args={"ssl": ssl_context},
+        url,
+        connect_args=ssl_args,
         echo=False,
         future=True,
-        pool_size=1,
-        max_overflow=0,
-        pool_recycle=1800,
-        pool_timeout=10
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
     )
-    return async_sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    # Statement count / waktu DB per request (lihat app/utils/query_stats.py)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+def _current_loop() -> Optional[asyncio.AbstractEventLoop]:
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+def init_engine() -> AsyncEngine:
+    """
+    Buat engine + sessionmaker global (idempotent).
+    Dipanggil dari lifespan; pada mode serverless juga dipanggil lazy.
+    """
+    global _engine, _sessionmaker, _engine_loop
+
+    loop = _current_loop()
+
+    # asyncpg connection terikat ke event loop tempat ia dibuat. Runtime
+    # serverless bisa menjalankan invocation berikutnya di loop baru, jadi
+    # engine lama dibuang (tanpa await) dan dibuat ulang di loop aktif.
+    if _engine is not None and settings.DB_SERVERLESS and loop is not _engine_loop:
+        _engine.sync_engine.dispose(close=False)
+        _engine = None
+
+    if _engine is None:
+        _engine = _create_engine()
+        _sessionmaker = async_sessionmaker(
+            bind=_engine, class_=AsyncSession, expire_on_commit=False
+        )
+        _engine_loop = loop
+
+    return _engine
+
+
+async def dispose_engine() -> None:
+    """Tutup semua koneksi di pool. Dipanggil saat shutdown."""
+    global _engine, _sessionmaker, _engine_loop
+
+    if _engine is not None:
+        await _engine.dispose()
+    _engine = None
+    _sessionmaker = None
+    _engine_loop = None
+
+
+def get_engine() -> AsyncEngine:
+    if _engine is None or settings.DB_SERVERLESS:
+        return init_engine()
+    return _engine
+
+
+def get_async_sessionmaker() -> async_sessionmaker:
+    """
+    Sessionmaker global yang terikat ke engine proses.
+    Tidak lagi membuat engine baru di tiap panggilan.
+    """
+    get_engine()
+    return _sessionmaker
 
 
 async def get_postgres_db():
     """
     Dependency untuk FastAPI.
-    Membuka session baru di tiap request.
+    Membuka session baru di tiap request (koneksi diambil dari pool).
     """
     SessionLocal = get_async_sessionmaker()
     async with SessionLocal() as session:
         yield session
 
 
-# --- MongoDB ---
-# ✅ untuk dependency injection
-async def get_mongodb():
-    mongo_uri = getattr(settings, "MONGODB_URL", None)
-    mongo_db = getattr(settings, "MONGODB_DB_NAME", None)
+async def connect_listener() -> asyncpg.Connection:
+    """
+    Koneksi asyncpg terpisah (di luar pool) untuk LISTEN/NOTIFY.
+    Dipegang selama proses hidup, jadi tidak memakan slot pool.
+    Database-nya sama dengan engine (settings.database_url, termasuk
+    override DATABASE_URL), supaya LISTEN menerima NOTIFY dari engine.
+    """
+    # postgresql+asyncpg://... -> postgresql://... (DSN asyncpg)
+    dsn = make_url(settings.database_url).set(drivername="postgresql")
+    return await asyncpg.connect(
+        dsn.render_as_string(hide_password=False),
+        ssl=_build_ssl_context() if settings.DB_SSL else False,
+    )
 
-    if not mongo_uri or not mongo_db:
-        print("⚠️ MongoDB credentials missing")
-        yield None
-        return
 
-    client = AsyncIOMotorClient(mongo_uri)
-    db = client[mongo_db]
-    try:
-        yield db
-    finally:
-        client.close()
+# ============================================================================
+# MongoDB - process-wide client & connection pool
+# ============================================================================
+# Satu AsyncIOMotorClient per proses: pool koneksi, server discovery dan
+# handshake terjadi sekali, bukan per request. Dibuat oleh `lifespan` dan
+# ditutup saat shutdown; pada mode serverless dibuat lazy seperti engine
+# PostgreSQL. MONGODB_URL=mongomock:// memakai mongomock-motor (in-memory)
+# sebagai stand-in untuk test/dev lokal.
+# ============================================================================
+MONGOMOCK_SCHEME = "mongomock://"
+
+_mongo_client: Optional[AsyncIOMotorClient] = None
+_mongo_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def mongodb_configured() -> bool:
+    return bool(settings.MONGODB_URL and settings.MONGODB_DB_NAME)
+
+
+def mongodb_is_mock() -> bool:
+    """Stand-in in-memory untuk test CRUD; tidak mendukung collation dan $text."""
+    return settings.MONGODB_URL.startswith(MONGOMOCK_SCHEME)
+
+
+def _create_mongo_client():
+    if mongodb_is_mock():
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError as e:
+            raise RuntimeError(
+                "MONGODB_URL=mongomock:// requires the `mongomock-motor` package (pip install mongomock-motor)"
+            ) from e
+        return AsyncMongoMockClient()
+
+    return AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+        minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+        maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+        serverSelectionTimeoutMS=settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        appname=settings.APP_NAME,
+    )
+
+
+def init_mongodb() -> Optional[AsyncIOMotorDatabase]:
+    """
+    Buat client Mongo global (idempotent) dan kembalikan database-nya.
+    None kalau MONGODB_URL / MONGODB_DB_NAME tidak di-set.
+    """
+    global _mongo_client, _mongo_loop
+
+    if not mongodb_configured():
+        return None
+
+    # Sama seperti engine: client terikat ke event loop tempat ia dipakai
+    loop = _current_loop()
+    if _mongo_client is not None and settings.DB_SERVERLESS and loop is not _mongo_loop:
+        _mongo_client.close()
+        _mongo_client = None
+
+    if _mongo_client is None:
+        _mongo_client = _create_mongo_client()
+        _mongo_loop = loop
+
+    return _mongo_client[settings.MONGODB_DB_NAME]
+
+
+def close_mongodb() -> None:
+    """Tutup client (dan pool-nya). Dipanggil saat shutdown."""
+    global _mongo_client, _mongo_loop
+
+    if _mongo_client is not None:
+        _mongo_client.close()
+    _mongo_client = None
+    _mongo_loop = None
+
+
+async def get_mongodb() -> AsyncIOMotorDatabase:
+    """
+    Dependency untuk FastAPI: database dari client proses.
+    Tidak membuka koneksi baru; koneksi diambil dari pool client saat query.
+    """
+    if _mongo_client is None or settings.DB_SERVERLESS:
+        db = init_mongodb()
+    else:
+        db = _mongo_client[settings.MONGODB_DB_NAME]
+
+    if db is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="MongoDB is not configured"
+        )
+    return db
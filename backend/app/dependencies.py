@@ -1,60 +1,80 @@
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from sqlalchemy import select
+from typing import Optional
 from app.database import get_postgres_db
 from app.models.user import User
-from app.utils.security import decode_access_token
+from app.config import settings
+from app.utils.revocation import revocation_store
+from app.utils.security import decode_access_token_claims
+from app.utils.user_cache import CurrentUser, user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
-
-# ============================================================================
-# ACTIVE TOKENS CHECKING - Currently DISABLED (rely on JWT expiry only)
-# ============================================================================
-# Uncomment code below to enable in-memory active tokens tracking
-# Note: This will require restart = tokens lost. For persistent storage, use database.
-# active_tokens = set()
-# ============================================================================
+oauth2_scheme_optional = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_postgres_db)
-) -> User:
+) -> CurrentUser:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    payload = decode_access_token_claims(token)
+    if payload is None:
+        raise credentials_exception
+
+    username = payload.get("sub")
+    token_version = payload.get("ver", 0)
+    if username is None or token_version != settings.TOKEN_VERSION:
+        raise credentials_exception
+
     # ============================================================================
-    # ACTIVE TOKENS CHECKING - Currently DISABLED
-    # ============================================================================
-    # Uncomment lines below to check if token is in active_tokens set
-    # if token not in active_tokens:
-    #     raise credentials_exception
+    # Revocation (logout) - Bloom filter in-process, tanpa query DB
     # ============================================================================
-
-    username = decode_access_token(token)
-    if username is None:
+    if await revocation_store.is_revoked(payload.get("jti")):
         raise credentials_exception
 
+    # ============================================================================
+    # Principal cache - hit = tanpa query DB sama sekali
+    # ============================================================================
+    cache_key = await user_cache.key(username, token_version)
+    principal = await user_cache.get(cache_key)
+    if principal is not None:
+        return principal
+
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(joinedload(User.role))
         .where(User.username == username))
     user = result.scalar_one_or_none()
 
     if user is None:
         raise credentials_exception
 
-    return user
+    principal = CurrentUser.from_user(user)
+    await user_cache.set(cache_key, principal)
+    return principal
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
+
+
+async def get_stream_user(
+    header_token: Optional[str] = Depends(oauth2_scheme_optional),
+    token: Optional[str] = Query(None, description="Access token, for EventSource clients that cannot send headers"),
+    db: AsyncSession = Depends(get_postgres_db)
+) -> CurrentUser:
+    """Seperti get_current_active_user, tapi token juga boleh lewat ?token= (SSE)."""
+    current_user = await get_current_user(header_token or token or "", db)
+    return await get_current_active_user(current_user)
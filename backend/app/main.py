@@ -1,29 +1,63 @@
-from fastapi import FastAPI, Request, status
+import asyncio
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
+from pymongo.errors import ConnectionFailure
+from sqlalchemy import text
 from app.config import settings
-from app.database import get_async_sessionmaker, get_mongodb, Base
+from app.database import init_engine, dispose_engine, get_engine, init_mongodb, close_mongodb, Base
+from app.migrations import ensure_mongo_indexes, run_migrations
 from app.seed_data import seed_roles
+from app.utils.passwords import password_hasher
+from app.utils.revocation import revocation_store
+from app.utils.product_import import import_runner
+from app.utils.stock import purge_idempotency_keys
+from app.utils.ledger import stock_rollup
+from app.utils.events import event_broker
+from app.utils.response_cache import response_cache
+from app.utils.user_cache import user_cache
+from app.utils.query_stats import QueryStatsMiddleware
+from app.utils.metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from app.utils.security import token_cache
 # from app.models import Base
 from app.routers import auth, categories, products, users, books, roles
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # --- PostgreSQL init ---
-    SessionLocal = get_async_sessionmaker()
-    async with SessionLocal().bind.begin() as conn:
+    # --- PostgreSQL init (satu engine + pool per proses) ---
+    engine = init_engine()
+    async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await run_migrations(conn)
     await seed_roles()
+    await purge_idempotency_keys()
 
-    # --- MongoDB init (optional) ---
-    # async for _ in get_mongodb():
-    #     break
+    # --- Token revocation: load dari DB + sync periodik ---
+    await revocation_store.start()
+
+    # --- Stock ledger: rollup harian di background ---
+    stock_rollup.start()
+
+    # --- MongoDB (optional): satu client + pool per proses, index books ---
+    mongo_db = init_mongodb()
+    if mongo_db is not None:
+        await ensure_mongo_indexes(mongo_db)
 
     yield
 
-    # (tidak perlu explicit close karena Vercel ephemeral)
+    # --- Shutdown ---
+    await import_runner.stop()
+    await stock_rollup.stop()
+    await event_broker.stop()
+    await revocation_store.stop()
+    password_hasher.shutdown()
+
+    # Pada mode serverless engine dibiarkan hidup selama instance warm.
+    if not settings.DB_SERVERLESS:
+        await dispose_engine()
+        close_mongodb()
 
 
 app = FastAPI(
@@ -34,6 +68,9 @@ app = FastAPI(
     redoc_url="/redoc",
 )
 
+# Server-Timing + log SQL per request (paling dalam, jadi CORS tetap membungkusnya)
+app.add_middleware(QueryStatsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.CORS_ORIGINS,
@@ -42,6 +79,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Latency / in-flight per route (paling luar, termasuk waktu CORS)
+app.add_middleware(MetricsMiddleware, router=app.router)
+
+
+@app.exception_handler(ConnectionFailure)
+async def mongodb_unavailable_handler(request: Request, exc: ConnectionFailure):
+    # MongoDB (books) opsional: tidak terjangkau -> 503, bukan 500
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "MongoDB unavailable"},
+    )
+
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
@@ -69,10 +118,99 @@ async def health_check():
     }
 
 
+@app.get("/health/cache", tags=["Health"])
+async def cache_stats():
+    """Hit/miss response cache (per namespace) dan cache principal user, per worker."""
+    return {
+        "response_cache": response_cache.stats(),
+        "user_cache": user_cache.local.stats(),
+    }
+
+
+@app.get("/health/ready", tags=["Health"])
+async def readiness_check():
+    """Siap menerima traffic: koneksi bisa diambil dari pool dan menjawab SELECT 1."""
+    engine = get_engine()
+    pool = engine.sync_engine.pool
+
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), settings.HEALTH_READY_TIMEOUT_SECONDS)
+    except Exception as exc:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": "unavailable", "database": type(exc).__name__, "pool": pool.status()},
+        )
+    return {"status": "ready", "database": "ok", "pool": pool.status()}
+
+
+# ======================================================
+# METRICS (format Prometheus, per worker)
+# ======================================================
+@registry.collector
+def _pool_metrics():
+    pool = get_engine().sync_engine.pool
+    yield "db_pool_size", "gauge", "Ukuran pool PostgreSQL (DB_POOL_SIZE)", [({}, pool.size())]
+    yield "db_pool_checked_out", "gauge", "Koneksi yang sedang dipakai", [({}, pool.checkedout())]
+    yield "db_pool_checked_in", "gauge", "Koneksi idle di pool", [({}, pool.checkedin())]
+    # Negatif = slot pool yang belum pernah dibuka
+    yield "db_pool_overflow", "gauge", "Koneksi overflow (di atas DB_POOL_SIZE)", [({}, pool.overflow())]
+
+
+@registry.collector
+def _cache_metrics():
+    caches = {
+        "token": token_cache.stats(),
+        "user": user_cache.local.stats(),
+        "response": response_cache.local.stats(),
+    }
+
+    def labeled(key):
+        return [({"cache": name}, stats[key]) for name, stats in caches.items()]
+
+    yield "cache_hits_total", "counter", "Lookup cache yang hit (L1 per worker)", labeled("hits")
+    yield "cache_misses_total", "counter", "Lookup cache yang miss (L1 per worker)", labeled("misses")
+    yield "cache_hit_ratio", "gauge", "hits / (hits + misses) sejak worker start", labeled("hit_ratio")
+    yield "cache_entries", "gauge", "Entry di cache", labeled("size")
+
+    namespaces = response_cache.stats()["namespaces"]
+    yield "response_cache_hits_total", "counter", "Response cache hit per namespace", [
+        ({"namespace": name}, counts["hits"]) for name, counts in namespaces.items()
+    ]
+    yield "response_cache_misses_total", "counter", "Response cache miss per namespace", [
+        ({"namespace": name}, counts["misses"]) for name, counts in namespaces.items()
+    ]
+
+
+@registry.collector
+def _password_hash_metrics():
+    stats = password_hasher.stats()
+    yield "password_hash_queue_depth", "gauge", "Hash/verify bcrypt yang menunggu slot", [({}, stats["queue_depth"])]
+    yield "password_hash_active", "gauge", "Hash/verify bcrypt yang sedang jalan", [({}, stats["active"])]
+    yield "password_hash_completed_total", "counter", "Hash/verify bcrypt selesai", [({}, stats["completed"])]
+
+
+@registry.collector
+def _event_metrics():
+    stats = event_broker.stats()
+    yield "product_events_subscribers", "gauge", "Subscriber SSE /products/events", [({}, stats["subscribers"])]
+    yield "product_events_dropped_subscribers_total", "counter", "Subscriber lambat yang diputus", [
+        ({}, stats["dropped_subscribers"])
+    ]
+
+
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    return Response(registry.render(), media_type=CONTENT_TYPE)
+
+
 # --- Routers ---
 app.include_router(auth.router, prefix=settings.API_V1_PREFIX)
 app.include_router(users.router, prefix=settings.API_V1_PREFIX)
 app.include_router(products.router, prefix=settings.API_V1_PREFIX)
-# app.include_router(books.router, prefix=settings.API_V1_PREFIX)
+app.include_router(books.router, prefix=settings.API_V1_PREFIX)
 app.include_router(roles.router, prefix=settings.API_V1_PREFIX)
 app.include_router(categories.router, prefix=settings.API_V1_PREFIX)
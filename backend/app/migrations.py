@@ -0,0 +1,170 @@
+# app/migrations.py
+"""
+Migrasi ringan yang dijalankan di startup, setelah Base.metadata.create_all.
+
+create_all hanya membuat tabel yang belum ada; index baru yang ditambahkan
+ke model tidak ikut dibuat di tabel yang sudah ada. Langkah di sini
+idempotent sehingga aman dijalankan di setiap startup.
+"""
+import logging
+from datetime import date, datetime
+from pymongo import ASCENDING, TEXT, IndexModel
+from pymongo.errors import PyMongoError
+from sqlalchemy import exists, insert, literal, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from app.config import settings
+from app.database import Base
+from app.models.product import Product
+from app.models.stock_movement import StockMovement
+from app.utils.book_query import (
+    BOOK_AUTHOR_INDEX,
+    BOOK_COLLATION,
+    BOOK_CREATED_AT_INDEX,
+    BOOK_TEXT_INDEX,
+    BOOK_TITLE_INDEX,
+)
+from app.utils.search import set_trigram_available
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# PostgreSQL-only: trigram index untuk search (lihat app/utils/search.py)
+# GIN gin_trgm_ops melayani ILIKE '%term%' dan ILIKE 'term%'.
+# ============================================================================
+TRIGRAM_INDEXES = {
+    "ix_products_name_trgm": ("products", "name"),
+    "ix_users_username_trgm": ("users", "username"),
+    "ix_users_email_trgm": ("users", "email"),
+    "ix_users_full_name_trgm": ("users", "full_name"),
+}
+
+
+def _ensure_indexes(sync_conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(sync_conn, checkfirst=True)
+
+
+async def _ensure_trigram_indexes(conn: AsyncConnection) -> None:
+    # CREATE EXTENSION butuh privilege; kalau gagal, search tetap jalan
+    # (tanpa index) dan startup tidak boleh ikut gagal.
+    try:
+        async with conn.begin_nested():
+            await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError as e:
+        # Extension mungkin sudah dipasang oleh superuser walaupun role ini
+        # tidak boleh membuatnya
+        installed = (await conn.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        )).scalar() is not None
+        set_trigram_available(installed)
+        if not installed:
+            logger.warning(
+                "pg_trgm extension unavailable, search indexes skipped and "
+                "relevance ranking uses the exact/prefix fallback: %s", e
+            )
+            return
+    else:
+        set_trigram_available(True)
+
+    for name, (table, column) in TRIGRAM_INDEXES.items():
+        await conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {name} "
+            f"ON {table} USING gin ({column} gin_trgm_ops)"
+        ))
+
+
+# ============================================================================
+# Stock ledger (lihat app/utils/ledger.py)
+# ============================================================================
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def ensure_ledger_partitions(sync_conn) -> None:
+    """
+    PostgreSQL + STOCK_LEDGER_PARTITIONED: partisi bulanan stock_movements
+    untuk bulan ini s/d STOCK_LEDGER_PARTITIONS_AHEAD bulan ke depan, plus
+    partisi DEFAULT. Dipanggil saat startup dan di setiap rollup.
+    """
+    if sync_conn.dialect.name != "postgresql":
+        return
+
+    partitioned = sync_conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('stock_movements')"
+    )).scalar()
+    if not partitioned:
+        if settings.STOCK_LEDGER_PARTITIONED:
+            logger.warning("stock_movements already exists unpartitioned, STOCK_LEDGER_PARTITIONED ignored")
+        return
+
+    sync_conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS stock_movements_default PARTITION OF stock_movements DEFAULT"
+    ))
+    month = datetime.utcnow().date().replace(day=1)
+    for offset in range(settings.STOCK_LEDGER_PARTITIONS_AHEAD + 1):
+        start = _add_months(month, offset)
+        end = _add_months(start, 1)
+        sync_conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS stock_movements_{start:%Y%m} PARTITION OF stock_movements "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+        ))
+
+
+def _seed_stock_ledger(sync_conn) -> None:
+    # Ledger baru: satu movement "opening" per produk dengan stok saat ini,
+    # supaya history (dan stock as of T) punya titik awal
+    if sync_conn.execute(select(literal(1)).where(exists(select(StockMovement.id)))).scalar():
+        return
+
+    now = datetime.utcnow()
+    sync_conn.execute(insert(StockMovement).from_select(
+        ["product_id", "delta", "stock_after", "reason", "created_at"],
+        select(Product.id, Product.stock, Product.stock, literal("opening"), literal(now)),
+    ))
+
+
+# ============================================================================
+# MongoDB: index koleksi books (lihat app/routers/books.py)
+# ============================================================================
+BOOK_INDEXES = [
+    # Prefix search / filter author / sort title|author: range + tiebreaker _id,
+    # case-insensitive lewat collation (query harus pakai collation yang sama)
+    IndexModel([("title", ASCENDING), ("_id", ASCENDING)], name=BOOK_TITLE_INDEX, collation=BOOK_COLLATION),
+    IndexModel([("author", ASCENDING), ("_id", ASCENDING)], name=BOOK_AUTHOR_INDEX, collation=BOOK_COLLATION),
+    IndexModel([("created_at", ASCENDING), ("_id", ASCENDING)], name=BOOK_CREATED_AT_INDEX),
+    # search_mode=text. default_language none: judul multi-bahasa, tanpa stemming/stop words
+    IndexModel(
+        [("title", TEXT), ("author", TEXT)],
+        name=BOOK_TEXT_INDEX,
+        weights={"title": 2, "author": 1},
+        default_language="none",
+    ),
+]
+
+# Index versi lama (tanpa collation) yang digantikan BOOK_INDEXES
+OBSOLETE_BOOK_INDEXES = ("ix_books_title", "ix_books_author")
+
+
+async def ensure_mongo_indexes(db) -> None:
+    # create_indexes idempotent untuk spec yang sama. Mongo opsional: kalau
+    # tidak terjangkau, startup API tetap jalan (endpoint /books yang gagal).
+    try:
+        existing = await db.books.index_information()
+        for name in OBSOLETE_BOOK_INDEXES:
+            if name in existing:
+                await db.books.drop_index(name)
+        await db.books.create_indexes(BOOK_INDEXES)
+    except PyMongoError as e:
+        logger.warning("MongoDB indexes for books not ensured: %s", e)
+
+
+async def run_migrations(conn: AsyncConnection) -> None:
+    await conn.run_sync(_ensure_indexes)
+    await conn.run_sync(ensure_ledger_partitions)
+    await conn.run_sync(_seed_stock_ledger)
+
+    if conn.dialect.name == "postgresql":
+        await _ensure_trigram_indexes(conn)
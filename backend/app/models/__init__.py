@@ -0,0 +1,12 @@
+# Import semua model supaya relationship() berbasis string selalu bisa
+# di-resolve, apa pun urutan import router-nya (load plan di router
+# membangun loader option saat import).
+from app.models.role import Role
+from app.models.user import User
+from app.models.category import Category
+from app.models.product import Product
+from app.models.revoked_token import RevokedToken
+from app.models.import_job import ImportJob
+from app.models.stock_adjustment import StockAdjustment
+from app.models.stock_movement import StockMovement
+from app.models.stock_snapshot import StockSnapshot
@@ -18,6 +18,9 @@ class Category(Base):
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     # 🔹 Relationship ke model User (pastikan kamu punya model User)
-    creator = relationship("User", back_populates="category", lazy="selectin")
-    products = relationship("Product", back_populates="category", lazy="selectin")
+    # 🔹 lazy="raise": setiap endpoint wajib memilih load plan sendiri
+    creator = relationship("User", back_populates="category", lazy="raise")
+    products = relationship(
+        "Product", back_populates="category", lazy="raise", passive_deletes=True
+    )
 
@@ -1,10 +1,15 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, Integer
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Numeric, Integer, Index, case, func, literal_column
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql.expression import Grouping
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
+from typing import Optional
 import uuid
 from app.database import Base
 
+# Threshold yang dipakai kalau low_stock_threshold 0/NULL
+DEFAULT_LOW_STOCK_THRESHOLD = 10
+
 class Product(Base):
     __tablename__ = "products"
 
@@ -16,16 +21,60 @@ class Product(Base):
     
     price = Column(Numeric(10, 2), nullable=False, default=0.00)  # 🔹 Harga dengan 2 desimal
     stock = Column(Integer, nullable=False, default=0)            # 🔹 Jumlah stok
-    low_stock_threshold = Column(Integer, nullable=False, default=10) # 🔹 Batas stok rendah
+    low_stock_threshold = Column(Integer, nullable=False, default=DEFAULT_LOW_STOCK_THRESHOLD) # 🔹 Batas stok rendah
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # 🔹 Relasi ke User
     created_by = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
-    creator = relationship("User", back_populates="products", lazy="selectin")
+    creator = relationship("User", back_populates="products", lazy="raise")
     
     # 🔹 Relasi ke Category
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"), nullable=False)
-    category = relationship("Category", back_populates="products", lazy="selectin")
-    
+    category = relationship("Category", back_populates="products", lazy="raise")
+
+    # 🔹 Index (sort key, id) untuk keyset pagination & sorting di GET /products
+    __table_args__ = (
+        Index("ix_products_name_id", "name", "id"),
+        Index("ix_products_stock_id", "stock", "id"),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_created_at_id", "created_at", "id"),
+    )
+
+
+# 🔹 Rank stock status: 0 = red, 1 = yellow, 2 = green
+# Satu-satunya definisi aturan status: filter stock_status, sort_by=status,
+# /products/stats, label di list/export (STOCK_STATUS) dan response
+# (stock_status_rank) semua diturunkan dari sini. Dilayani expression index
+# (rank, id) di bawah. Konstanta sengaja literal (bukan bind parameter)
+# supaya planner mencocokkan query dengan index.
+STOCK_STATUS_RANK = case(
+    (Product.stock == literal_column("0"), literal_column("0")),
+    (
+        Product.stock <= func.coalesce(
+            func.nullif(Product.low_stock_threshold, literal_column("0")),
+            literal_column(str(DEFAULT_LOW_STOCK_THRESHOLD)),
+        ),
+        literal_column("1"),
+    ),
+    else_=literal_column("2"),
+)
+
+STOCK_STATUS_RANKS = {"red": 0, "yellow": 1, "green": 2}
+STOCK_STATUS_NAMES = {rank: name for name, rank in STOCK_STATUS_RANKS.items()}
+
+# Label red/yellow/green di SQL (list read model, export)
+STOCK_STATUS = case(STOCK_STATUS_NAMES, value=STOCK_STATUS_RANK)
+
+
+def stock_status_rank(stock: Optional[int], low_stock_threshold: Optional[int]) -> int:
+    """STOCK_STATUS_RANK untuk nilai yang sudah ada di memori."""
+    if stock == 0:
+        return STOCK_STATUS_RANKS["red"]
+    if stock <= (low_stock_threshold or DEFAULT_LOW_STOCK_THRESHOLD):
+        return STOCK_STATUS_RANKS["yellow"]
+    return STOCK_STATUS_RANKS["green"]
+
+# Expression index wajib diapit kurung di DDL PostgreSQL
+Index("ix_products_stock_status_id", Grouping(STOCK_STATUS_RANK), Product.id)
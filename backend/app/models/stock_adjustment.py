@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, JSON
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.database import Base
+
+class StockAdjustment(Base):
+    """Idempotency-Key stock adjustment + response-nya, untuk replay saat retry."""
+    __tablename__ = "stock_adjustments"
+
+    idempotency_key = Column(String(64), primary_key=True)
+    # sha256 dari user + endpoint + body; key yang sama dengan request lain ditolak
+    request_hash = Column(String(64), nullable=False)
+    response = Column(JSON, nullable=False)
+
+    created_by = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
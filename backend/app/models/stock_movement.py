@@ -0,0 +1,34 @@
+from sqlalchemy import Column, String, Integer, BigInteger, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+from app.config import settings
+from app.database import Base
+
+class StockMovement(Base):
+    """
+    Ledger perubahan stok (append-only), ditulis di transaksi yang sama
+    dengan perubahan Product.stock. Lihat app/utils/ledger.py.
+    """
+    __tablename__ = "stock_movements"
+
+    # created_at ikut primary key: wajib untuk partisi RANGE (created_at)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
+
+    # Tanpa foreign key: history tetap ada setelah produk dihapus
+    product_id = Column(UUID(as_uuid=True), nullable=False)
+    delta = Column(Integer, nullable=False)
+    stock_after = Column(Integer, nullable=False)
+    reason = Column(String(20), nullable=False)   # opening | create | update | adjust | import
+    ref = Column(String(64), nullable=True)        # Idempotency-Key / import job id
+    created_by = Column(UUID(as_uuid=True), nullable=True)
+
+    __table_args__ = (
+        # History per produk (keyset by id) dan "stock as of T"
+        Index("ix_stock_movements_product_id_id", "product_id", "id"),
+        Index("ix_stock_movements_product_id_created_at", "product_id", "created_at"),
+        # Rollup harian membaca rentang created_at
+        Index("ix_stock_movements_created_at", "created_at"),
+        # Partisi per bulan (opsional), dibuat oleh app/migrations.py
+        {"postgresql_partition_by": "RANGE (created_at)"} if settings.STOCK_LEDGER_PARTITIONED else {},
+    )
@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, BigInteger, Date
+from sqlalchemy.dialects.postgresql import UUID
+from app.database import Base
+
+class StockSnapshot(Base):
+    """Rollup harian stock_movements per produk (hanya hari yang ada movement-nya)."""
+    __tablename__ = "stock_snapshots"
+
+    product_id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    stock_close = Column(Integer, nullable=False)     # stok di akhir hari
+    quantity_in = Column(Integer, nullable=False, default=0)
+    quantity_out = Column(Integer, nullable=False, default=0)
+    movements = Column(Integer, nullable=False, default=0)
+    last_movement_id = Column(BigInteger, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import UUID
 from datetime import datetime
@@ -19,6 +19,16 @@ class User(Base):
     
     role_id = Column(UUID(as_uuid=True), ForeignKey("roles.id"), nullable=True)
     
-    role = relationship("Role", back_populates="users")  
-    category = relationship("Category", back_populates="creator")
-    products = relationship("Product", back_populates="creator")
+    # 🔹 lazy="raise": relasi hanya di-load lewat load plan eksplisit di router
+    role = relationship("Role", back_populates="users", lazy="raise")
+    category = relationship(
+        "Category", back_populates="creator", lazy="raise", passive_deletes=True
+    )
+    products = relationship(
+        "Product", back_populates="creator", lazy="raise", passive_deletes=True
+    )
+
+    # 🔹 Index (created_at, id) untuk keyset pagination di GET /users
+    __table_args__ = (
+        Index("ix_users_created_at_id", "created_at", "id"),
+    )
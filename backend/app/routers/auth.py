@@ -2,16 +2,18 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from datetime import timedelta
 from app.database import get_postgres_db
 from app.models.user import User
 from app.schemas.auth import Token
 from app.schemas.user import UserCreate, UserLoginMetadata
-from app.utils.security import verify_password, get_password_hash, create_access_token
+from app.utils.revocation import revocation_store
+from app.utils.security import create_access_token, decode_access_token_claims
+from app.utils.passwords import password_hasher
 from app.config import settings
-# from app.dependencies import active_tokens  # DISABLED: uncomment to enable active_tokens checking
 from app.dependencies import get_current_active_user, oauth2_scheme
+from app.utils.user_cache import CurrentUser
 from app.models.role import Role
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -19,13 +21,28 @@ router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 @router.get("/me", response_model=UserLoginMetadata)
 async def get_current_user(
-    current_user=Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     """
     Return current user info based on active Bearer token
     """
-    # current_user sudah di-decode di get_current_active_user
-    return current_user
+    # current_user hanya principal dari cache; detail profil di-load di sini
+    result = await db.execute(
+        select(User)
+        .options(joinedload(User.role))
+        .where(User.id == current_user.id)
+    )
+    user = result.scalar_one_or_none()
+
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return user
 
 
 @router.post("/register", response_model=Token, status_code=status.HTTP_201_CREATED)
@@ -35,7 +52,6 @@ async def register(
 ):
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
         .where(
             (User.email == user_data.email) | (
                 User.username == user_data.username)
@@ -55,8 +71,7 @@ async def register(
                 detail="Username already taken"
             )
 
-    hashed_password = get_password_hash(user_data.password)
-    print(hashed_password)
+    hashed_password = await password_hasher.hash(user_data.password)
 
     # 🧩 Ambil role default "user" kalau role_id tidak dikirim
     role_id = getattr(user_data, "role_id", None)
@@ -80,12 +95,12 @@ async def register(
 
     db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
 
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(joinedload(User.role))
         .where(User.id == new_user.id)
+        .execution_options(populate_existing=True)
     )
 
     user_with_role = result.scalar_one()
@@ -99,13 +114,6 @@ async def register(
         data={"sub": user_with_role.username}, expires_delta=access_token_expires
     )
 
-    # ============================================================================
-    # ACTIVE TOKENS TRACKING - Currently DISABLED
-    # ============================================================================
-    # Uncomment line below to add token to active_tokens set
-    # active_tokens.add(access_token)
-    # ============================================================================
-
     # Build metadata for user
     user_metadata = UserLoginMetadata.from_orm(user_with_role)
 
@@ -123,13 +131,20 @@ async def login(
 ):
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(joinedload(User.role))
         .where(User.username == form_data.username)
     )
     user = result.scalar_one_or_none()
-    user_response = UserLoginMetadata.from_orm(user)
 
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    verified = False
+    new_hash = None
+    if user:
+        # bcrypt jalan di thread pool, event loop tetap melayani request lain
+        verified, new_hash = await password_hasher.verify_and_update(
+            form_data.password, user.hashed_password
+        )
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -142,19 +157,21 @@ async def login(
             detail="Inactive user"
         )
 
+    # ============================================================================
+    # Transparent rehash: BCRYPT_ROUNDS berubah -> simpan hash dengan cost baru
+    # ============================================================================
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    user_response = UserLoginMetadata.from_orm(user)
+
     access_token_expires = timedelta(
         minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.username}, expires_delta=access_token_expires
     )
 
-    # ============================================================================
-    # ACTIVE TOKENS TRACKING - Currently DISABLED
-    # ============================================================================
-    # Uncomment line below to add token to active_tokens set
-    # active_tokens.add(access_token)
-    # ============================================================================
-
     return {
         "access_token": access_token, "token_type": "bearer", "metadata": user_response
         # {
@@ -171,15 +188,14 @@ async def login(
 @router.post("/logout")
 async def logout(token: str = Depends(oauth2_scheme)):
     # ============================================================================
-    # ACTIVE TOKENS TRACKING - Currently DISABLED
+    # Revoke token (jti) sampai exp-nya lewat; lihat app/utils/revocation.py
     # ============================================================================
-    # Uncomment lines below to remove token from active_tokens set
-    # if token in active_tokens:
-    #     active_tokens.remove(token)
-    # ============================================================================
-
-    # Note: With active_tokens disabled, logout doesn't invalidate the token.
-    # Token will remain valid until JWT expiry (4 hours).
-    # For true logout, implement token blacklist or use database storage.
-
-    return {"message": "Successfully logged out (token still valid until expiry)"}
+    payload = decode_access_token_claims(token)
+    jti = payload.get("jti") if payload else None
+    if jti:
+        await revocation_store.revoke(jti, payload["exp"])
+    elif payload is not None:
+        # Token lama tanpa jti tidak bisa di-revoke
+        return {"message": "Successfully logged out (token still valid until expiry)"}
+
+    return {"message": "Successfully logged out"}
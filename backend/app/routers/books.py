@@ -1,11 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from typing import List
+from typing import Literal, Optional
 from datetime import datetime
 from bson import ObjectId, errors as bson_errors
+from pymongo import ReturnDocument
 from app.database import get_mongodb
-from app.schemas.book import BookCreate, BookUpdate, BookResponse
+from app.schemas.book import BookCreate, BookUpdate, BookResponse, PaginatedBookResponse
 from app.dependencies import get_current_active_user
-from app.models.user import User
+from app.utils.book_query import (
+    BOOK_PROJECTION,
+    BOOK_SORT_KEYS,
+    BookQuery,
+    fetch_book_keyset_page,
+    fetch_book_offset_page,
+)
+from app.utils.pagination import CursorError, MongoKeyset
+from app.utils.user_cache import CurrentUser
 
 router = APIRouter(prefix="/books", tags=["Books"])
 
@@ -14,7 +23,7 @@ def to_object_id(id_str: str):
     try:
         return ObjectId(id_str)
     except bson_errors.InvalidId:
-        raise HTTPException(status_code=400, detail="Invalid ID format")
+        raise HTTPException(status_code=400, detail="Invalid book ID format")
 
 def book_helper(book) -> dict:
     return {
@@ -29,54 +38,88 @@ def book_helper(book) -> dict:
         "updated_at": book["updated_at"]
     }
 
-@router.get("", response_model=List[BookResponse])
+# ======================================================
+# GET all books
+# ======================================================
+@router.get("", response_model=PaginatedBookResponse)
 async def get_all_books(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
-    search: str = Query(None, description="Search by title or author"),
-    author: str = Query(None, description="Filter by author"),
-    min_price: float = Query(None, ge=0, description="Minimum price"),
-    max_price: float = Query(None, ge=0, description="Maximum price"),
+    search: Optional[str] = Query(None, description="Search by title or author"),
+    search_mode: Literal["prefix", "text"] = Query(
+        "prefix",
+        description="prefix: case-insensitive title/author prefix (index range). "
+                    "text: word search on the text index"
+    ),
+    author: Optional[str] = Query(None, description="Filter by author (case-insensitive prefix)"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    sort_by: Optional[str] = Query(None, description="Sort by field: title, author, created_at (default: insertion order)"),
+    order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor. Pass an empty value (?cursor=) to start "
+                    "cursor mode, then next_cursor/prev_cursor from the metadata. "
+                    "`skip` is ignored in cursor mode."
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "none",
+        description="Total count strategy: exact (count_documents with an index hint), "
+                    "estimated (collection metadata, unfiltered listings only) or none (has_more only)"
+    ),
     db=Depends(get_mongodb),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    query = {}
-
-    if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"author": {"$regex": search, "$options": "i"}}
-        ]
-
-    if author:
-        query["author"] = {"$regex": author, "$options": "i"}
-
-    if min_price is not None or max_price is not None:
-        query["price"] = {}
-        if min_price is not None:
-            query["price"]["$gte"] = min_price
-        if max_price is not None:
-            query["price"]["$lte"] = max_price
-
-    books = []
-    async for book in db.books.find(query).skip(skip).limit(limit):
-        books.append(book_helper(book))
+    # ============================================================================
+    # Validate cursor first (before any DB work)
+    # ============================================================================
+    keyset = None
+    if cursor is not None:
+        try:
+            keyset = MongoKeyset.from_request(cursor, sort_by, order, BOOK_SORT_KEYS, {
+                "search": search,
+                "search_mode": search_mode if search else None,
+                "author": author,
+                "min_price": min_price,
+                "max_price": max_price,
+            })
+        except CursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    book_query = BookQuery(
+        search=search,
+        search_mode=search_mode,
+        author=author,
+        min_price=min_price,
+        max_price=max_price,
+        sort_by=sort_by,
+    )
+
+    # ============================================================================
+    # CURSOR MODE - range pada (sort key, _id), tanpa skip
+    # ============================================================================
+    if keyset is not None:
+        books, metadata = await fetch_book_keyset_page(
+            db.books, book_query, keyset, limit=limit, count=count,
+        )
+    else:
+        books, metadata = await fetch_book_offset_page(
+            db.books, book_query, "desc" if order and order.lower() == "desc" else "asc",
+            skip=skip, limit=limit, count=count,
+        )
 
-    return books
+    return {
+        "data": [book_helper(book) for book in books],
+        "metadata": metadata
+    }
 
 @router.get("/{book_id}", response_model=BookResponse)
 async def get_book(
     book_id: str,
     db=Depends(get_mongodb),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    try:
-        book = await db.books.find_one({"_id": to_object_id(book_id)})
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid book ID format"
-        )
+    book = await db.books.find_one({"_id": to_object_id(book_id)}, BOOK_PROJECTION)
 
     if not book:
         raise HTTPException(
@@ -90,31 +133,41 @@ async def get_book(
 async def create_book(
     book_data: BookCreate,
     db=Depends(get_mongodb),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
+    # BSON datetime presisi milidetik: samakan dengan nilai yang tersimpan
+    now = datetime.utcnow()
+    now = now.replace(microsecond=now.microsecond // 1000 * 1000)
     book_dict = book_data.model_dump()
-    book_dict["created_at"] = datetime.utcnow()
-    book_dict["updated_at"] = datetime.utcnow()
+    book_dict["created_at"] = now
+    book_dict["updated_at"] = now
 
-    result = await db.books.insert_one(book_dict)
-    new_book = await db.books.find_one({"_id": result.inserted_id})
+    # insert_one mengisi book_dict["_id"]; tidak perlu membaca ulang
+    await db.books.insert_one(book_dict)
 
-    return book_helper(new_book)
+    return book_helper(book_dict)
 
 @router.put("/{book_id}", response_model=BookResponse)
 async def update_book(
     book_id: str,
     book_data: BookUpdate,
     db=Depends(get_mongodb),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    try:
-        book = await db.books.find_one({"_id": to_object_id(book_id)})
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid book ID format"
+    book_oid = to_object_id(book_id)
+
+    update_data = book_data.model_dump(exclude_unset=True)
+    if update_data:
+        update_data["updated_at"] = datetime.utcnow()
+        # Update + baca hasil dalam satu round-trip
+        book = await db.books.find_one_and_update(
+            {"_id": book_oid},
+            {"$set": update_data},
+            projection=BOOK_PROJECTION,
+            return_document=ReturnDocument.AFTER,
         )
+    else:
+        book = await db.books.find_one({"_id": book_oid}, BOOK_PROJECTION)
 
     if not book:
         raise HTTPException(
@@ -122,30 +175,15 @@ async def update_book(
             detail="Book not found"
         )
 
-    update_data = book_data.model_dump(exclude_unset=True)
-    if update_data:
-        update_data["updated_at"] = datetime.utcnow()
-        await db.books.update_one(
-            {"_id": ObjectId(book_id)},
-            {"$set": update_data}
-        )
-
-    updated_book = await db.books.find_one({"_id": to_object_id(book_id)})
-    return book_helper(updated_book)
+    return book_helper(book)
 
 @router.delete("/{book_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_book(
     book_id: str,
     db=Depends(get_mongodb),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    try:
-        result = await db.books.delete_one({"_id": to_object_id(book_id)})
-    except Exception:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid book ID format"
-        )
+    result = await db.books.delete_one({"_id": to_object_id(book_id)})
 
     if result.deleted_count == 0:
         raise HTTPException(
@@ -1,37 +1,99 @@
 from app.models.category import Category
 from app.schemas.category import CategoryCreate, CategoryResponse, CategoryUpdate
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 from typing import List, Optional
 from app.database import get_postgres_db
 from app.models.user import User
 from app.dependencies import get_current_active_user
+from app.utils.user_cache import CurrentUser
+from app.utils.product_import import category_id_cache
+from app.utils.response_cache import cached_json, response_cache
+from app.utils.etag import weak_etag
+from app.config import settings
 from uuid import UUID
 
 router = APIRouter(prefix="/categories", tags=["Categories"])
 
+# ======================================================
+# Load plans
+# ======================================================
+# CategoryResponse tidak pernah mengembalikan products, jadi yang di-load
+# hanya creator (id + username) lewat JOIN. Category.products tidak disentuh.
+#
+# Statement per endpoint:
+#   GET  /categories        -> 1 (page; ETag dihitung dari halaman), 0 kalau ada di response cache
+#   GET  /categories/{id}   -> 1 (row; ETag dihitung dari row), 0 kalau ada di response cache
+#   POST /categories        -> 2 (insert + reload)
+#   PUT  /categories/{id}   -> 3 (select + update + reload)
+#   DELETE /categories/{id} -> 2 (select + delete)
+# ======================================================
+CATEGORY_RESPONSE_LOAD = (
+    joinedload(Category.creator).load_only(User.id, User.username),
+)
+
+
+# Response cache: CategoryResponse memuat creator.username -> tag "users" juga.
+# Product response memuat category.name -> update/delete ikut membuang cache produk.
+CATEGORY_CACHE_TAGS = ("categories", "users")
+PRODUCT_CACHE_TAGS = ("products", "product")
+
+
+def _category_validator_item(category: CategoryResponse) -> tuple:
+    """Bagian response yang menentukan ETag: id, updated_at + creator.username."""
+    return category.id, category.updated_at, category.creator.username if category.creator else None
+
+
+async def _get_category_for_response(db: AsyncSession, category_id: UUID) -> Optional[Category]:
+    result = await db.execute(
+        select(Category)
+        .options(*CATEGORY_RESPONSE_LOAD)
+        .where(Category.id == category_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 # ======================================================
 # GET all categories
 # ======================================================
 @router.get("", response_model=List[CategoryResponse])
 async def get_all_categories(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
     search: Optional[str] = Query(None, description="Search by name"),
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    query = select(Category)
-
-    if search:
-        query = query.where((Category.name.ilike(f"%{search}%")))
+    filters = [Category.name.ilike(f"%{search}%")] if search else []
+    params = {"skip": skip, "limit": limit, "search": search}
 
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    categories = result.scalars().all()
+    # ETag dari halaman yang di-fetch, tanpa query count/max terpisah
+    def validator(categories):
+        return weak_etag(
+            "categories", sorted(params.items()), [_category_validator_item(category) for category in categories]
+        )
 
-    return categories
+    async def build():
+        query = select(Category).options(*CATEGORY_RESPONSE_LOAD).where(*filters)
+        query = query.offset(skip).limit(limit)
+        result = await db.execute(query)
+        return [CategoryResponse.model_validate(category) for category in result.scalars()]
+
+    return await cached_json(
+        "categories",
+        router="categories",
+        tags=CATEGORY_CACHE_TAGS,
+        params=params,
+        role=current_user.role_name,
+        build=build,
+        ttl=settings.RESPONSE_CACHE_REFERENCE_TTL_SECONDS,
+        request=request,
+        validator=validator,
+    )
 
 
 # ======================================================
@@ -40,21 +102,35 @@ async def get_all_categories(
 @router.get("/{category_id}", response_model=CategoryResponse)
 async def get_category(
     category_id: UUID,
+    request: Request,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    result = await db.execute(select(Category).where(Category.id == category_id))
-    category = result.scalar_one_or_none()
-
-    print(category)
-
-    if not category:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Category not found"
-        )
-
-    return category
+    async def build():
+        category = await _get_category_for_response(db, category_id)
+
+        if not category:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Category not found"
+            )
+
+        return CategoryResponse.model_validate(category)
+
+    def validator(category):
+        return weak_etag("category", *_category_validator_item(category))
+
+    return await cached_json(
+        "category",
+        router="categories",
+        tags=CATEGORY_CACHE_TAGS,
+        params={"id": category_id},
+        role=current_user.role_name,
+        build=build,
+        ttl=settings.RESPONSE_CACHE_REFERENCE_TTL_SECONDS,
+        request=request,
+        validator=validator,
+    )
 
 
 # ======================================================
@@ -64,7 +140,7 @@ async def get_category(
 async def create_category(
     category_data: CategoryCreate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
 
     new_category = Category(
@@ -75,9 +151,9 @@ async def create_category(
 
     db.add(new_category)
     await db.commit()
-    await db.refresh(new_category)
+    await response_cache.invalidate("categories")
 
-    return new_category
+    return await _get_category_for_response(db, new_category.id)
 
 
 # ======================================================
@@ -88,7 +164,7 @@ async def update_category(
     category_id: UUID,
     category_data: CategoryUpdate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(Category).where(Category.id == category_id))
     category = result.scalar_one_or_none()
@@ -114,9 +190,10 @@ async def update_category(
         category.description = category_data.description
 
     await db.commit()
-    await db.refresh(category)
+    category_id_cache.clear()  # cache nama -> id untuk import produk
+    await response_cache.invalidate("categories", *PRODUCT_CACHE_TAGS)
 
-    return category
+    return await _get_category_for_response(db, category_id)
 
 
 # ======================================================
@@ -126,7 +203,7 @@ async def update_category(
 async def delete_category(
     category_id: UUID,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(Category).where(Category.id == category_id))
     category = result.scalar_one_or_none()
@@ -139,5 +216,7 @@ async def delete_category(
 
     await db.delete(category)
     await db.commit()
+    category_id_cache.clear()
+    await response_cache.invalidate("categories", *PRODUCT_CACHE_TAGS)
 
     return None
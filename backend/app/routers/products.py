@@ -1,30 +1,248 @@
 from app.models.category import Category
-from app.models.product import Product
+from app.models.product import Product, STOCK_STATUS, STOCK_STATUS_NAMES, STOCK_STATUS_RANK, STOCK_STATUS_RANKS
 from app.schemas.product import (
     ProductCreate,
     ProductResponse,
     ProductUpdate,
     PaginatedProductResponse,
-    PaginationMetadata
+    ProductSuggestion,
+    ProductBulkCreate,
+    ProductBulkUpdate,
+    ProductBulkDelete,
+    BulkItemResult,
+    BulkOperationResponse,
+    StockAdjust,
+    StockAdjustBatch,
+    StockAdjustBatchResponse,
+    StockLevel,
+    PaginatedStockMovementResponse,
+    StockDailyMovement,
+    StockAsOfResponse,
+    ProductStatsResponse,
+    stock_status_of,
 )
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from app.models.import_job import ImportJob
+from app.models.stock_movement import StockMovement
+from app.schemas.import_job import ImportJobResponse
+from fastapi import APIRouter, Depends, File, Header, HTTPException, status, Query, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, case
-from sqlalchemy.orm import selectinload
-from typing import Optional
+from sqlalchemy import select, func, insert, update, delete
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.orm import joinedload
+from typing import Dict, Iterable, List, Literal, Optional, Set
+from datetime import date, datetime, timedelta, timezone
+import json
+from app.config import settings
 from app.database import get_postgres_db
 from app.models.user import User
-from app.dependencies import get_current_active_user
+from app.dependencies import get_current_active_user, get_stream_user
+from app.utils.user_cache import CurrentUser
+from app.utils.filters import product_filters, PRODUCT_SEARCH_COLUMNS
+from app.utils.responses import JSONResponder
+from app.utils.cache import TTLCache
+from app.utils.response_cache import cached_json, response_cache
+from app.utils.etag import weak_etag
+from app.utils.query_stats import repeats_expected
+from app.utils.export import EXPORT_MEDIA_TYPES, EXPORT_STREAMS, ExportColumn, parquet_available
+from app.utils.product_import import ProductImport, detect_format, import_runner, save_upload
+from app.utils.pagination import Keyset, CursorError, fetch_keyset_page, fetch_offset_page
+from app.utils.search import search_distance, starts_with
+from app.utils.ledger import daily_movements, movement, record_movements, stock_as_of
+from app.utils.events import BrokerFull, event_broker, product_event, publish_events, stock_status_event
+from app.utils.stock import (
+    IdempotencyKeyReused,
+    adjust_many_statement,
+    adjust_one_statement,
+    current_stock,
+    is_deadlock,
+    merge_deltas,
+    remember_response,
+    request_fingerprint,
+    stored_response,
+)
 from uuid import UUID
-import math
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
+# Fast JSON path (FAST_JSON / FAST_JSON_ROUTERS), lihat app/utils/responses.py
+respond = JSONResponder("products")
+
+# ======================================================
+# Load plans
+# ======================================================
+# Semua relasi di model default lazy="raise", jadi setiap endpoint memilih
+# sendiri apa yang di-load. ProductResponse hanya butuh id+name category dan
+# id+username creator -> cukup satu JOIN di statement yang sama.
+# GET /products (list) tidak memakai entity ORM sama sekali, lihat
+# "Read model" di bawah.
+#
+# Statement per endpoint (ETag dihitung dari halaman, tanpa statement sendiri):
+#   GET  /products          -> 1 (page dengan count(*) OVER ()), 2 in cursor mode dengan count=exact;
+#                              0 kalau ada di response cache
+#   GET  /products/{id}     -> 1 (row), 0 kalau ada di response cache
+#   GET  /products/stats    -> 1 (satu GROUP BY), 0 selama cache masih hidup
+#   POST /products          -> 5 (cek category + insert + ledger + notify + reload)
+#   PUT  /products/{id}     -> 4 (select + update + notify + reload), +1 ledger kalau stock berubah
+#   DELETE /products/{id}   -> 3 (select + delete + notify)
+#   /products/bulk          -> per chunk, lihat "BULK" di bawah
+#   POST .../stock/adjust   -> 2 (update + commit), +1 notify kalau stock_status
+#                              berpindah, +1 lookup dengan Idempotency-Key
+# (notify = pg_notify untuk GET /products/events, hanya di PostgreSQL)
+# ======================================================
+PRODUCT_RESPONSE_LOAD = (
+    joinedload(Product.category).load_only(Category.id, Category.name),
+    joinedload(Product.creator).load_only(User.id, User.username),
+)
+
+
+# ======================================================
+# Response cache tags (lihat app/utils/response_cache.py)
+# ======================================================
+# Response produk memuat category.name dan creator.username, jadi ikut
+# di-tag "categories" dan "users". Write satu produk membuang list +
+# detail produk itu; write banyak produk (bulk, import, batch adjust)
+# membuang list + semua detail ("product").
+PRODUCT_LIST_CACHE_TAGS = ("products", "categories", "users")
+
+
+def _product_cache_tags(product_id: UUID) -> tuple:
+    return ("product", f"product:{product_id}", "categories", "users")
+
+
+def _product_written(product_id: UUID) -> tuple:
+    return ("products", f"product:{product_id}")
+
+
+PRODUCTS_WRITTEN = ("products", "product")
+
+
+async def _invalidate_after_bulk(results: List[BulkItemResult]) -> None:
+    if any(item.status != "error" for item in results):
+        await response_cache.invalidate(*PRODUCTS_WRITTEN)
+
+
+async def _get_product_for_response(db: AsyncSession, product_id: UUID) -> Optional[Product]:
+    result = await db.execute(
+        select(Product)
+        .options(*PRODUCT_RESPONSE_LOAD)
+        .where(Product.id == product_id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
+# ======================================================
+# Sort keys
+# ======================================================
+# Status is computed from stock and low_stock_threshold (STOCK_STATUS_RANK,
+# indexed together with id, see app/models/product.py):
+# - red (stock == 0): priority 0 (most urgent)
+# - yellow (0 < stock <= low_stock_threshold): priority 1
+# - green (stock > low_stock_threshold): priority 2 (least urgent)
+
+# Setiap sort diakhiri Product.id sebagai tiebreaker unik (wajib untuk
+# keyset pagination, dan membuat urutan offset pagination stabil).
+PRODUCT_SORT_KEYS = {
+    None: (Product.id,),
+    "name": (Product.name, Product.id),
+    "stock": (Product.stock, Product.id),
+    "price": (Product.price, Product.id),
+    "created_at": (Product.created_at, Product.id),
+    "status": (STOCK_STATUS_RANK, Product.id),
+}
+
+
+def _product_sort_keys(search: Optional[str]):
+    # sort_by=relevance hanya bermakna kalau ada search term:
+    # jarak trigram ke name, asc = paling relevan dulu
+    if not search:
+        return PRODUCT_SORT_KEYS
+    return {
+        **PRODUCT_SORT_KEYS,
+        "relevance": (search_distance(PRODUCT_SEARCH_COLUMNS, search), Product.id),
+    }
+
+
+# ======================================================
+# Read model (GET /products list)
+# ======================================================
+# List tidak butuh entity ORM: hanya kolom yang dipakai ProductResponse,
+# category.name & creator.username lewat JOIN di statement yang sama, dan
+# stock_status dihitung di SQL. Row langsung dipetakan ke dict response,
+# tanpa identity map / instance state. Endpoint tulis tetap memakai ORM.
+
+PRODUCT_LIST_COLUMNS = (
+    Product.id,
+    Product.name,
+    Product.description,
+    Product.price,
+    Product.stock,
+    Product.low_stock_threshold,
+    Product.image_url,
+    Product.category_id,
+    Product.created_by,
+    Product.created_at,
+    Product.updated_at,
+    Category.name.label("category_name"),
+    User.username.label("creator_username"),
+    STOCK_STATUS.label("stock_status"),
+)
+
+
+def _product_list_query(filters):
+    return (
+        select(*PRODUCT_LIST_COLUMNS)
+        .select_from(Product)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(User, User.id == Product.created_by)
+        .where(*filters)
+    )
+
+
+def _product_validator_item(item) -> tuple:
+    """Bagian item yang menentukan ETag: id, updated_at + nilai relasi di response."""
+    if isinstance(item, dict):
+        return item["id"], item["updated_at"], item["category"], item["creator"]
+    return (
+        item.id,
+        item.updated_at,
+        item.category.name if item.category else None,
+        item.creator.username if item.creator else None,
+    )
+
+
+def _product_list_item(row) -> dict:
+    """Row read model -> dict dengan bentuk (dan urutan key) ProductResponse."""
+    return {
+        "name": row.name,
+        "description": row.description,
+        "price": float(row.price) if row.price is not None else None,
+        "stock": row.stock,
+        "low_stock_threshold": row.low_stock_threshold,
+        "image_url": row.image_url,
+        "category_id": row.category_id,
+        "id": row.id,
+        "creator": (
+            {"id": row.created_by, "username": row.creator_username}
+            if row.creator_username is not None else None
+        ),
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+        "category": (
+            {"id": row.category_id, "name": row.category_name}
+            if row.category_name is not None else None
+        ),
+        "stock_status": row.stock_status,
+    }
+
+
 # ======================================================
 # GET all products
 # ======================================================
 @router.get("", response_model=PaginatedProductResponse)
 async def get_all_products(
+    request: Request,
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
     search: Optional[str] = Query(None, description="Search by name"),
@@ -32,187 +250,1032 @@ async def get_all_products(
     stock_status: Optional[str] = Query(None, description="Filter by stock status: red, yellow, green"),
     min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
     max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
-    sort_by: Optional[str] = Query(None, description="Sort by field: name, stock, price, created_at, status"),
+    sort_by: Optional[str] = Query(None, description="Sort by field: name, stock, price, created_at, status, relevance (with search)"),
     order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor. Pass an empty value (?cursor=) to start "
+                    "cursor mode, then next_cursor/prev_cursor from the metadata. "
+                    "`skip` is ignored in cursor mode."
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "exact",
+        description="Total count strategy: exact (window count in the page query), "
+                    "estimated (planner statistics, unfiltered listings only) or none (has_more only)"
+    ),
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     # ============================================================================
-    # Build base query for filtering
+    # Validate cursor first (before any DB work)
     # ============================================================================
-    base_query = select(Product)
-
-    if search:
-        base_query = base_query.where((Product.name.ilike(f"%{search}%")))
+    sort_keys_by_field = _product_sort_keys(search)
 
-    if category_id:
-        base_query = base_query.where(Product.category_id == category_id)
+    keyset = None
+    if cursor is not None:
+        # Cursor terikat ke filter: posisi dari hasil filter lain tidak bermakna
+        cursor_filters = {
+            "search": search, "category_id": category_id,
+            "stock_status": stock_status.lower() if stock_status else None,
+            "min_price": min_price, "max_price": max_price,
+        }
+        try:
+            keyset = Keyset.from_request(cursor, sort_by, order, sort_keys_by_field, cursor_filters)
+        except CursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # ============================================================================
-    # FILTER by stock_status (red/yellow/green)
+    # Build filters once (dipakai query halaman, query count dan validator ETag)
     # ============================================================================
-    if stock_status:
-        status_value = stock_status.lower()
-        if status_value == "red":
-            # Red: stock == 0
-            base_query = base_query.where(Product.stock == 0)
-        elif status_value == "yellow":
-            # Yellow: 0 < stock <= low_stock_threshold
-            base_query = base_query.where(
-                (Product.stock > 0) &
-                (Product.stock <= Product.low_stock_threshold)
-            )
-        elif status_value == "green":
-            # Green: stock > low_stock_threshold
-            base_query = base_query.where(Product.stock > Product.low_stock_threshold)
+    filters = product_filters(
+        search=search,
+        category_id=category_id,
+        stock_status=stock_status,
+        min_price=min_price,
+        max_price=max_price,
+    )
+    params = {
+        "skip": skip, "limit": limit, "search": search, "category_id": category_id,
+        "stock_status": stock_status, "min_price": min_price, "max_price": max_price,
+        "sort_by": sort_by, "order": order, "cursor": cursor, "count": count,
+    }
 
     # ============================================================================
-    # FILTER by price range (min_price and max_price)
+    # Conditional GET: ETag dari halaman yang di-fetch (params + metadata +
+    # id/updated_at/relasi per item). Cocok dengan If-None-Match -> 304 tanpa
+    # serialisasi, tanpa query tambahan.
     # ============================================================================
-    if min_price is not None:
-        base_query = base_query.where(Product.price >= min_price)
-
-    if max_price is not None:
-        base_query = base_query.where(Product.price <= max_price)
+    def validator(page):
+        items = page["data"]
+        return weak_etag(
+            "products",
+            sorted(params.items(), key=str),
+            page["metadata"].model_dump_json(),
+            [_product_validator_item(item) for item in items],
+        )
 
     # ============================================================================
-    # Get total count (before pagination)
+    # Response cache: key = role + semua query param (lihat app/utils/response_cache.py)
     # ============================================================================
-    # Build count query with same filters as base_query
-    count_query = select(func.count(Product.id))
-
-    if search:
-        count_query = count_query.where((Product.name.ilike(f"%{search}%")))
-
-    if category_id:
-        count_query = count_query.where(Product.category_id == category_id)
-
-    if stock_status:
-        status_value = stock_status.lower()
-        if status_value == "red":
-            count_query = count_query.where(Product.stock == 0)
-        elif status_value == "yellow":
-            count_query = count_query.where(
-                (Product.stock > 0) &
-                (Product.stock <= Product.low_stock_threshold)
+    async def build():
+        query = _product_list_query(filters)
+        count_query = select(func.count(Product.id)).where(*filters)
+
+        # ============================================================================
+        # CURSOR MODE - keyset pagination (opt-in via `cursor`)
+        # Sort key + id dibandingkan sebagai row value, jadi halaman ke-2000 sama
+        # cepatnya dengan halaman pertama dan tidak bergeser saat ada insert baru.
+        # ============================================================================
+        if keyset is not None:
+            rows, metadata = await fetch_keyset_page(
+                db, query, count_query, keyset,
+                limit=limit, count=count, table_name=Product.__tablename__, filtered=bool(filters),
             )
-        elif status_value == "green":
-            count_query = count_query.where(Product.stock > Product.low_stock_threshold)
+            return {
+                "data": [_product_list_item(row) for row in rows],
+                "metadata": metadata
+            }
 
-    if min_price is not None:
-        count_query = count_query.where(Product.price >= min_price)
+        # ============================================================================
+        # SORTING - Sort by name, stock, price, created_at, or status
+        # Status: asc = red → yellow → green (urgent first),
+        #         desc = green → yellow → red (healthy first)
+        # ============================================================================
+        if sort_by in sort_keys_by_field:
+            sort_keys = sort_keys_by_field[sort_by]
+            # Apply order (asc or desc)
+            if order and order.lower() == "desc":
+                query = query.order_by(*[key.desc() for key in sort_keys])
+            else:
+                query = query.order_by(*[key.asc() for key in sort_keys])
 
-    if max_price is not None:
-        count_query = count_query.where(Product.price <= max_price)
+        # ============================================================================
+        # Apply pagination (+ total count sesuai strategy, satu round-trip)
+        # ============================================================================
+        rows, metadata = await fetch_offset_page(
+            db, query, count_query,
+            skip=skip, limit=limit, count=count, table_name=Product.__tablename__, filtered=bool(filters),
+        )
 
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+        return {
+            "data": [_product_list_item(row) for row in rows],
+            "metadata": metadata
+        }
 
-    # ============================================================================
-    # Build query with eager loading
-    # ============================================================================
-    query = base_query.options(
-        selectinload(Product.category),
-        selectinload(Product.creator),
+    return await cached_json(
+        "products",
+        router="products",
+        tags=PRODUCT_LIST_CACHE_TAGS,
+        params=params,
+        role=current_user.role_name,
+        build=build,
+        request=request,
+        validator=validator,
     )
 
-    # ============================================================================
-    # SORTING - Sort by name, stock, price, created_at, or status
-    # ============================================================================
-    if sort_by:
-        if sort_by == "status":
-            # ============================================================================
-            # Special handling for "status" sorting
-            # Status is computed from stock and low_stock_threshold:
-            # - red (stock == 0): priority 0 (most urgent)
-            # - yellow (0 < stock <= low_stock_threshold): priority 1
-            # - green (stock > low_stock_threshold): priority 2 (least urgent)
-            # ============================================================================
-            status_priority = case(
-                (Product.stock == 0, 0),  # red
-                (Product.stock <= Product.low_stock_threshold, 1),  # yellow
-                else_=2  # green
+
+# ======================================================
+# GET stats (dashboard)
+# ======================================================
+# Satu query agregat GROUP BY (category, status rank); total, per status dan
+# per category dirangkum dari hasil itu (paling banyak 3 row per category).
+# Hasil di-cache per worker PRODUCT_STATS_CACHE_SECONDS, jadi angka bisa
+# tertinggal beberapa detik dari write terakhir.
+# ======================================================
+stats_cache = TTLCache(maxsize=1, ttl=settings.PRODUCT_STATS_CACHE_SECONDS)
+
+
+def _stock_totals() -> dict:
+    return {"products": 0, "stock_units": 0, "stock_value": 0.0}
+
+
+def _add_totals(totals: dict, row) -> None:
+    totals["products"] += row.products
+    totals["stock_units"] += row.stock_units
+    totals["stock_value"] += float(row.stock_value)
+
+
+async def _product_stats(db: AsyncSession) -> dict:
+    result = await db.execute(
+        select(
+            Product.category_id,
+            Category.name.label("category_name"),
+            STOCK_STATUS_RANK.label("rank"),
+            func.count().label("products"),
+            func.coalesce(func.sum(Product.stock), 0).label("stock_units"),
+            func.coalesce(func.sum(Product.price * Product.stock), 0).label("stock_value"),
+        )
+        .select_from(Product)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .group_by(Product.category_id, Category.name, STOCK_STATUS_RANK)
+    )
+
+    total = _stock_totals()
+    by_status = {name: _stock_totals() for name in STOCK_STATUS_RANKS}
+    by_category: Dict[UUID, dict] = {}
+    for row in result:
+        status_name = STOCK_STATUS_NAMES[row.rank]
+        category = by_category.setdefault(row.category_id, {
+            "category_id": row.category_id,
+            "category_name": row.category_name,
+            **_stock_totals(),
+            "by_status": {name: 0 for name in STOCK_STATUS_RANKS},
+        })
+        _add_totals(total, row)
+        _add_totals(by_status[status_name], row)
+        _add_totals(category, row)
+        category["by_status"][status_name] += row.products
+
+    return {
+        "total": total,
+        "by_status": by_status,
+        "by_category": sorted(by_category.values(), key=lambda item: item["category_name"] or ""),
+        "generated_at": datetime.utcnow(),
+    }
+
+
+@router.get("/stats", response_model=ProductStatsResponse)
+async def get_product_stats(
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    stats = stats_cache.get("stats", None)
+    if stats is None:
+        stats = await _product_stats(db)
+        stats_cache.set("stats", stats)
+    return respond(stats)
+
+
+# ======================================================
+# GET event stream (SSE)
+# ======================================================
+# create/update/delete + transisi stock_status, dari semua worker lewat
+# LISTEN/NOTIFY (lihat app/utils/events.py). Setiap event dikirim sebagai
+# pesan SSE tanpa nama (`data: {"type": ...}`), jadi cukup onmessage di
+# EventSource. Subscriber lambat diputus setelah event `stream.overflow`;
+# client sebaiknya reconnect lalu refetch.
+# ======================================================
+def _sse(data: dict) -> str:
+    return f"data: {json.dumps(data, separators=(',', ':'), default=str)}\n\n"
+
+
+@router.get("/events", response_class=StreamingResponse)
+async def product_events(
+    current_user: CurrentUser = Depends(get_stream_user)
+):
+    if not settings.PRODUCT_EVENTS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product events are disabled"
+        )
+    try:
+        subscription = event_broker.subscribe()
+    except BrokerFull:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event stream subscribers, retry later"
+        )
+
+    async def stream():
+        try:
+            yield f"retry: {settings.PRODUCT_EVENTS_HEARTBEAT_SECONDS * 1000}\n\n"
+            yield _sse({"type": "stream.open"})
+            while True:
+                event = await subscription.get(settings.PRODUCT_EVENTS_HEARTBEAT_SECONDS)
+                if subscription.dropped:
+                    yield _sse({"type": "stream.overflow"})
+                    return
+                # Komentar SSE sebagai heartbeat (menjaga koneksi lewat proxy)
+                yield _sse(event) if event is not None else ": ping\n\n"
+        finally:
+            event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ======================================================
+# GET autocomplete suggestions (search-as-you-type)
+# ======================================================
+@router.get("/suggest", response_model=List[ProductSuggestion])
+async def suggest_products(
+    q: str = Query(..., min_length=1, max_length=50, description="Name prefix"),
+    limit: int = Query(10, ge=1, le=20, description="Number of suggestions"),
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    # Hanya kolom id + name; prefix match dilayani trigram index di PostgreSQL
+    result = await db.execute(
+        select(Product.id, Product.name)
+        .where(starts_with(Product.name, q))
+        .order_by(func.length(Product.name), Product.name)
+        .limit(limit)
+    )
+    return result.mappings().all()
+
+
+# ======================================================
+# BULK create / update / delete (catalog sync)
+# ======================================================
+# - category id divalidasi sekaligus dalam satu query
+# - tulis per chunk PRODUCT_BULK_CHUNK_SIZE: multi-row INSERT ... RETURNING
+#   (create), executemany UPDATE by primary key (update), DELETE ... IN
+#   ... RETURNING (delete); commit per chunk
+# - hasil per item (urut sesuai request); item yang gagal validasi tidak
+#   membatalkan item lain. Kalau satu chunk ditolak database (mis. race
+#   unique name), chunk itu di-rollback dan semua itemnya dilaporkan error.
+#
+# Statement per chunk: create/update 4 (cek name + write + ledger + commit),
+# delete 2.
+# Harus dideklarasikan sebelum /{product_id}.
+# ======================================================
+# Kolom NOT NULL yang tidak boleh di-set null lewat PATCH
+NON_NULLABLE_UPDATE_FIELDS = ("name", "price", "stock", "low_stock_threshold", "category_id")
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _check_bulk_size(count: int) -> None:
+    if count > settings.PRODUCT_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many items (max {settings.PRODUCT_BULK_MAX_ITEMS} per request)"
+        )
+
+
+async def _existing_category_ids(db: AsyncSession, category_ids: Set[UUID]) -> Set[UUID]:
+    if not category_ids:
+        return set()
+    result = await db.execute(select(Category.id).where(Category.id.in_(category_ids)))
+    return set(result.scalars())
+
+
+async def _product_ids_by_name(db: AsyncSession, names: Iterable[str]) -> Dict[str, UUID]:
+    names = list(names)
+    if not names:
+        return {}
+    result = await db.execute(select(Product.name, Product.id).where(Product.name.in_(names)))
+    return {name: product_id for name, product_id in result.all()}
+
+
+def _bulk_error(index: int, error: str, product_id: Optional[UUID] = None) -> BulkItemResult:
+    return BulkItemResult(index=index, id=product_id, status="error", error=error)
+
+
+def _bulk_response(results: List[BulkItemResult]) -> BulkOperationResponse:
+    results.sort(key=lambda item: item.index)
+    failed = sum(1 for item in results if item.status == "error")
+    return BulkOperationResponse(
+        succeeded=len(results) - failed,
+        failed=failed,
+        results=results
+    )
+
+
+def _created_event(product_id: UUID, name: str, stock: int, threshold: int) -> dict:
+    return product_event(
+        "product.created", product_id, name=name, stock=stock, stock_status=stock_status_of(stock, threshold)
+    )
+
+
+def _updated_events(product_id: UUID, fields: dict, old_stock: int, old_threshold: int) -> List[dict]:
+    """product.updated (+ product.stock_status kalau statusnya berpindah)."""
+    stock = fields.get("stock", old_stock)
+    threshold = fields.get("low_stock_threshold", old_threshold)
+    new_status = stock_status_of(stock, threshold)
+    updated = product_event(
+        "product.updated", product_id,
+        **({"name": fields["name"]} if "name" in fields else {}),
+        stock=stock, stock_status=new_status,
+    )
+    return [updated] + stock_status_event(
+        product_id, stock, stock_status_of(old_stock, old_threshold), new_status
+    )
+
+
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_create_products(
+    payload: ProductBulkCreate,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    _check_bulk_size(len(payload.items))
+    results: List[BulkItemResult] = []
+
+    valid_categories = await _existing_category_ids(
+        db, {item.category_id for item in payload.items}
+    )
+
+    # Validasi tanpa DB: category + duplikat name di dalam request
+    pending = []
+    seen_names = set()
+    for index, item in enumerate(payload.items):
+        if item.category_id not in valid_categories:
+            results.append(_bulk_error(index, "Category not found"))
+            continue
+        if item.name in seen_names:
+            results.append(_bulk_error(index, "Duplicate name in request"))
+            continue
+        seen_names.add(item.name)
+        # Semua row wajib punya key yang sama (executemany); default = default kolom
+        pending.append((index, {
+            "name": item.name,
+            "description": item.description,
+            "price": item.price if item.price is not None else 0,
+            "stock": item.stock if item.stock is not None else 0,
+            "low_stock_threshold": (
+                item.low_stock_threshold if item.low_stock_threshold is not None else 10
+            ),
+            "image_url": item.image_url,
+            "category_id": item.category_id,
+            "created_by": current_user.id,
+        }))
+
+    # Statement yang sama per chunk (disengaja, bukan N+1)
+    with repeats_expected():
+        for chunk in _chunks(pending, settings.PRODUCT_BULK_CHUNK_SIZE):
+            taken = await _product_ids_by_name(db, (row["name"] for _, row in chunk))
+            writable = []
+            for index, row in chunk:
+                if row["name"] in taken:
+                    results.append(_bulk_error(index, "Product name already exists"))
+                else:
+                    writable.append((index, row))
+            if not writable:
+                continue
+
+            try:
+                result = await db.execute(
+                    insert(Product).returning(Product.id, sort_by_parameter_order=True),
+                    [row for _, row in writable]
+                )
+                new_ids = result.scalars().all()
+                await record_movements(db, [
+                    movement(new_id, row["stock"], row["stock"], "create", user_id=current_user.id)
+                    for (_, row), new_id in zip(writable, new_ids)
+                ])
+                await publish_events(db, [
+                    _created_event(new_id, row["name"], row["stock"], row["low_stock_threshold"])
+                    for (_, row), new_id in zip(writable, new_ids)
+                ])
+                await db.commit()
+            except IntegrityError as e:
+                await db.rollback()
+                error = f"Batch rejected by database: {e.orig}"
+                results.extend(_bulk_error(index, error) for index, _ in writable)
+                continue
+
+            results.extend(
+                BulkItemResult(index=index, id=new_id, status="created")
+                for (index, _), new_id in zip(writable, new_ids)
             )
 
-            # Apply order (asc or desc)
-            if order and order.lower() == "desc":
-                # desc: green → yellow → red (healthy first)
-                query = query.order_by(status_priority.desc())
-            else:
-                # asc: red → yellow → green (urgent first)
-                query = query.order_by(status_priority.asc())
-        else:
-            # Regular column sorting
-            sort_columns = {
-                "name": Product.name,
-                "stock": Product.stock,
-                "price": Product.price,
-                "created_at": Product.created_at
-            }
+    await _invalidate_after_bulk(results)
+    return _bulk_response(results)
+
+
+@router.patch("/bulk", response_model=BulkOperationResponse)
+async def bulk_update_products(
+    payload: ProductBulkUpdate,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    _check_bulk_size(len(payload.items))
+    results: List[BulkItemResult] = []
+
+    valid_categories = await _existing_category_ids(
+        db, {item.category_id for item in payload.items if item.category_id is not None}
+    )
+
+    pending = []
+    seen_ids = set()
+    seen_names = set()
+    for index, item in enumerate(payload.items):
+        # ✅ Update only provided fields (sama seperti PUT /{product_id})
+        fields = item.model_dump(exclude_unset=True, exclude={"id"})
+        if item.id in seen_ids:
+            results.append(_bulk_error(index, "Duplicate id in request", item.id))
+            continue
+        null_fields = [key for key in NON_NULLABLE_UPDATE_FIELDS if key in fields and fields[key] is None]
+        if null_fields:
+            results.append(_bulk_error(index, f"Fields cannot be null: {', '.join(null_fields)}", item.id))
+            continue
+        if "category_id" in fields and fields["category_id"] not in valid_categories:
+            results.append(_bulk_error(index, "Category not found", item.id))
+            continue
+        if "name" in fields:
+            if fields["name"] in seen_names:
+                results.append(_bulk_error(index, "Duplicate name in request", item.id))
+                continue
+            seen_names.add(fields["name"])
+        seen_ids.add(item.id)
+        pending.append((index, item.id, fields))
+
+    # Statement yang sama per chunk (disengaja, bukan N+1)
+    with repeats_expected():
+        for chunk in _chunks(pending, settings.PRODUCT_BULK_CHUNK_SIZE):
+            query = select(Product.id, Product.stock, Product.low_stock_threshold).where(
+                Product.id.in_([product_id for _, product_id, _ in chunk])
+            )
+            # Stok lama dikunci sampai commit supaya delta di ledger tepat
+            if any("stock" in fields for _, _, fields in chunk):
+                query = query.with_for_update()
+            result = await db.execute(query)
+            existing = {product_id: (stock, threshold) for product_id, stock, threshold in result.all()}
+            taken = await _product_ids_by_name(
+                db, (fields["name"] for _, _, fields in chunk if "name" in fields)
+            )
 
-            if sort_by in sort_columns:
-                column = sort_columns[sort_by]
-                # Apply order (asc or desc)
-                if order and order.lower() == "desc":
-                    query = query.order_by(column.desc())
+            now = datetime.utcnow()
+            writable = []
+            for index, product_id, fields in chunk:
+                if product_id not in existing:
+                    results.append(_bulk_error(index, "Product not found", product_id))
+                elif taken.get(fields.get("name"), product_id) != product_id:
+                    results.append(_bulk_error(index, "Product name already exists", product_id))
                 else:
-                    query = query.order_by(column.asc())
+                    writable.append((index, product_id, {"id": product_id, **fields, "updated_at": now}))
+            if not writable:
+                continue
 
-    # ============================================================================
-    # Apply pagination
-    # ============================================================================
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    products = result.scalars().unique().all()
+            try:
+                # ORM bulk UPDATE by primary key: satu executemany per kombinasi kolom
+                await db.execute(update(Product), [params for _, _, params in writable])
+                await record_movements(db, [
+                    movement(
+                        product_id, params["stock"] - existing[product_id][0], params["stock"], "update",
+                        user_id=current_user.id, at=now,
+                    )
+                    for _, product_id, params in writable if "stock" in params
+                ])
+                await publish_events(db, [
+                    event
+                    for _, product_id, params in writable
+                    for event in _updated_events(product_id, params, *existing[product_id])
+                ])
+                await db.commit()
+            except IntegrityError as e:
+                await db.rollback()
+                error = f"Batch rejected by database: {e.orig}"
+                results.extend(_bulk_error(index, error, product_id) for index, product_id, _ in writable)
+                continue
 
-    # ============================================================================
-    # Calculate pagination metadata
-    # ============================================================================
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = math.ceil(total / limit) if limit > 0 else 0
-
-    metadata = PaginationMetadata(
-        total=total,
-        skip=skip,
-        limit=limit,
-        page=page,
-        total_pages=total_pages
+            results.extend(
+                BulkItemResult(index=index, id=product_id, status="updated")
+                for index, product_id, _ in writable
+            )
+
+    await _invalidate_after_bulk(results)
+    return _bulk_response(results)
+
+
+@router.delete("/bulk", response_model=BulkOperationResponse)
+async def bulk_delete_products(
+    payload: ProductBulkDelete,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    _check_bulk_size(len(payload.ids))
+    results: List[BulkItemResult] = []
+
+    pending = []
+    seen_ids = set()
+    for index, product_id in enumerate(payload.ids):
+        if product_id in seen_ids:
+            results.append(_bulk_error(index, "Duplicate id in request", product_id))
+            continue
+        seen_ids.add(product_id)
+        pending.append((index, product_id))
+
+    # Statement yang sama per chunk (disengaja, bukan N+1)
+    with repeats_expected():
+        for chunk in _chunks(pending, settings.PRODUCT_BULK_CHUNK_SIZE):
+            try:
+                result = await db.execute(
+                    delete(Product)
+                    .where(Product.id.in_([product_id for _, product_id in chunk]))
+                    .returning(Product.id)
+                    .execution_options(synchronize_session=False)
+                )
+                deleted = set(result.scalars())
+                await publish_events(db, [product_event("product.deleted", product_id) for product_id in deleted])
+                await db.commit()
+            except IntegrityError as e:
+                await db.rollback()
+                error = f"Batch rejected by database: {e.orig}"
+                results.extend(_bulk_error(index, error, product_id) for index, product_id in chunk)
+                continue
+
+            for index, product_id in chunk:
+                if product_id in deleted:
+                    results.append(BulkItemResult(index=index, id=product_id, status="deleted"))
+                else:
+                    results.append(_bulk_error(index, "Product not found", product_id))
+
+    await _invalidate_after_bulk(results)
+    return _bulk_response(results)
+
+
+# ======================================================
+# STOCK adjustment (delta, atomik)
+# ======================================================
+# stock = stock + delta dalam satu UPDATE ... WHERE stock + delta >= 0
+# RETURNING (lihat app/utils/stock.py): tidak ada read-modify-write, jadi
+# adjustment paralel ke SKU yang sama tidak hilang, dan row lock hanya
+# dipegang sampai commit berikutnya. Header Idempotency-Key opsional:
+# retry dengan key yang sama mengembalikan response pertama.
+#
+# Batch bersifat all-or-nothing: kalau satu SKU tidak ada / stoknya kurang,
+# seluruh batch di-rollback (409). Harus dideklarasikan sebelum /{product_id}.
+# ======================================================
+IDEMPOTENCY_KEY_HEADER = Header(
+    None,
+    alias="Idempotency-Key",
+    max_length=64,
+    description="Unique key per adjustment; retries with the same key return the first result",
+)
+
+
+async def _replay_adjustment(
+    db: AsyncSession, idempotency_key: Optional[str], request_hash: str, response: Response
+) -> Optional[dict]:
+    if idempotency_key is None:
+        return None
+    try:
+        stored = await stored_response(db, idempotency_key, request_hash)
+    except IdempotencyKeyReused:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key already used for a different request"
+        )
+    if stored is not None:
+        response.headers["Idempotent-Replayed"] = "true"
+    return stored
+
+
+async def _commit_adjustment(
+    db: AsyncSession,
+    idempotency_key: Optional[str],
+    request_hash: str,
+    result: dict,
+    current_user: CurrentUser,
+    response: Response,
+    cache_tags: tuple,
+) -> dict:
+    if idempotency_key is not None:
+        remember_response(db, idempotency_key, request_hash, result, current_user.id)
+
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Request paralel dengan key yang sama commit lebih dulu:
+        # adjustment ini ikut di-rollback dan response pertama dikembalikan
+        await db.rollback()
+        stored = await _replay_adjustment(db, idempotency_key, request_hash, response)
+        if stored is None:
+            raise
+        return stored
+
+    await response_cache.invalidate(*cache_tags)
+    return result
+
+
+def _adjusted_events(row, delta: int) -> List[dict]:
+    return stock_status_event(
+        row.id,
+        row.stock,
+        stock_status_of(row.stock - delta, row.low_stock_threshold),
+        stock_status_of(row.stock, row.low_stock_threshold),
+    )
+
+
+@router.post("/stock/adjust", response_model=StockAdjustBatchResponse)
+async def adjust_stock_batch(
+    payload: StockAdjustBatch,
+    response: Response,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    if len(payload.items) > settings.STOCK_ADJUST_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Too many items (max {settings.STOCK_ADJUST_MAX_ITEMS} per request)"
+        )
+
+    request_hash = request_fingerprint(current_user.id, "stock/adjust", payload.model_dump())
+    deltas = merge_deltas(payload.items)
+    # Item +n/-n untuk SKU yang sama saling meniadakan: no-op yang tetap
+    # mengunci row, jadi ditolak sebelum UPDATE
+    cancelled = [product_id for product_id, delta in deltas.items() if delta == 0]
+    if cancelled:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={
+                "message": "Stock adjustment rejected, no stock was changed",
+                "errors": [
+                    {"product_id": str(product_id), "error": "Deltas for this product add up to 0"}
+                    for product_id in cancelled
+                ],
+            }
+        )
+
+    # Urutan lock di UPDATE ... FROM tidak dijamin, jadi batch yang
+    # bersinggungan bisa deadlock; transaksi yang jadi korban diulang.
+    # Minimal satu percobaan walaupun setting retry negatif.
+    retries = max(settings.STOCK_ADJUST_DEADLOCK_RETRIES, 0)
+    for attempt in range(retries + 1):
+        try:
+            stored = await _replay_adjustment(db, idempotency_key, request_hash, response)
+            if stored is not None:
+                return stored
+            result = await db.execute(
+                adjust_many_statement(deltas, ref=idempotency_key, user_id=current_user.id)
+            )
+            rows = {row.id: row for row in result}
+            break
+        except DBAPIError as e:
+            await db.rollback()
+            if not is_deadlock(e) or attempt == retries:
+                raise
+
+    rejected = [product_id for product_id in deltas if product_id not in rows]
+    if rejected:
+        await db.rollback()
+        stock = await current_stock(db, rejected)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "message": "Stock adjustment rejected, no stock was changed",
+                "errors": [
+                    {
+                        "product_id": str(product_id),
+                        "error": (
+                            f"Insufficient stock (current: {stock[product_id]}, delta: {deltas[product_id]})"
+                            if product_id in stock else "Product not found"
+                        ),
+                    }
+                    for product_id in rejected
+                ],
+            }
+        )
+
+    # Adjustment hanya mem-publish transisi status (jalur panas, stok berubah terus)
+    await publish_events(db, [
+        event
+        for product_id, row in rows.items()
+        for event in _adjusted_events(row, deltas[product_id])
+    ])
+
+    body = StockAdjustBatchResponse(
+        items=[StockLevel.model_validate(rows[product_id]) for product_id in deltas]
+    ).model_dump(mode="json")
+    return await _commit_adjustment(
+        db, idempotency_key, request_hash, body, current_user, response, PRODUCTS_WRITTEN
+    )
+
+
+@router.post("/{product_id}/stock/adjust", response_model=StockLevel)
+async def adjust_product_stock(
+    product_id: UUID,
+    payload: StockAdjust,
+    response: Response,
+    idempotency_key: Optional[str] = IDEMPOTENCY_KEY_HEADER,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    request_hash = request_fingerprint(
+        current_user.id, f"{product_id}/stock/adjust", payload.model_dump()
+    )
+    stored = await _replay_adjustment(db, idempotency_key, request_hash, response)
+    if stored is not None:
+        return stored
+
+    result = await db.execute(
+        adjust_one_statement(product_id, payload.delta, ref=idempotency_key, user_id=current_user.id)
     )
+    row = result.one_or_none()
+
+    if row is None:
+        await db.rollback()
+        stock = await current_stock(db, [product_id])
+        if product_id not in stock:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Insufficient stock (current: {stock[product_id]}, delta: {payload.delta})"
+        )
+
+    await publish_events(db, _adjusted_events(row, payload.delta))
 
-    return PaginatedProductResponse(
-        data=products,
-        metadata=metadata
+    body = StockLevel.model_validate(row).model_dump(mode="json")
+    return await _commit_adjustment(
+        db, idempotency_key, request_hash, body, current_user, response, _product_written(product_id)
     )
 
 
 # ======================================================
-# GET product by ID
+# STOCK ledger (movement history, per hari, stock as of T)
 # ======================================================
-@router.get("/{product_id}", response_model=ProductResponse)
-async def get_product(
+# Ledger ditulis oleh semua write path (lihat app/utils/ledger.py). History
+# tidak butuh produk masih ada: movement produk yang dihapus tetap terbaca.
+# ======================================================
+# History selalu keyset (terbaru dulu); ledger terlalu besar untuk OFFSET/count
+MOVEMENT_SORT_KEYS = {None: (StockMovement.id,)}
+
+# Rentang maksimum GET .../stock/daily
+STOCK_DAILY_MAX_DAYS = 366
+
+
+@router.get("/{product_id}/stock/movements", response_model=PaginatedStockMovementResponse)
+async def get_stock_movements(
     product_id: UUID,
+    limit: int = Query(50, ge=1, le=200, description="Number of movements to return"),
+    cursor: Optional[str] = Query(None, description="next_cursor/prev_cursor from the previous page"),
+    since: Optional[datetime] = Query(None, description="Only movements at or after this time (UTC)"),
+    until: Optional[datetime] = Query(None, description="Only movements before this time (UTC)"),
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    result = await db.execute(
-        select(Product)
-        .options(
-            selectinload(Product.category),
-            selectinload(Product.creator),
+    try:
+        keyset = Keyset.from_request(
+            cursor or "", None, "desc", MOVEMENT_SORT_KEYS,
+            {"product_id": product_id, "since": since, "until": until},
         )
-        .where(Product.id == product_id)
+    except CursorError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    filters = [StockMovement.product_id == product_id]
+    if since is not None:
+        filters.append(StockMovement.created_at >= _utc_naive(since))
+    if until is not None:
+        filters.append(StockMovement.created_at < _utc_naive(until))
+
+    rows, metadata = await fetch_keyset_page(
+        db,
+        select(StockMovement).where(*filters),
+        select(func.count()).select_from(StockMovement).where(*filters),
+        keyset,
+        limit=limit, count="none", table_name=StockMovement.__tablename__, filtered=True,
     )
-    product = result.scalar_one_or_none()
+    return {"data": [row[0] for row in rows], "metadata": metadata}
 
-    # print(product)
 
-    if not product:
+@router.get("/{product_id}/stock/daily", response_model=List[StockDailyMovement])
+async def get_stock_daily(
+    product_id: UUID,
+    start: Optional[date] = Query(None, description="First day (UTC), default 30 days before end"),
+    end: Optional[date] = Query(None, description="Last day (UTC), default today"),
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=29)
+    if start > end or (end - start).days >= STOCK_DAILY_MAX_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"start must be on or before end, at most {STOCK_DAILY_MAX_DAYS} days"
+        )
+
+    # Hanya hari yang ada movement-nya
+    return await daily_movements(db, product_id, start, end)
+
+
+@router.get("/{product_id}/stock/as-of", response_model=StockAsOfResponse)
+async def get_stock_as_of(
+    product_id: UUID,
+    at: datetime = Query(..., description="Point in time (UTC when no offset is given)"),
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    at = _utc_naive(at)
+    return {
+        "product_id": product_id,
+        "at": at,
+        "stock": await stock_as_of(db, product_id, at),
+    }
+
+
+def _utc_naive(value: datetime) -> datetime:
+    # Kolom DateTime menyimpan UTC tanpa timezone
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+# ======================================================
+# EXPORT products (CSV / NDJSON / Parquet, streaming)
+# ======================================================
+# Filter sama dengan GET /products, tanpa paging/count: dibaca lewat
+# server-side cursor (PRODUCT_EXPORT_BATCH_SIZE baris per partisi) dan
+# di-stream langsung ke client, memori konstan.
+# ======================================================
+PRODUCT_EXPORT_COLUMNS = (
+    (ExportColumn("id", "uuid"), Product.id),
+    (ExportColumn("name", "string"), Product.name),
+    (ExportColumn("description", "string"), Product.description),
+    (ExportColumn("price", "float"), Product.price),
+    (ExportColumn("stock", "int"), Product.stock),
+    (ExportColumn("low_stock_threshold", "int"), Product.low_stock_threshold),
+    (ExportColumn("stock_status", "string"), STOCK_STATUS),
+    (ExportColumn("image_url", "string"), Product.image_url),
+    (ExportColumn("category_id", "uuid"), Product.category_id),
+    (ExportColumn("category_name", "string"), Category.name),
+    (ExportColumn("created_by", "uuid"), Product.created_by),
+    (ExportColumn("creator_username", "string"), User.username),
+    (ExportColumn("created_at", "datetime"), Product.created_at),
+    (ExportColumn("updated_at", "datetime"), Product.updated_at),
+)
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_products(
+    format: Literal["csv", "ndjson", "parquet"] = Query("csv", description="Export format"),
+    search: Optional[str] = Query(None, description="Search by name"),
+    category_id: Optional[UUID] = Query(None, description="Filter by category ID"),
+    stock_status: Optional[str] = Query(None, description="Filter by stock status: red, yellow, green"),
+    min_price: Optional[float] = Query(None, ge=0, description="Minimum price"),
+    max_price: Optional[float] = Query(None, ge=0, description="Maximum price"),
+    sort_by: Optional[str] = Query(None, description="Sort by field: name, stock, price, created_at, status"),
+    order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    if format == "parquet" and not parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Parquet export requires the pyarrow package"
+        )
+
+    filters = product_filters(
+        search=search,
+        category_id=category_id,
+        stock_status=stock_status,
+        min_price=min_price,
+        max_price=max_price,
+    )
+
+    sort_keys = PRODUCT_SORT_KEYS.get(sort_by, PRODUCT_SORT_KEYS[None])
+    descending = order is not None and order.lower() == "desc"
+
+    query = (
+        select(*[expression for _, expression in PRODUCT_EXPORT_COLUMNS])
+        .select_from(Product)
+        .outerjoin(Category, Category.id == Product.category_id)
+        .outerjoin(User, User.id == Product.created_by)
+        .where(*filters)
+        .order_by(*[key.desc() if descending else key.asc() for key in sort_keys])
+    )
+
+    columns = [column for column, _ in PRODUCT_EXPORT_COLUMNS]
+    body = EXPORT_STREAMS[format](query, columns, settings.PRODUCT_EXPORT_BATCH_SIZE)
+    filename = f"products-{datetime.utcnow():%Y%m%d-%H%M%S}.{format}"
+
+    return StreamingResponse(
+        body,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+# ======================================================
+# IMPORT products from CSV / NDJSON (background job)
+# ======================================================
+# File disalin ke disk lalu diproses streaming per batch di background
+# (lihat app/utils/product_import.py). Response langsung berisi job;
+# progress dipantau lewat GET /products/import/{job_id}.
+# ======================================================
+@router.post("/import", response_model=ImportJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def import_products(
+    file: UploadFile = File(..., description="CSV (header row) or NDJSON file"),
+    format: Optional[Literal["csv", "ndjson"]] = Query(
+        None, description="File format; detected from filename/content type when omitted"
+    ),
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    import_format = format or detect_format(file.filename, file.content_type)
+    if import_format is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Unknown file format, use .csv / .ndjson or pass ?format="
+        )
+
+    path = await save_upload(file, import_format)
+
+    job = ImportJob(
+        status="queued",
+        format=import_format,
+        filename=file.filename,
+        created_by=current_user.id,
+        errors=[],
+    )
+    db.add(job)
+    await db.commit()
+
+    import_runner.start(ProductImport(job.id, path, import_format, current_user.id))
+    return job
+
+
+@router.get("/import/{job_id}", response_model=ImportJobResponse)
+async def get_import_job(
+    job_id: UUID,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    job = await db.get(ImportJob, job_id)
+
+    if not job:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
-            detail="Product not found"
+            detail="Import job not found"
         )
 
-    return product
+    return job
+
+
+# ======================================================
+# GET product by ID
+# ======================================================
+@router.get("/{product_id}", response_model=ProductResponse)
+async def get_product(
+    product_id: UUID,
+    request: Request,
+    db: AsyncSession = Depends(get_postgres_db),
+    current_user: CurrentUser = Depends(get_current_active_user)
+):
+    async def build():
+        product = await _get_product_for_response(db, product_id)
+
+        if not product:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Product not found"
+            )
+
+        return ProductResponse.model_validate(product)
+
+    def validator(product):
+        return weak_etag("product", *_product_validator_item(product))
+
+    return await cached_json(
+        "product",
+        router="products",
+        tags=_product_cache_tags(product_id),
+        params={"id": product_id},
+        role=current_user.role_name,
+        build=build,
+        request=request,
+        validator=validator,
+    )
 
 
 # ======================================================
@@ -222,11 +1285,13 @@ async def get_product(
 async def create_product(
     product_data: ProductCreate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    
-    category = await db.get(Category, product_data.category_id)
-    if not category:
+    # Cukup cek keberadaan category, tanpa me-load entity-nya
+    category_exists = await db.scalar(
+        select(Category.id).where(Category.id == product_data.category_id)
+    )
+    if not category_exists:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Category not found"
@@ -244,10 +1309,17 @@ async def create_product(
     )
 
     db.add(new_product)
+    await db.flush()
+    await record_movements(db, [
+        movement(new_product.id, new_product.stock, new_product.stock, "create", user_id=current_user.id)
+    ])
+    await publish_events(db, [_created_event(
+        new_product.id, new_product.name, new_product.stock, new_product.low_stock_threshold
+    )])
     await db.commit()
-    await db.refresh(new_product)
+    await response_cache.invalidate("products")
 
-    return new_product
+    return await _get_product_for_response(db, new_product.id)
 
 
 # ======================================================
@@ -258,9 +1330,16 @@ async def update_product(
     product_id: UUID,
     product_data: ProductUpdate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    result = await db.execute(select(Product).where(Product.id == product_id))
+    # ✅ Update only provided fields
+    update_fields = product_data.dict(exclude_unset=True)
+
+    query = select(Product).where(Product.id == product_id)
+    # Stok lama dikunci sampai commit supaya delta di ledger tepat
+    if "stock" in update_fields:
+        query = query.with_for_update()
+    result = await db.execute(query)
     product = result.scalar_one_or_none()
 
     if not product:
@@ -273,15 +1352,19 @@ async def update_product(
     # if product.created_by != current_user.id and not current_user.is_admin:
     #     raise HTTPException(status_code=403, detail="Not authorized to update this product")
 
-    # ✅ Update only provided fields
-    update_fields = product_data.dict(exclude_unset=True)
+    old_stock, old_threshold = product.stock, product.low_stock_threshold
     for key, value in update_fields.items():
         setattr(product, key, value)
 
+    if "stock" in update_fields and product.stock is not None:
+        await record_movements(db, [
+            movement(product.id, product.stock - old_stock, product.stock, "update", user_id=current_user.id)
+        ])
+    await publish_events(db, _updated_events(product.id, update_fields, old_stock, old_threshold))
     await db.commit()
-    await db.refresh(product)
+    await response_cache.invalidate(*_product_written(product_id))
 
-    return product
+    return await _get_product_for_response(db, product_id)
 
 
 # ======================================================
@@ -291,7 +1374,7 @@ async def update_product(
 async def delete_category(
     product_id: UUID,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(Product).where(Product.id == product_id))
     product = result.scalar_one_or_none()
@@ -307,6 +1390,8 @@ async def delete_category(
     #     raise HTTPException(status_code=403, detail="Not authorized to delete this product")
 
     await db.delete(product)
+    await publish_events(db, [product_event("product.deleted", product_id)])
     await db.commit()
+    await response_cache.invalidate(*_product_written(product_id))
 
     return None
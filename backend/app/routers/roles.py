@@ -4,58 +4,81 @@ from sqlalchemy import select, func
 from typing import List
 from app.database import get_postgres_db
 from app.models.role import Role
-from app.models.user import User
 from app.schemas.role import RoleResponse, RoleCreate, RoleUpdate
 from app.dependencies import get_current_active_user
+from app.utils.user_cache import CurrentUser, user_cache
+from app.utils.response_cache import cached_json, response_cache
+from app.config import settings
 # from app.utils.security import get_password_hash
 
 router = APIRouter(prefix="/roles", tags=["Roles"])
 
+# Response cache GET /roles & /roles/{id}; di-invalidate oleh create/update/delete
+ROLE_CACHE_TAGS = ("roles",)
+
 @router.get("", response_model=List[RoleResponse])
 async def get_all_roles(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
     search: str = Query(None, description="Search by username or email"),
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    query = select(Role)
-
-    if search:
-        query = query.where(
-            (Role.name.ilike(f"%{search}%"))
-        )
+    async def build():
+        query = select(Role)
 
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    roles = result.scalars().all()
+        if search:
+            query = query.where(
+                (Role.name.ilike(f"%{search}%"))
+            )
 
-    return roles
+        query = query.offset(skip).limit(limit)
+        result = await db.execute(query)
+        return [RoleResponse.model_validate(role) for role in result.scalars()]
+
+    return await cached_json(
+        "roles",
+        router="roles",
+        tags=ROLE_CACHE_TAGS,
+        params={"skip": skip, "limit": limit, "search": search},
+        role=current_user.role_name,
+        build=build,
+        ttl=settings.RESPONSE_CACHE_REFERENCE_TTL_SECONDS,
+    )
 
 @router.get("/{role_id}", response_model=RoleResponse)
 async def get_role(
     role_id: str,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
-    result = await db.execute(select(Role).where(Role.id == role_id))
-    role = result.scalar_one_or_none()
-    
-    print(role)
+    async def build():
+        result = await db.execute(select(Role).where(Role.id == role_id))
+        role = result.scalar_one_or_none()
 
-    if not role:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Role not found"
-        )
+        if not role:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Role not found"
+            )
 
-    return role
+        return RoleResponse.model_validate(role)
+
+    return await cached_json(
+        "role",
+        router="roles",
+        tags=ROLE_CACHE_TAGS,
+        params={"id": role_id},
+        role=current_user.role_name,
+        build=build,
+        ttl=settings.RESPONSE_CACHE_REFERENCE_TTL_SECONDS,
+    )
 
 @router.post("", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
 async def create_role(
     role_data: RoleCreate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(
         select(Role).where(
@@ -80,6 +103,7 @@ async def create_role(
     db.add(new_role)
     await db.commit()
     await db.refresh(new_role)
+    await response_cache.invalidate(*ROLE_CACHE_TAGS)
 
     return new_role
 
@@ -88,7 +112,7 @@ async def update_role(
     role_id: str,
     role_data: RoleUpdate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(Role).where(Role.id == role_id))
     role = result.scalar_one_or_none()
@@ -119,13 +143,17 @@ async def update_role(
     await db.commit()
     await db.refresh(role)
 
+    # role_name ada di principal yang di-cache
+    await user_cache.invalidate_roles()
+    await response_cache.invalidate(*ROLE_CACHE_TAGS)
+
     return role
 
 @router.delete("/{role_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_role(
     role_id: str,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(Role).where(Role.id == role_id))
     role = result.scalar_one_or_none()
@@ -139,4 +167,7 @@ async def delete_role(
     await db.delete(role)
     await db.commit()
 
+    await user_cache.invalidate_roles()
+    await response_cache.invalidate(*ROLE_CACHE_TAGS)
+
     return None
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload
 from sqlalchemy import select, func
-from typing import Optional
+from typing import Literal, Optional
 from app.database import get_postgres_db
 from app.models.user import User
 from app.models.role import Role
@@ -11,104 +11,151 @@ from app.schemas.user import (
     UserCreate,
     UserUpdate,
     PaginatedUserResponse,
-    PaginationMetadata
 )
 from app.dependencies import get_current_active_user
-from app.utils.security import get_password_hash
-import math
+from app.utils.filters import user_filters, USER_SEARCH_COLUMNS
+from app.utils.responses import JSONResponder
+from app.utils.pagination import Keyset, CursorError, fetch_keyset_page, fetch_offset_page
+from app.utils.search import search_distance
+from app.utils.passwords import password_hasher
+from app.utils.user_cache import CurrentUser, user_cache
+from app.utils.response_cache import response_cache
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Fast JSON path (FAST_JSON / FAST_JSON_ROUTERS), lihat app/utils/responses.py
+respond = JSONResponder("users")
+
+# ======================================================
+# Load plans
+# ======================================================
+# UserResponse hanya butuh role (id + name); di-JOIN di statement yang sama.
+# User.products / User.category tidak pernah di-load di router ini.
+#
+# Statement per endpoint:
+#   GET  /users          -> 1 (page + count(*) OVER ()), 2 in cursor mode
+#   GET  /users/{id}     -> 1
+#   POST /users          -> 3 (cek duplikat + insert + reload)
+#   PUT  /users/{id}     -> 3..5 (select + cek email/username + update + reload)
+#   DELETE /users/{id}   -> 2 (select + delete)
+# ======================================================
+USER_RESPONSE_LOAD = (
+    joinedload(User.role).load_only(Role.id, Role.name),
+)
+
+# ======================================================
+# Sort keys
+# ======================================================
+# Setiap sort diakhiri User.id sebagai tiebreaker unik. full_name nullable,
+# jadi di-coalesce supaya perbandingan keyset tidak bertemu NULL.
+USER_SORT_KEYS = {
+    None: (User.id,),
+    "username": (User.username, User.id),
+    "email": (User.email, User.id),
+    "full_name": (func.coalesce(User.full_name, ""), User.id),
+    "created_at": (User.created_at, User.id),
+}
+
+
+def _user_sort_keys(search: Optional[str]):
+    # sort_by=relevance: jarak trigram terdekat ke username/email/full_name
+    if not search:
+        return USER_SORT_KEYS
+    return {
+        **USER_SORT_KEYS,
+        "relevance": (search_distance(USER_SEARCH_COLUMNS, search), User.id),
+    }
+
+
 
 @router.get("", response_model=PaginatedUserResponse)
 async def get_all_users(
     skip: int = Query(0, ge=0, description="Number of records to skip"),
     limit: int = Query(10, ge=1, le=100, description="Number of records to return"),
     search: str = Query(None, description="Search by username or email"),
-    sort_by: Optional[str] = Query(None, description="Sort by field: username, email, full_name, created_at"),
+    sort_by: Optional[str] = Query(None, description="Sort by field: username, email, full_name, created_at, relevance (with search)"),
     order: Optional[str] = Query("asc", description="Sort order: asc or desc"),
+    cursor: Optional[str] = Query(
+        None,
+        description="Keyset pagination cursor. Pass an empty value (?cursor=) to start "
+                    "cursor mode, then next_cursor/prev_cursor from the metadata. "
+                    "`skip` is ignored in cursor mode."
+    ),
+    count: Literal["exact", "estimated", "none"] = Query(
+        "exact",
+        description="Total count strategy: exact (window count in the page query), "
+                    "estimated (planner statistics, unfiltered listings only) or none (has_more only)"
+    ),
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     # ============================================================================
-    # Build base query for filtering
+    # Validate cursor first (before any DB work)
     # ============================================================================
-    base_query = select(User)
+    sort_keys_by_field = _user_sort_keys(search)
 
-    if search:
-        base_query = base_query.where(
-            (User.username.ilike(f"%{search}%")) |
-            (User.email.ilike(f"%{search}%")) |
-            (User.full_name.ilike(f"%{search}%"))
-        )
+    keyset = None
+    if cursor is not None:
+        try:
+            keyset = Keyset.from_request(cursor, sort_by, order, sort_keys_by_field, {"search": search})
+        except CursorError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     # ============================================================================
-    # Get total count (before pagination)
+    # Build filters once (dipakai query halaman dan query count)
     # ============================================================================
-    count_query = select(func.count()).select_from(base_query.alias())
-    total_result = await db.execute(count_query)
-    total = total_result.scalar()
+    filters = user_filters(search=search)
 
-    # ============================================================================
-    # Build query with eager loading
-    # ============================================================================
-    query = base_query.options(selectinload(User.role))
+    query = select(User).where(*filters).options(*USER_RESPONSE_LOAD)
+    count_query = select(func.count(User.id)).where(*filters)
 
     # ============================================================================
-    # SORTING - Sort by username, email, full_name, or created_at
+    # CURSOR MODE - keyset pagination (opt-in via `cursor`)
     # ============================================================================
-    if sort_by:
-        sort_columns = {
-            "username": User.username,
-            "email": User.email,
-            "full_name": User.full_name,
-            "created_at": User.created_at
-        }
-
-        if sort_by in sort_columns:
-            column = sort_columns[sort_by]
-            # Apply order (asc or desc)
-            if order and order.lower() == "desc":
-                query = query.order_by(column.desc())
-            else:
-                query = query.order_by(column.asc())
+    if keyset is not None:
+        rows, metadata = await fetch_keyset_page(
+            db, query, count_query, keyset,
+            limit=limit, count=count, table_name=User.__tablename__, filtered=bool(filters),
+        )
+        return respond(PaginatedUserResponse(
+            data=[row[0] for row in rows],
+            metadata=metadata
+        ))
 
     # ============================================================================
-    # Apply pagination
+    # SORTING - Sort by username, email, full_name, or created_at
     # ============================================================================
-    query = query.offset(skip).limit(limit)
-    result = await db.execute(query)
-    users = result.scalars().all()
+    if sort_by in sort_keys_by_field:
+        sort_keys = sort_keys_by_field[sort_by]
+        # Apply order (asc or desc)
+        if order and order.lower() == "desc":
+            query = query.order_by(*[key.desc() for key in sort_keys])
+        else:
+            query = query.order_by(*[key.asc() for key in sort_keys])
 
     # ============================================================================
-    # Calculate pagination metadata
+    # Apply pagination (+ total count sesuai strategy, satu round-trip)
     # ============================================================================
-    page = (skip // limit) + 1 if limit > 0 else 1
-    total_pages = math.ceil(total / limit) if limit > 0 else 0
-
-    metadata = PaginationMetadata(
-        total=total,
-        skip=skip,
-        limit=limit,
-        page=page,
-        total_pages=total_pages
+    rows, metadata = await fetch_offset_page(
+        db, query, count_query,
+        skip=skip, limit=limit, count=count, table_name=User.__tablename__, filtered=bool(filters),
     )
 
-    return PaginatedUserResponse(
-        data=users,
+    return respond(PaginatedUserResponse(
+        data=[row[0] for row in rows],
         metadata=metadata
-    )
+    ))
 
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: str,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(*USER_RESPONSE_LOAD)
         .where(User.id == user_id))
     user = result.scalar_one_or_none()
 
@@ -125,7 +172,7 @@ async def get_user(
 async def create_user(
     user_data: UserCreate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(
         select(User).where(
@@ -141,7 +188,7 @@ async def create_user(
             detail="Email or username already registered"
         )
 
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await password_hasher.hash(user_data.password)
 
     # role_result = await db.execute(select(Role).where(Role.name == "admin"))
     # admin_role = role_result.scalar_one_or_none()
@@ -162,15 +209,15 @@ async def create_user(
 
     db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
 
     # ============================================================================
     # Reload user with role relationship for response
     # ============================================================================
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(*USER_RESPONSE_LOAD)
         .where(User.id == new_user.id)
+        .execution_options(populate_existing=True)
     )
     user_with_role = result.scalar_one()
 
@@ -182,14 +229,14 @@ async def update_user(
     user_id: str,
     user_data: UserUpdate,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     # ============================================================================
     # Load user with role relationship
     # ============================================================================
     result = await db.execute(
         select(User)
-        .options(selectinload(User.role))
+        .options(*USER_RESPONSE_LOAD)
         .where(User.id == user_id)
     )
     user = result.scalar_one_or_none()
@@ -200,6 +247,8 @@ async def update_user(
             detail="User not found"
         )
 
+    previous_username = user.username
+
     if user_data.email is not None:
         existing = await db.execute(
             select(User).where(User.email ==
@@ -228,7 +277,7 @@ async def update_user(
         user.full_name = user_data.full_name
 
     if user_data.password is not None:
-        user.hashed_password = get_password_hash(user_data.password)
+        user.hashed_password = await password_hasher.hash(user_data.password)
 
     if user_data.is_active is not None:
         user.is_active = user_data.is_active
@@ -237,19 +286,25 @@ async def update_user(
         user.role_id = user_data.role_id
 
     await db.commit()
-    await db.refresh(user)
+
+    # Principal lama (is_active, role, username) tidak boleh dipakai lagi
+    await user_cache.invalidate(previous_username, user.username)
+    # creator.username ikut di-cache di response product/category
+    if user.username != previous_username:
+        await response_cache.invalidate("users")
 
     # ============================================================================
-    # Reload user with role relationship if role_id was updated
-    # This ensures the response includes the updated role object
+    # Reload user with role relationship
+    # This ensures the response includes the updated role object and
+    # server-side timestamps (replaces db.refresh, which would expire `role`)
     # ============================================================================
-    if user_data.role_id is not None:
-        result = await db.execute(
-            select(User)
-            .options(selectinload(User.role))
-            .where(User.id == user_id)
-        )
-        user = result.scalar_one()
+    result = await db.execute(
+        select(User)
+        .options(*USER_RESPONSE_LOAD)
+        .where(User.id == user_id)
+        .execution_options(populate_existing=True)
+    )
+    user = result.scalar_one()
 
     return user
 
@@ -258,7 +313,7 @@ async def update_user(
 async def delete_user(
     user_id: str,
     db: AsyncSession = Depends(get_postgres_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: CurrentUser = Depends(get_current_active_user)
 ):
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
@@ -272,4 +327,7 @@ async def delete_user(
     await db.delete(user)
     await db.commit()
 
+    await user_cache.invalidate(user.username)
+    await response_cache.invalidate("users")
+
     return None
@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
+from app.schemas.pagination import PaginationMetadata
+
 class BookBase(BaseModel):
     title: str = Field(..., min_length=1, max_length=200)
     author: str = Field(..., min_length=1, max_length=100)
@@ -28,3 +30,8 @@ class BookResponse(BookBase):
 
     class Config:
         from_attributes = True
+
+class PaginatedBookResponse(BaseModel):
+    """Response with pagination metadata"""
+    data: List[BookResponse]
+    metadata: PaginationMetadata
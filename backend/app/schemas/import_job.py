@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime
+import uuid
+
+
+class ImportJobResponse(BaseModel):
+    id: uuid.UUID
+    status: Literal["queued", "running", "completed", "failed"]
+    format: Literal["csv", "ndjson"]
+    filename: Optional[str] = None
+    rows_processed: int
+    rows_upserted: int
+    rows_failed: int
+    errors: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+
+# ============================================================================
+# Pagination Schemas (dipakai bersama oleh products & users)
+# ============================================================================
+class PaginationMetadata(BaseModel):
+    """Metadata for pagination"""
+    total: Optional[int] = Field(None, description="Total number of records (null when count=none)")
+    skip: Optional[int] = Field(None, description="Number of records skipped (null in cursor mode)")
+    limit: int = Field(..., description="Number of records per page")
+    page: Optional[int] = Field(None, description="Current page number (1-indexed, null in cursor mode)")
+    total_pages: Optional[int] = Field(None, description="Total number of pages (null when count=none)")
+    has_more: bool = Field(False, description="Whether more records exist after this page")
+    total_estimated: bool = Field(False, description="True when total comes from planner statistics (count=estimated)")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page (cursor mode only)")
+    prev_cursor: Optional[str] = Field(None, description="Cursor for the previous page (cursor mode only)")
@@ -1,11 +1,23 @@
+from app.models.product import STOCK_STATUS_NAMES, stock_status_rank
 from app.schemas.category import CategorySimple
+from app.schemas.pagination import PaginationMetadata
 from app.schemas.user import UserSimple
-from pydantic import BaseModel, Field, computed_field
-from typing import Optional, Literal, List
-from datetime import datetime
+from pydantic import BaseModel, Field, computed_field, field_validator
+from typing import Dict, Optional, Literal, List
+from datetime import date, datetime
 import uuid
 
 
+def stock_status_of(stock: Optional[int], low_stock_threshold: Optional[int]) -> Literal["red", "yellow", "green"]:
+    """
+    Compute stock status based on stock level (rule: STOCK_STATUS_RANK):
+    - red: stock == 0 (out of stock)
+    - yellow: 0 < stock <= low_stock_threshold (low stock warning)
+    - green: stock > low_stock_threshold (healthy stock)
+    """
+    return STOCK_STATUS_NAMES[stock_status_rank(stock, low_stock_threshold)]
+
+
 class ProductBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=50)
     description: Optional[str] = None
@@ -40,35 +52,158 @@ class ProductResponse(ProductBase):
     @computed_field
     @property
     def stock_status(self) -> Literal["red", "yellow", "green"]:
-        """
-        Compute stock status based on stock level:
-        - red: stock == 0 (out of stock)
-        - yellow: 0 < stock <= low_stock_threshold (low stock warning)
-        - green: stock > low_stock_threshold (healthy stock)
-        """
-        if self.stock == 0:
-            return "red"
-        elif self.stock <= (self.low_stock_threshold or 10):
-            return "yellow"
-        else:
-            return "green"
+        return stock_status_of(self.stock, self.low_stock_threshold)
+
+    class Config:
+        from_attributes = True
+
+
+class ProductSuggestion(BaseModel):
+    """Autocomplete item (prefix match on name)"""
+    id: uuid.UUID
+    name: str
 
     class Config:
         from_attributes = True
 
 
 # ============================================================================
-# Pagination Schemas
+# Bulk Schemas (POST/PATCH/DELETE /products/bulk)
+# ============================================================================
+class ProductBulkCreate(BaseModel):
+    items: List[ProductCreate] = Field(..., min_length=1)
+
+
+class ProductBulkUpdateItem(ProductUpdate):
+    id: uuid.UUID
+
+
+class ProductBulkUpdate(BaseModel):
+    items: List[ProductBulkUpdateItem] = Field(..., min_length=1)
+
+
+class ProductBulkDelete(BaseModel):
+    ids: List[uuid.UUID] = Field(..., min_length=1)
+
+
+class BulkItemResult(BaseModel):
+    """Hasil per item, urut sesuai request (index = posisi di request)"""
+    index: int
+    id: Optional[uuid.UUID] = None
+    status: Literal["created", "updated", "deleted", "error"]
+    error: Optional[str] = None
+
+
+class BulkOperationResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+# ============================================================================
+# Stock Adjustment Schemas (POST /products/{id}/stock/adjust, /products/stock/adjust)
+# ============================================================================
+class StockAdjust(BaseModel):
+    delta: int = Field(..., description="Stock change, negative to subtract (non-zero)")
+
+    @field_validator("delta")
+    @classmethod
+    def delta_not_zero(cls, value: int) -> int:
+        # Delta 0 tetap mengunci row, menaikkan updated_at dan menginvalidasi cache
+        if value == 0:
+            raise ValueError("delta must not be 0")
+        return value
+
+
+class StockAdjustItem(StockAdjust):
+    product_id: uuid.UUID
+
+
+class StockAdjustBatch(BaseModel):
+    items: List[StockAdjustItem] = Field(..., min_length=1)
+
+
+class StockLevel(BaseModel):
+    """Stok setelah adjustment (hanya kolom dari UPDATE ... RETURNING)"""
+    id: uuid.UUID
+    stock: int
+    low_stock_threshold: Optional[int] = None
+    updated_at: datetime
+
+    @computed_field
+    @property
+    def stock_status(self) -> Literal["red", "yellow", "green"]:
+        return stock_status_of(self.stock, self.low_stock_threshold)
+
+    class Config:
+        from_attributes = True
+
+
+class StockAdjustBatchResponse(BaseModel):
+    items: List[StockLevel]
+
+
+# ============================================================================
+# Stock Ledger Schemas (GET /products/{id}/stock/...)
 # ============================================================================
-class PaginationMetadata(BaseModel):
-    """Metadata for pagination"""
-    total: int = Field(..., description="Total number of records")
-    skip: int = Field(..., description="Number of records skipped")
-    limit: int = Field(..., description="Number of records per page")
-    page: int = Field(..., description="Current page number (1-indexed)")
-    total_pages: int = Field(..., description="Total number of pages")
+class StockMovementResponse(BaseModel):
+    id: int
+    product_id: uuid.UUID
+    delta: int
+    stock_after: int
+    reason: str
+    ref: Optional[str] = None
+    created_by: Optional[uuid.UUID] = None
+    created_at: datetime
 
+    class Config:
+        from_attributes = True
+
+
+class PaginatedStockMovementResponse(BaseModel):
+    data: List[StockMovementResponse]
+    metadata: PaginationMetadata
 
+
+class StockDailyMovement(BaseModel):
+    day: date
+    quantity_in: int
+    quantity_out: int
+    movements: int
+    stock_close: int
+
+
+class StockAsOfResponse(BaseModel):
+    product_id: uuid.UUID
+    at: datetime
+    stock: Optional[int] = Field(None, description="Null when the ledger has no history before `at`")
+
+
+# ============================================================================
+# Stats Schemas (GET /products/stats)
+# ============================================================================
+class StockTotals(BaseModel):
+    products: int = 0
+    stock_units: int = 0
+    stock_value: float = Field(0, description="sum(price * stock)")
+
+
+class CategoryStockStats(StockTotals):
+    category_id: uuid.UUID
+    category_name: Optional[str] = None
+    by_status: Dict[Literal["red", "yellow", "green"], int]
+
+
+class ProductStatsResponse(BaseModel):
+    total: StockTotals
+    by_status: Dict[Literal["red", "yellow", "green"], StockTotals]
+    by_category: List[CategoryStockStats]
+    generated_at: datetime
+
+
+# ============================================================================
+# Pagination Schemas
+# ============================================================================
 class PaginatedProductResponse(BaseModel):
     """Response with pagination metadata"""
     data: List[ProductResponse]
@@ -1,5 +1,6 @@
 # from sqlalchemy import Column, String, Boolean, Integer, DateTime, ForeignKey
 from app.schemas.role import RoleSimple
+from app.schemas.pagination import PaginationMetadata
 from pydantic import BaseModel, EmailStr, Field
 from typing import Optional, List
 from datetime import datetime
@@ -63,15 +64,6 @@ class UserLoginMetadata(BaseModel):
 # ============================================================================
 # Pagination Schemas
 # ============================================================================
-class PaginationMetadata(BaseModel):
-    """Metadata for pagination"""
-    total: int = Field(..., description="Total number of records")
-    skip: int = Field(..., description="Number of records skipped")
-    limit: int = Field(..., description="Number of records per page")
-    page: int = Field(..., description="Current page number (1-indexed)")
-    total_pages: int = Field(..., description="Total number of pages")
-
-
 class PaginatedUserResponse(BaseModel):
     """Response with pagination metadata"""
     data: List[UserResponse]
@@ -6,7 +6,7 @@ from app.models.role import Role
 
 
 async def seed_roles():
-    SessionLocal = get_async_sessionmaker()  # 🔹 buat sessionmaker di event loop aktif
+    SessionLocal = get_async_sessionmaker()  # 🔹 sessionmaker global (engine proses)
     async with SessionLocal() as session:
         result = await session.execute(select(Role))
         roles = result.scalars().all()
@@ -0,0 +1,223 @@
+"""
+Query builder untuk koleksi MongoDB `books` (GET /books).
+
+Katalog books diperkirakan mencapai jutaan dokumen, jadi setiap query harus
+bisa dilayani index (lihat BOOK_INDEXES di app/migrations.py):
+
+- search_mode=prefix (default): prefix match case-insensitive pada title /
+  author lewat range [term, term + U+FFFF) dengan collation BOOK_COLLATION
+  (strength 2 = abaikan huruf besar/kecil). Range ini memakai index
+  (title, _id) / (author, _id) yang dibuat dengan collation yang sama;
+  $regex tanpa anchor (versi lama) selalu collection scan.
+- search_mode=text: $text pada text index (title + author), pencarian per
+  kata. Text index tidak mendukung collation, jadi mode ini query tanpa
+  collation.
+
+Collation hanya dipasang kalau query membandingkan string (search prefix,
+filter author, sort title/author). Query lain tetap pakai collation simple
+supaya index _id / created_at bisa dipakai untuk sort.
+"""
+import re
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymongo import ASCENDING, DESCENDING
+
+from app.utils.pagination import MongoKeyset, _metadata
+
+# Case-insensitive (strength 2), sama dengan collation index di BOOK_INDEXES
+BOOK_COLLATION = {"locale": "en", "strength": 2}
+
+# Nama index (dipakai sebagai hint dan oleh migrations.ensure_mongo_indexes)
+BOOK_TITLE_INDEX = "ix_books_title_id_ci"
+BOOK_AUTHOR_INDEX = "ix_books_author_id_ci"
+BOOK_CREATED_AT_INDEX = "ix_books_created_at_id"
+BOOK_TEXT_INDEX = "ix_books_text"
+
+# Hanya field BookResponse yang diambil dari server
+BOOK_PROJECTION = {
+    "title": 1,
+    "author": 1,
+    "description": 1,
+    "isbn": 1,
+    "published_year": 1,
+    "price": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# sort_by -> sort key (selalu diakhiri _id sebagai tiebreaker)
+BOOK_SORT_KEYS: Dict[Optional[str], Sequence[str]] = {
+    None: ("_id",),
+    "title": ("title", "_id"),
+    "author": ("author", "_id"),
+    "created_at": ("created_at", "_id"),
+}
+
+# Karakter dengan bobot primary tertinggi di collation ICU: batas atas prefix
+_PREFIX_UPPER_BOUND = "\uffff"
+
+
+def prefix_range(term: str) -> Dict[str, str]:
+    return {"$gte": term, "$lt": term + _PREFIX_UPPER_BOUND}
+
+
+def prefix_regex(term: str) -> Dict[str, str]:
+    """Anchored ^term case-insensitive: untuk filter yang tidak bisa pakai collation ($text)."""
+    return {"$regex": "^" + re.escape(term), "$options": "i"}
+
+
+class BookQuery:
+    """Filter, collation dan hint count untuk satu request GET /books."""
+
+    def __init__(
+        self,
+        search: Optional[str] = None,
+        search_mode: str = "prefix",
+        author: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        sort_by: Optional[str] = None,
+    ):
+        self.search = search or None
+        self.text = self.search is not None and search_mode == "text"
+        self.author = author or None
+        self.sort_by = sort_by if sort_by in BOOK_SORT_KEYS else None
+
+        conditions: List[Dict[str, Any]] = []
+        if self.search is not None:
+            if self.text:
+                conditions.append({"$text": {"$search": self.search}})
+            else:
+                conditions.append({"$or": [
+                    {"title": prefix_range(self.search)},
+                    {"author": prefix_range(self.search)},
+                ]})
+
+        if self.author is not None:
+            if self.text:
+                # Tanpa collation: anchored regex dievaluasi hanya pada hasil $text
+                conditions.append({"author": prefix_regex(self.author)})
+            else:
+                conditions.append({"author": prefix_range(self.author)})
+
+        if min_price is not None or max_price is not None:
+            price: Dict[str, float] = {}
+            if min_price is not None:
+                price["$gte"] = min_price
+            if max_price is not None:
+                price["$lte"] = max_price
+            conditions.append({"price": price})
+
+        self.conditions = conditions
+
+    @property
+    def filtered(self) -> bool:
+        return bool(self.conditions)
+
+    @property
+    def filter_collation(self) -> Optional[Dict[str, Any]]:
+        # Range prefix title/author hanya case-insensitive dengan collation
+        if not self.text and (self.search is not None or self.author is not None):
+            return BOOK_COLLATION
+        return None
+
+    @property
+    def collation(self) -> Optional[Dict[str, Any]]:
+        if self.filter_collation is not None:
+            return self.filter_collation
+        if not self.text and self.sort_by in ("title", "author"):
+            return BOOK_COLLATION
+        return None
+
+    def filter(self, *extra: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        conditions = self.conditions + [condition for condition in extra if condition]
+        if not conditions:
+            return {}
+        if len(conditions) == 1:
+            return conditions[0]
+        return {"$and": conditions}
+
+    @property
+    def count_hint(self) -> Optional[str]:
+        """
+        Index untuk count_documents. Hanya kalau satu index jelas melayani
+        filter: $or prefix search dilayani dua index sekaligus (OR plan) dan
+        $text selalu memakai text index, jadi keduanya dibiarkan ke planner.
+        """
+        if self.search is not None:
+            return None
+        if self.author is not None:
+            # Index author ber-collation: hint hanya valid dengan collation yang sama
+            return BOOK_AUTHOR_INDEX
+        if not self.conditions:
+            return "_id_"
+        return None
+
+
+# ============================================================================
+# Page fetching
+# ============================================================================
+async def count_books(collection, book_query: BookQuery, count: str):
+    """
+    Total sesuai count strategy.
+    exact     -> count_documents (dengan hint index bila ada)
+    estimated -> metadata koleksi (hanya listing tanpa filter, selain itu exact)
+    none      -> tanpa total, hanya has_more
+    Return: (total, estimated)
+    """
+    if count == "none":
+        return None, False
+    if count == "estimated" and not book_query.filtered:
+        return await collection.estimated_document_count(), True
+
+    options: Dict[str, Any] = {}
+    if book_query.count_hint is not None:
+        options["hint"] = book_query.count_hint
+    if book_query.filter_collation is not None:
+        options["collation"] = book_query.filter_collation
+    return await collection.count_documents(book_query.filter(), **options), False
+
+
+def _find(collection, book_query: BookQuery, query: Dict[str, Any], sort, limit: int):
+    options: Dict[str, Any] = {}
+    if book_query.collation is not None:
+        options["collation"] = book_query.collation
+    return collection.find(query, BOOK_PROJECTION, sort=sort, limit=limit, **options)
+
+
+async def fetch_book_offset_page(collection, book_query: BookQuery, order: str, *, skip: int, limit: int, count: str):
+    """
+    Halaman skip/limit (kompatibilitas). Skip tetap O(skip) di server;
+    halaman dalam pakai cursor mode.
+    Return: (documents, PaginationMetadata)
+    """
+    total, estimated = await count_books(collection, book_query, count)
+
+    direction = DESCENDING if order == "desc" else ASCENDING
+    sort = [(key, direction) for key in BOOK_SORT_KEYS[book_query.sort_by]]
+    documents = await _find(collection, book_query, book_query.filter(), sort, limit + 1).skip(skip).to_list(None)
+
+    has_more = len(documents) > limit
+    return documents[:limit], _metadata(total, limit, has_more, skip=skip, total_estimated=estimated)
+
+
+async def fetch_book_keyset_page(collection, book_query: BookQuery, keyset: MongoKeyset, *, limit: int, count: str):
+    """
+    Halaman keyset: range pada sort key + _id, jadi halaman ke-N sama
+    murahnya dengan halaman pertama.
+    Return: (documents, PaginationMetadata)
+    """
+    total, estimated = await count_books(collection, book_query, count)
+
+    query = book_query.filter(keyset.condition())
+    documents = await _find(collection, book_query, query, keyset.sort(), limit + 1).to_list(None)
+    documents, next_cursor, prev_cursor = keyset.paginate(documents, limit)
+
+    return documents, _metadata(
+        total,
+        limit,
+        next_cursor is not None,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total_estimated=estimated,
+    )
@@ -0,0 +1,148 @@
+"""
+Cache primitives.
+
+- TTLCache: cache in-process (LRU + TTL), tanpa I/O. Dipakai sebagai L1.
+- CacheBackend: backend bersama antar proses/worker (async, nilai bytes).
+  RedisCacheBackend untuk production, InMemoryCacheBackend sebagai
+  stand-in lokal/test dengan semantik yang sama.
+
+Semua dipanggil dari event loop (satu thread), jadi tidak perlu lock.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from app.config import settings
+
+MISSING = object()
+
+
+class TTLCache:
+    """LRU dengan batas ukuran dan TTL per entry."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# ============================================================================
+# Shared backends
+# ============================================================================
+class CacheBackend:
+    """Interface backend cache bersama. Nilai selalu bytes."""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        raise NotImplementedError
+
+    async def delete(self, *keys: str) -> None:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+
+class InMemoryCacheBackend(CacheBackend):
+    """
+    Stand-in lokal untuk backend bersama (test / single worker).
+    Semantik sama dengan Redis: TTL per key, nilai bytes.
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self._cache = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._cache.get(key, None)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._cache.delete(key)
+
+
+class RedisCacheBackend(CacheBackend):
+    """Backend Redis (opsional, butuh paket `redis`)."""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError(
+                "CACHE_BACKEND=redis requires the `redis` package (pip install redis)"
+            ) from e
+        self._client = redis_asyncio.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self._client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    async def delete(self, *keys: str) -> None:
+        if keys:
+            await self._client.delete(*keys)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+def create_shared_backend() -> Optional[CacheBackend]:
+    """Backend bersama sesuai settings.CACHE_BACKEND (none | memory | redis)."""
+    backend = settings.CACHE_BACKEND.lower()
+    if backend == "redis":
+        return RedisCacheBackend(settings.REDIS_URL)
+    if backend == "memory":
+        return InMemoryCacheBackend()
+    return None
+
+
+shared_backend: Optional[CacheBackend] = create_shared_backend()
@@ -0,0 +1,57 @@
+"""
+Conditional GET (ETag / If-None-Match).
+
+Validator dihitung dari halaman yang sudah di-fetch, bukan dari query
+terpisah (count/max atas seluruh hasil filter berarti full scan lagi di
+setiap request):
+- detail: id + updated_at row itu + nilai relasi yang ikut di response
+  (category.name, creator.username)
+- list: hash query params + metadata halaman (total, cursor) + id,
+  updated_at dan nilai relasi setiap item di halaman
+
+Kalau validator cocok dengan header request, handler mengembalikan 304
+tanpa serialisasi dan tanpa mengirim body. ETag selalu weak (W/"..."):
+body setara secara semantik, tidak dijamin identik per byte.
+
+Sengaja tanpa Last-Modified / If-Modified-Since: body memuat nilai relasi
+(category.name, creator.username) dan keanggotaan halaman list bisa berubah
+(delete, rename) tanpa updated_at item mana pun bergerak, jadi max
+updated_at bukan validator yang benar. ETag di atas ikut berubah di kasus
+itu karena dihitung dari isi halaman.
+"""
+import hashlib
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+# Browser menyimpan response tapi selalu revalidasi (If-None-Match) dulu
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Perbandingan weak: abaikan prefix W/
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def is_not_modified(request: Request, etag: Optional[str]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    return if_none_match is not None and etag is not None and _etag_matches(if_none_match, etag)
+
+
+def validator_headers(etag: Optional[str]) -> dict:
+    headers = {"Cache-Control": CACHE_CONTROL}
+    if etag is not None:
+        headers["ETag"] = etag
+    return headers
+
+
+def not_modified_response(headers: dict) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
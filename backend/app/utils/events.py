@@ -0,0 +1,189 @@
+"""
+Event stream perubahan produk (GET /products/events, SSE).
+
+Alur:
+1. Write path memanggil publish_events(db, events) di transaksinya sendiri:
+   event dikirim lewat `pg_notify` sehingga baru terkirim saat COMMIT (dan
+   hilang kalau rollback). Event satu transaksi dipaket ke payload JSON
+   sesedikit mungkin (batas NOTIFY ~8000 byte), satu round-trip.
+2. Setiap worker punya satu koneksi LISTEN (di luar pool) yang dibuka saat
+   subscriber pertama datang. Notifikasi dari worker mana pun di-fan-out ke
+   semua subscriber lokal.
+3. Setiap subscriber punya queue terbatas (PRODUCT_EVENTS_QUEUE_SIZE).
+   Subscriber yang terlalu lambat (queue penuh) diputus, bukan ditunggu:
+   client reconnect lalu refetch, publisher tidak pernah ikut melambat.
+
+Transaksi dengan banyak event (bulk, import) diringkas menjadi satu event
+`products.changed` supaya tidak membanjiri semua subscriber.
+"""
+import asyncio
+import json
+import logging
+from typing import List, Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import connect_listener
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "product_events"
+
+# Batas payload NOTIFY 8000 byte; sisakan ruang untuk overhead
+NOTIFY_PAYLOAD_LIMIT = 7800
+
+
+class BrokerFull(Exception):
+    """Jumlah subscriber di worker ini sudah mencapai PRODUCT_EVENTS_MAX_SUBSCRIBERS."""
+
+
+# ============================================================================
+# Publish (di dalam transaksi write path)
+# ============================================================================
+def product_event(type: str, product_id, **fields) -> dict:
+    return {"type": type, "id": str(product_id), **fields}
+
+
+def stock_status_event(product_id, stock: int, old_status: str, new_status: str) -> List[dict]:
+    """Event transisi stock_status (green/yellow/red); kosong kalau status tidak berubah."""
+    if old_status == new_status:
+        return []
+    return [product_event(
+        "product.stock_status", product_id, stock=stock, previous=old_status, stock_status=new_status
+    )]
+
+
+def _pack(events: List[dict]) -> List[str]:
+    payloads, chunk, size = [], [], 2
+    for event in events:
+        encoded = json.dumps(event, separators=(",", ":"), default=str)
+        if chunk and size + len(encoded) + 1 > NOTIFY_PAYLOAD_LIMIT:
+            payloads.append("[" + ",".join(chunk) + "]")
+            chunk, size = [], 2
+        chunk.append(encoded)
+        size += len(encoded) + 1
+    if chunk:
+        payloads.append("[" + ",".join(chunk) + "]")
+    return payloads
+
+
+async def publish_events(db: AsyncSession, events: List[dict]) -> None:
+    """Antre event di transaksi `db`; terkirim ke semua worker saat commit."""
+    if not events or not settings.PRODUCT_EVENTS_ENABLED or db.bind.dialect.name != "postgresql":
+        return
+    if len(events) > settings.PRODUCT_EVENTS_MAX_PER_TRANSACTION:
+        events = [{"type": "products.changed", "count": len(events)}]
+
+    await db.execute(
+        text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+        {"channel": CHANNEL, "payloads": _pack(events)},
+    )
+
+
+# ============================================================================
+# Fan-out (per worker)
+# ============================================================================
+class Subscription:
+    def __init__(self, maxsize: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.dropped = False
+
+    async def get(self, timeout: float) -> Optional[dict]:
+        """Event berikutnya, atau None kalau timeout (waktunya heartbeat)."""
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    def __init__(self, channel: str, queue_size: int, max_subscribers: int):
+        self.channel = channel
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._subscribers: Set[Subscription] = set()
+        self._task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscription:
+        if len(self._subscribers) >= self.max_subscribers:
+            raise BrokerFull()
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+        subscription = Subscription(self.queue_size)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def publish(self, events: List[dict]) -> None:
+        for subscription in list(self._subscribers):
+            for event in events:
+                try:
+                    subscription.queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    # Slow consumer: putus, jangan tahan publisher
+                    subscription.dropped = True
+                    self._subscribers.discard(subscription)
+                    self.dropped += 1
+                    break
+                self.delivered += 1
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            events = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed %s payload", channel)
+            return
+        self.publish(events if isinstance(events, list) else [events])
+
+    async def _listen(self) -> None:
+        """Satu koneksi LISTEN per worker; reconnect dengan backoff kalau putus."""
+        backoff = 1
+        while True:
+            connection = None
+            try:
+                closed = asyncio.Event()
+                connection = await connect_listener()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(self.channel, self._on_notify)
+                backoff = 1
+                await closed.wait()
+                logger.warning("Event listener connection closed, reconnecting")
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Event listener failed, retrying in %ss", backoff)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+            finally:
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._subscribers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "delivered": self.delivered,
+            "dropped_subscribers": self.dropped,
+        }
+
+
+event_broker = EventBroker(
+    channel=CHANNEL,
+    queue_size=settings.PRODUCT_EVENTS_QUEUE_SIZE,
+    max_subscribers=settings.PRODUCT_EVENTS_MAX_SUBSCRIBERS,
+)
@@ -0,0 +1,172 @@
+"""
+Streaming export (CSV / NDJSON / Parquet).
+
+Query dibaca lewat server-side cursor (`session.stream` + `yield_per`) per
+partisi, dan setiap partisi langsung di-encode lalu dikirim ke client.
+Yang ada di memori hanya satu partisi, berapa pun jumlah barisnya.
+
+Generator membuka session sendiri: dependency `get_postgres_db` sudah
+ditutup sebelum body StreamingResponse mulai dikirim.
+
+Parquet butuh paket opsional `pyarrow`; satu partisi = satu row group.
+"""
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Sequence
+
+from sqlalchemy import Select
+
+from app.database import get_async_sessionmaker
+from app.utils.responses import dumps
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - pyarrow opsional
+    pyarrow = None
+
+EXPORT_MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+class ExportColumn(NamedTuple):
+    """Kolom export: nama (header) + tipe logis (uuid|string|float|int|datetime)."""
+    name: str
+    type: str
+
+
+def parquet_available() -> bool:
+    return pyarrow is not None
+
+
+def _to_float(value: Any) -> Any:
+    return float(value) if isinstance(value, Decimal) else value
+
+
+def _to_text(value: Any) -> Any:
+    return str(value) if value is not None else None
+
+
+def _to_iso(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+_JSON_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "uuid": _to_text,
+    "float": _to_float,
+}
+
+_CSV_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "datetime": _to_iso,
+}
+
+_PARQUET_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "uuid": _to_text,
+    "float": _to_float,
+}
+
+
+def _converters(columns: Sequence[ExportColumn], table: Dict[str, Callable]) -> List[Callable]:
+    return [table.get(column.type, lambda value: value) for column in columns]
+
+
+async def _partitions(query: Select, batch_size: int) -> AsyncIterator[Sequence]:
+    SessionLocal = get_async_sessionmaker()
+    async with SessionLocal() as session:
+        result = await session.stream(query.execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield rows
+
+
+async def stream_csv(query: Select, columns: Sequence[ExportColumn], batch_size: int):
+    convert = _converters(columns, _CSV_CONVERTERS)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow([column.name for column in columns])
+    async for rows in _partitions(query, batch_size):
+        writer.writerows(
+            [fn(value) for fn, value in zip(convert, row)] for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+    # Export kosong tetap mengirim header
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+async def stream_ndjson(query: Select, columns: Sequence[ExportColumn], batch_size: int):
+    convert = _converters(columns, _JSON_CONVERTERS)
+    names = [column.name for column in columns]
+
+    async for rows in _partitions(query, batch_size):
+        yield b"".join(
+            dumps({name: fn(value) for name, fn, value in zip(names, convert, row)}) + b"\n"
+            for row in rows
+        )
+
+
+class _ChunkSink(io.RawIOBase):
+    """File-like tujuan ParquetWriter; byte yang ditulis diambil per partisi."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(columns: Sequence[ExportColumn]):
+    types = {
+        "uuid": pyarrow.string(),
+        "string": pyarrow.string(),
+        "float": pyarrow.float64(),
+        "int": pyarrow.int64(),
+        "datetime": pyarrow.timestamp("us"),
+    }
+    return pyarrow.schema([(column.name, types[column.type]) for column in columns])
+
+
+async def stream_parquet(query: Select, columns: Sequence[ExportColumn], batch_size: int):
+    schema = _parquet_schema(columns)
+    convert = _converters(columns, _PARQUET_CONVERTERS)
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema)
+
+    try:
+        async for rows in _partitions(query, batch_size):
+            data = {
+                column.name: [fn(row[i]) for row in rows]
+                for i, (column, fn) in enumerate(zip(columns, convert))
+            }
+            writer.write_table(pyarrow.Table.from_pydict(data, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+
+    yield sink.drain()
+
+
+EXPORT_STREAMS = {
+    "csv": stream_csv,
+    "ndjson": stream_ndjson,
+    "parquet": stream_parquet,
+}
@@ -0,0 +1,66 @@
+"""
+Filter builder bersama untuk list endpoint.
+
+Setiap fungsi mengembalikan list kondisi WHERE. Kondisi yang sama dipakai
+untuk query halaman, query count, maupun query turunan lain, sehingga
+filter cukup ditulis sekali.
+"""
+from typing import List, Optional
+from uuid import UUID
+
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.models.product import Product, STOCK_STATUS_RANK, STOCK_STATUS_RANKS
+from app.models.user import User
+from app.utils.search import contains
+
+# Kolom yang dicari oleh `search` (punya trigram index di PostgreSQL)
+PRODUCT_SEARCH_COLUMNS = (Product.name,)
+USER_SEARCH_COLUMNS = (User.username, User.email, User.full_name)
+
+
+def product_filters(
+    search: Optional[str] = None,
+    category_id: Optional[UUID] = None,
+    stock_status: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+) -> List[ColumnElement]:
+    conditions: List[ColumnElement] = []
+
+    if search:
+        conditions.append(contains(PRODUCT_SEARCH_COLUMNS, search))
+
+    if category_id:
+        conditions.append(Product.category_id == category_id)
+
+    # ============================================================================
+    # FILTER by stock_status (red/yellow/green)
+    # ============================================================================
+    if stock_status:
+        # red: stock == 0, yellow: 0 < stock <= threshold, green: stock > threshold.
+        # Lewat STOCK_STATUS_RANK supaya dilayani index ix_products_stock_status_id
+        # (perbandingan kolom-ke-kolom tidak bisa memakai index biasa)
+        rank = STOCK_STATUS_RANKS.get(stock_status.lower())
+        if rank is not None:
+            conditions.append(STOCK_STATUS_RANK == rank)
+
+    # ============================================================================
+    # FILTER by price range (min_price and max_price)
+    # ============================================================================
+    if min_price is not None:
+        conditions.append(Product.price >= min_price)
+
+    if max_price is not None:
+        conditions.append(Product.price <= max_price)
+
+    return conditions
+
+
+def user_filters(search: Optional[str] = None) -> List[ColumnElement]:
+    conditions: List[ColumnElement] = []
+
+    if search:
+        conditions.append(contains(USER_SEARCH_COLUMNS, search))
+
+    return conditions
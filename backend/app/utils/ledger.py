@@ -0,0 +1,285 @@
+"""
+Ledger stok (stock_movements) + rollup harian (stock_snapshots).
+
+Setiap perubahan Product.stock menulis satu baris movement (delta,
+stock_after, reason) di transaksi yang sama:
+- stock adjust: UPDATE ... RETURNING dan INSERT ledger dalam SATU statement
+  (data-modifying CTE), jadi row lock tidak dipegang lebih lama
+- create / update / bulk / import: satu executemany INSERT per batch
+  (record_movements), bukan satu statement per produk
+
+Rollup: StockRollup berjalan di background (STOCK_ROLLUP_INTERVAL_SECONDS)
+dan menulis satu snapshot per (produk, hari) untuk hari yang sudah lewat:
+stok akhir hari + total masuk/keluar. Query "stock as of T" dan movement
+harian membaca snapshot, dan ledger hanya untuk ekor yang belum di-rollup.
+Rollup idempotent (ON CONFLICT DO NOTHING), aman dijalankan di semua worker.
+"""
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Date, String, and_, case, cast, func, insert, literal, select
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_async_sessionmaker
+from app.migrations import ensure_ledger_partitions
+from app.models.stock_movement import StockMovement
+from app.models.stock_snapshot import StockSnapshot
+
+logger = logging.getLogger(__name__)
+
+MOVEMENT_DAY = cast(StockMovement.created_at, Date)
+
+
+# ============================================================================
+# Write path
+# ============================================================================
+def movement(
+    product_id: UUID,
+    delta: int,
+    stock_after: int,
+    reason: str,
+    *,
+    ref: Optional[str] = None,
+    user_id: Optional[UUID] = None,
+    at: Optional[datetime] = None,
+) -> dict:
+    # Semua row punya key yang sama -> satu executemany
+    return {
+        "product_id": product_id,
+        "delta": delta,
+        "stock_after": stock_after,
+        "reason": reason,
+        "ref": ref,
+        "created_by": user_id,
+        "created_at": at or datetime.utcnow(),
+    }
+
+
+async def record_movements(db: AsyncSession, movements: List[dict]) -> None:
+    """Tulis movement (delta != 0) dalam satu batch INSERT. Commit di pemanggil."""
+    movements = [row for row in movements if row["delta"] != 0]
+    if movements:
+        await db.execute(insert(StockMovement), movements)
+
+
+def with_movements(statement, reason: str, *, ref: Optional[str] = None, user_id: Optional[UUID] = None):
+    """
+    Bungkus `UPDATE products ... RETURNING id, stock, ..., updated_at, delta`
+    supaya ledger ikut ditulis di statement yang sama:
+
+        WITH moved AS (UPDATE ... RETURNING ...),
+             ledger AS (INSERT INTO stock_movements SELECT ... FROM moved)
+        SELECT id, stock, ... FROM moved
+    """
+    moved = statement.cte("moved")
+    ledger = insert(StockMovement).from_select(
+        ["product_id", "delta", "stock_after", "reason", "ref", "created_by", "created_at"],
+        select(
+            moved.c.id,
+            moved.c.delta,
+            moved.c.stock,
+            literal(reason, String(20)),
+            literal(ref, String(64)),
+            literal(user_id, PG_UUID(as_uuid=True)),
+            moved.c.updated_at,
+        ).where(moved.c.delta != 0),
+    ).cte("ledger")
+    return select(*[column for column in moved.c if column.name != "delta"]).add_cte(ledger)
+
+
+# ============================================================================
+# Read path
+# ============================================================================
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min)
+
+
+async def rollup_watermark(db: AsyncSession) -> Optional[date]:
+    """Hari terakhir yang sudah di-rollup (semua produk)."""
+    return await db.scalar(select(func.max(StockSnapshot.day)))
+
+
+async def stock_as_of(db: AsyncSession, product_id: UUID, at: datetime) -> Optional[int]:
+    """
+    Stok produk pada waktu `at`: snapshot terakhir sebelum hari `at`, lalu
+    movement terakhir setelah snapshot itu sampai `at`. None kalau belum
+    ada history sebelum `at`.
+    """
+    snapshot = (await db.execute(
+        select(StockSnapshot.day, StockSnapshot.stock_close)
+        .where(StockSnapshot.product_id == product_id, StockSnapshot.day < at.date())
+        .order_by(StockSnapshot.day.desc())
+        .limit(1)
+    )).one_or_none()
+
+    tail = (
+        select(StockMovement.stock_after)
+        .where(StockMovement.product_id == product_id, StockMovement.created_at <= at)
+        .order_by(StockMovement.created_at.desc(), StockMovement.id.desc())
+        .limit(1)
+    )
+    if snapshot is not None:
+        tail = tail.where(StockMovement.created_at >= _day_start(snapshot.day + timedelta(days=1)))
+
+    stock = await db.scalar(tail)
+    if stock is not None:
+        return stock
+    return snapshot.stock_close if snapshot is not None else None
+
+
+async def daily_movements(db: AsyncSession, product_id: UUID, start: date, end: date) -> List[dict]:
+    """Total movement per hari [start, end]: snapshot + agregasi ledger untuk hari yang belum di-rollup."""
+    result = await db.execute(
+        select(
+            StockSnapshot.day,
+            StockSnapshot.quantity_in,
+            StockSnapshot.quantity_out,
+            StockSnapshot.movements,
+            StockSnapshot.stock_close,
+        )
+        .where(StockSnapshot.product_id == product_id, StockSnapshot.day.between(start, end))
+    )
+    days: Dict[date, dict] = {row.day: dict(row._mapping) for row in result}
+
+    watermark = await rollup_watermark(db)
+    live_start = max(start, watermark + timedelta(days=1)) if watermark else start
+    if live_start <= end:
+        aggregated = _movement_totals().where(
+            StockMovement.product_id == product_id,
+            StockMovement.created_at >= _day_start(live_start),
+            StockMovement.created_at < _day_start(end + timedelta(days=1)),
+        ).subquery()
+        result = await db.execute(
+            select(
+                aggregated.c.day,
+                aggregated.c.quantity_in,
+                aggregated.c.quantity_out,
+                aggregated.c.movements,
+                StockMovement.stock_after.label("stock_close"),
+            ).join(StockMovement, StockMovement.id == aggregated.c.last_movement_id)
+        )
+        for row in result:
+            days[row.day] = dict(row._mapping)
+
+    return [days[day] for day in sorted(days)]
+
+
+# ============================================================================
+# Rollup
+# ============================================================================
+def _movement_totals():
+    """Agregasi ledger per (produk, hari); stok akhir = movement dengan id terbesar."""
+    return select(
+        StockMovement.product_id,
+        MOVEMENT_DAY.label("day"),
+        func.sum(case((StockMovement.delta > 0, StockMovement.delta), else_=0)).label("quantity_in"),
+        func.sum(case((StockMovement.delta < 0, -StockMovement.delta), else_=0)).label("quantity_out"),
+        func.count().label("movements"),
+        func.max(StockMovement.id).label("last_movement_id"),
+    ).group_by(StockMovement.product_id, MOVEMENT_DAY)
+
+
+class StockRollup:
+    def __init__(self, interval: float, grace: float, batch_days: int):
+        self.interval = interval
+        # Transaksi yang commit sesaat setelah tengah malam masih boleh masuk
+        self.grace = timedelta(seconds=grace)
+        self.batch_days = batch_days
+        self._task: Optional[asyncio.Task] = None
+
+    async def rollup(self) -> int:
+        """Rollup hari yang sudah selesai, maks `batch_days` hari per panggilan."""
+        SessionLocal = get_async_sessionmaker()
+        async with SessionLocal() as session:
+            # Tabel partisi butuh partisi bulan berikutnya sebelum dipakai
+            await session.run_sync(lambda sync_session: ensure_ledger_partitions(sync_session.connection()))
+
+            # Mulai dari movement pertama setelah watermark (hari tanpa
+            # movement tidak punya snapshot, jadi watermark bisa tertinggal)
+            watermark = await rollup_watermark(session)
+            first = select(func.min(StockMovement.created_at))
+            if watermark is not None:
+                first = first.where(StockMovement.created_at >= _day_start(watermark + timedelta(days=1)))
+            first = await session.scalar(first)
+            if first is None:
+                await session.commit()
+                return 0
+            start = first.date()
+
+            end = min(
+                (datetime.utcnow() - self.grace).date(),
+                start + timedelta(days=self.batch_days),
+            )
+            if start >= end:
+                await session.commit()
+                return 0
+
+            totals = _movement_totals().where(
+                StockMovement.created_at >= _day_start(start),
+                StockMovement.created_at < _day_start(end),
+            ).subquery()
+            rows = select(
+                totals.c.product_id,
+                totals.c.day,
+                StockMovement.stock_after,
+                totals.c.quantity_in,
+                totals.c.quantity_out,
+                totals.c.movements,
+                totals.c.last_movement_id,
+            ).join(
+                StockMovement,
+                and_(
+                    StockMovement.id == totals.c.last_movement_id,
+                    StockMovement.product_id == totals.c.product_id,
+                ),
+            )
+
+            result = await session.execute(
+                pg_insert(StockSnapshot)
+                .from_select(
+                    ["product_id", "day", "stock_close", "quantity_in", "quantity_out",
+                     "movements", "last_movement_id"],
+                    rows,
+                )
+                .on_conflict_do_nothing()
+            )
+            await session.commit()
+
+        logger.info("Stock rollup %s..%s: %d snapshot(s)", start, end, result.rowcount)
+        return result.rowcount
+
+    # ========================================================================
+    # Lifecycle (dipanggil dari lifespan)
+    # ========================================================================
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.rollup()
+            except Exception:
+                logger.exception("Stock rollup failed")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if settings.STOCK_ROLLUP_INTERVAL_SECONDS > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+stock_rollup = StockRollup(
+    interval=settings.STOCK_ROLLUP_INTERVAL_SECONDS,
+    grace=settings.STOCK_ROLLUP_GRACE_SECONDS,
+    batch_days=settings.STOCK_ROLLUP_BATCH_DAYS,
+)
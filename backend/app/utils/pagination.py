@@ -0,0 +1,425 @@
+"""
+Keyset (cursor) pagination helpers.
+
+Cursor adalah token opaque: base64url(JSON) + "." + HMAC-SHA256 (SECRET_KEY).
+Isinya posisi terakhir (nilai sort key + id) beserta sort_by/order dan hash
+filter yang dipakai, sehingga client tidak bisa memalsukan posisi maupun
+mengganti sort atau filter (search, category, harga, ...) di tengah jalan:
+posisi hanya bermakna untuk hasil query yang sama (nilai key sort relevance
+bahkan bergantung pada search term).
+
+Setiap sort WAJIB diakhiri kolom unik (id) sebagai tiebreaker supaya urutan
+total dan tidak ada baris yang terlewat/terulang antar halaman.
+
+Keyset untuk query SQLAlchemy, MongoKeyset untuk koleksi MongoDB (books).
+"""
+import base64
+import hashlib
+import hmac
+import json
+import math
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from bson import ObjectId, errors as bson_errors
+from pymongo import ASCENDING, DESCENDING
+from sqlalchemy import Select, func, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.config import settings
+from app.schemas.pagination import PaginationMetadata
+
+
+class CursorError(ValueError):
+    """Cursor rusak, signature tidak valid, atau tidak cocok dengan sort/filter."""
+
+
+# ============================================================================
+# Token encoding
+# ============================================================================
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(body: str) -> str:
+    digest = hmac.new(
+        settings.SECRET_KEY.encode(), b"cursor:" + body.encode(), hashlib.sha256
+    ).digest()
+    return _b64encode(digest[:16])
+
+
+def _dump_value(value: Any) -> List[Any]:
+    # Tag tipe supaya nilai bisa dikembalikan persis (Decimal, datetime, UUID, ObjectId)
+    if isinstance(value, Decimal):
+        return ["d", str(value)]
+    if isinstance(value, datetime):
+        return ["t", value.isoformat()]
+    if isinstance(value, UUID):
+        return ["u", str(value)]
+    if isinstance(value, ObjectId):
+        return ["o", str(value)]
+    return ["j", value]
+
+
+def _load_value(item: Any) -> Any:
+    tag, value = item
+    if tag == "d":
+        return Decimal(value)
+    if tag == "t":
+        return datetime.fromisoformat(value)
+    if tag == "u":
+        return UUID(value)
+    if tag == "o":
+        try:
+            return ObjectId(value)
+        except (TypeError, bson_errors.InvalidId):
+            raise CursorError("Invalid cursor value")
+    if tag == "j":
+        return value
+    raise CursorError("Invalid cursor value")
+
+
+def filter_fingerprint(filters: Optional[Dict[str, Any]]) -> str:
+    """Hash filter yang dinormalisasi (None/"" dibuang, urutan tidak berpengaruh)."""
+    normalized = json.dumps(
+        sorted((name, value) for name, value in (filters or {}).items() if value not in (None, "")),
+        default=str, separators=(",", ":"),
+    )
+    return _b64encode(hashlib.sha256(normalized.encode()).digest()[:12])
+
+
+def encode_cursor(payload: Dict[str, Any]) -> str:
+    body = _b64encode(json.dumps(payload, separators=(",", ":")).encode())
+    return f"{body}.{_sign(body)}"
+
+
+def decode_cursor(token: str) -> Dict[str, Any]:
+    try:
+        body, signature = token.split(".", 1)
+    except ValueError:
+        raise CursorError("Malformed cursor")
+
+    if not hmac.compare_digest(signature, _sign(body)):
+        raise CursorError("Invalid cursor signature")
+
+    try:
+        payload = json.loads(_b64decode(body))
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError("Malformed cursor")
+
+    if not isinstance(payload, dict):
+        raise CursorError("Malformed cursor")
+    return payload
+
+
+# ============================================================================
+# Keyset query builder
+# ============================================================================
+class Keyset:
+    """
+    Satu halaman keyset pagination.
+
+    `keys` adalah ekspresi sort (kolom atau ekspresi seperti CASE status)
+    yang diakhiri kolom unik. Semua key diurutkan searah (asc/desc) sehingga
+    posisi bisa dibandingkan dengan row value: (k1, k2, id) > (:v1, :v2, :id).
+    """
+
+    def __init__(
+        self,
+        keys: Sequence[ColumnElement],
+        sort_by: Optional[str],
+        order: str,
+        values: Optional[Tuple[Any, ...]] = None,
+        direction: str = "next",
+        filter_hash: str = "",
+    ):
+        self.keys = list(keys)
+        self.sort_by = sort_by
+        self.order = order
+        self.values = values
+        self.direction = direction
+        self.filter_hash = filter_hash
+
+    @classmethod
+    def from_request(
+        cls,
+        cursor: str,
+        sort_by: Optional[str],
+        order: Optional[str],
+        sort_keys: Dict[Optional[str], Sequence[ColumnElement]],
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> "Keyset":
+        """
+        Cursor kosong ("") = halaman pertama dalam cursor mode.
+        Cursor berisi token = lanjut dari posisi di dalam token.
+        `filters` = query param filter request (selain sort/paging); cursor
+        hanya diterima untuk filter yang sama dengan saat ia dibuat.
+        """
+        order = "desc" if order and order.lower() == "desc" else "asc"
+        if sort_by not in sort_keys:
+            sort_by = None
+        filter_hash = filter_fingerprint(filters)
+
+        if not cursor:
+            return cls(sort_keys[sort_by], sort_by, order, filter_hash=filter_hash)
+
+        payload = decode_cursor(cursor)
+        if payload.get("s") != sort_by or payload.get("o") != order:
+            raise CursorError("Cursor does not match sort_by/order")
+        if payload.get("f") != filter_hash:
+            raise CursorError("Cursor does not match the request filters")
+
+        keys = sort_keys[sort_by]
+        raw_values = payload.get("k")
+        direction = payload.get("d")
+        if (
+            not isinstance(raw_values, list)
+            or len(raw_values) != len(keys)
+            or direction not in ("next", "prev")
+        ):
+            raise CursorError("Malformed cursor")
+
+        try:
+            values = tuple(_load_value(item) for item in raw_values)
+        except (TypeError, ValueError):
+            raise CursorError("Malformed cursor")
+
+        return cls(keys, sort_by, order, values, direction, filter_hash)
+
+    @property
+    def _scan_descending(self) -> bool:
+        # Halaman "prev" dibaca mundur lalu dibalik lagi di paginate()
+        return (self.order == "desc") != (self.direction == "prev")
+
+    def apply(self, query: Select, limit: int) -> Select:
+        """
+        Tambahkan sort key sebagai kolom ekstra (_k0.._kn), kondisi posisi,
+        ORDER BY dan LIMIT limit+1 (baris ekstra = penanda masih ada data).
+        """
+        query = query.add_columns(
+            *[key.label(f"_k{i}") for i, key in enumerate(self.keys)]
+        )
+
+        descending = self._scan_descending
+        if self.values is not None:
+            position = tuple_(*self.keys)
+            query = query.where(
+                position < self.values if descending else position > self.values
+            )
+
+        return query.order_by(
+            *[key.desc() if descending else key.asc() for key in self.keys]
+        ).limit(limit + 1)
+
+    def _cursor_for(self, row, direction: str) -> str:
+        values = tuple(row[-len(self.keys):])
+        return encode_cursor({
+            "s": self.sort_by,
+            "o": self.order,
+            "f": self.filter_hash,
+            "d": direction,
+            "k": [_dump_value(value) for value in values],
+        })
+
+    def paginate(self, rows: Sequence, limit: int):
+        """
+        Potong hasil query ke `limit` baris dan hitung next/prev cursor.
+        Return: (rows, next_cursor, prev_cursor). Setiap row masih membawa
+        kolom _k* di belakang.
+        """
+        rows = list(rows)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        if self.direction == "prev":
+            rows.reverse()
+            has_next = True
+            has_prev = has_more
+        else:
+            has_next = has_more
+            has_prev = self.values is not None
+
+        if not rows:
+            return rows, None, None
+
+        next_cursor = self._cursor_for(rows[-1], "next") if has_next else None
+        prev_cursor = self._cursor_for(rows[0], "prev") if has_prev else None
+        return rows, next_cursor, prev_cursor
+
+
+class MongoKeyset(Keyset):
+    """
+    Keyset untuk koleksi MongoDB: `keys` adalah nama field yang diakhiri
+    "_id". Mongo tidak punya perbandingan row value, jadi posisi ditulis
+    sebagai range pada key pertama (batas index) + $or leksikografis:
+    k1 >= v1 AND (k1 > v1 OR (k1 = v1 AND _id > id)).
+    Dokumen halaman membawa nilai key-nya sendiri (tidak perlu kolom _k*).
+    """
+
+    def condition(self) -> Optional[Dict[str, Any]]:
+        if self.values is None:
+            return None
+
+        strict, inclusive = ("$lt", "$lte") if self._scan_descending else ("$gt", "$gte")
+        if len(self.keys) == 1:
+            return {self.keys[0]: {strict: self.values[0]}}
+
+        branches = []
+        for i, key in enumerate(self.keys):
+            branch = {self.keys[j]: self.values[j] for j in range(i)}
+            branch[key] = {strict: self.values[i]}
+            branches.append(branch)
+        return {self.keys[0]: {inclusive: self.values[0]}, "$or": branches}
+
+    def sort(self) -> List[Tuple[str, int]]:
+        direction = DESCENDING if self._scan_descending else ASCENDING
+        return [(key, direction) for key in self.keys]
+
+    def _cursor_for(self, document, direction: str) -> str:
+        return encode_cursor({
+            "s": self.sort_by,
+            "o": self.order,
+            "f": self.filter_hash,
+            "d": direction,
+            "k": [_dump_value(document.get(key)) for key in self.keys],
+        })
+
+
+# ============================================================================
+# Page fetching + count strategies
+# ============================================================================
+# exact     -> count(*) OVER () di statement yang sama dengan halaman
+# estimated -> reltuples dari pg_class (hanya listing tanpa filter)
+# none      -> tanpa total, hanya has_more (ambil limit+1 baris)
+# ============================================================================
+async def estimated_count(db: AsyncSession, table_name: str) -> Optional[int]:
+    """
+    Perkiraan jumlah baris dari statistik planner (pg_class.reltuples).
+    Return None bila bukan PostgreSQL atau tabel belum pernah di-ANALYZE.
+    """
+    if db.bind.dialect.name != "postgresql":
+        return None
+
+    result = await db.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": table_name},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def _resolve_count_strategy(
+    db: AsyncSession, count: str, table_name: str, filtered: bool
+) -> Tuple[str, Optional[int]]:
+    # Estimasi hanya berlaku untuk listing tanpa filter; selain itu exact
+    if count == "estimated":
+        estimate = None if filtered else await estimated_count(db, table_name)
+        if estimate is None:
+            return "exact", None
+        return "estimated", estimate
+    return count, None
+
+
+def _metadata(
+    total: Optional[int],
+    limit: int,
+    has_more: bool,
+    skip: Optional[int] = None,
+    next_cursor: Optional[str] = None,
+    prev_cursor: Optional[str] = None,
+    total_estimated: bool = False,
+) -> PaginationMetadata:
+    return PaginationMetadata(
+        total=total,
+        skip=skip,
+        limit=limit,
+        page=(skip // limit) + 1 if skip is not None and limit > 0 else None,
+        total_pages=math.ceil(total / limit) if total is not None and limit > 0 else None,
+        has_more=has_more,
+        total_estimated=total_estimated,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+async def fetch_offset_page(
+    db: AsyncSession,
+    query: Select,
+    count_query: Select,
+    *,
+    skip: int,
+    limit: int,
+    count: str,
+    table_name: str,
+    filtered: bool,
+):
+    """
+    Jalankan query halaman (OFFSET/LIMIT) sesuai count strategy.
+    Return: (rows, PaginationMetadata). Entity/kolom utama ada di row[0].
+    """
+    strategy, total = await _resolve_count_strategy(db, count, table_name, filtered)
+
+    if strategy == "exact":
+        # Total ikut dihitung di statement yang sama: satu round-trip
+        result = await db.execute(
+            query.add_columns(func.count().over().label("_total"))
+            .offset(skip)
+            .limit(limit)
+        )
+        rows = result.all()
+        if rows:
+            total = rows[0]._mapping["_total"]
+        else:
+            # Halaman kosong (skip melewati data) -> window tidak punya baris
+            total = (await db.execute(count_query)).scalar()
+        return rows, _metadata(total, limit, skip + len(rows) < total, skip=skip)
+
+    result = await db.execute(query.offset(skip).limit(limit + 1))
+    rows = result.all()
+    has_more = len(rows) > limit
+    return rows[:limit], _metadata(
+        total, limit, has_more, skip=skip, total_estimated=strategy == "estimated"
+    )
+
+
+async def fetch_keyset_page(
+    db: AsyncSession,
+    query: Select,
+    count_query: Select,
+    keyset: Keyset,
+    *,
+    limit: int,
+    count: str,
+    table_name: str,
+    filtered: bool,
+):
+    """
+    Jalankan query halaman keyset. count(*) OVER () tidak bisa dipakai di
+    sini (kondisi posisi ikut membatasi window), jadi strategi exact memakai
+    query count terpisah.
+    Return: (rows, PaginationMetadata). Entity/kolom utama ada di row[0].
+    """
+    strategy, total = await _resolve_count_strategy(db, count, table_name, filtered)
+    if strategy == "exact":
+        total = (await db.execute(count_query)).scalar()
+
+    result = await db.execute(keyset.apply(query, limit))
+    rows, next_cursor, prev_cursor = keyset.paginate(result.all(), limit)
+
+    return rows, _metadata(
+        total,
+        limit,
+        next_cursor is not None,
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+        total_estimated=strategy == "estimated",
+    )
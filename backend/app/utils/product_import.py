@@ -0,0 +1,376 @@
+"""
+Streaming import produk dari CSV / NDJSON (POST /products/import).
+
+Alur:
+1. Router menyalin upload ke file sementara per chunk (memori konstan),
+   membuat row `import_jobs`, lalu menjalankan job di background task.
+2. Job membaca file baris per baris (csv.DictReader / satu JSON per baris)
+   dalam batch PRODUCT_IMPORT_BATCH_SIZE. Parsing + validasi ProductCreate
+   jalan di thread supaya event loop tetap melayani request lain.
+3. Nama category di-resolve ke Category.id lewat cache (satu query per
+   batch untuk nama yang belum dikenal).
+4. Batch di-upsert dengan INSERT ... ON CONFLICT (name) DO UPDATE, movement
+   stok ditulis ke ledger (satu INSERT per batch), satu event
+   `products.changed` di-NOTIFY, commit per batch, lalu progress ditulis ke
+   `import_jobs`.
+
+Yang ada di memori hanya satu batch + cache category, jadi file 1 juta
+baris tetap berjalan dengan memori konstan.
+
+Kolom yang dikenali: name, description, price, stock, low_stock_threshold,
+image_url, dan category_id (UUID) atau category (nama category).
+"""
+import asyncio
+import csv
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DBAPIError
+
+from app.config import settings
+from app.database import get_async_sessionmaker
+from app.models.category import Category
+from app.models.import_job import ImportJob
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.utils.cache import MISSING, TTLCache
+from app.utils.ledger import movement, record_movements
+from app.utils.events import publish_events
+from app.utils.response_cache import response_cache
+
+logger = logging.getLogger(__name__)
+
+# Jumlah contoh error per baris yang disimpan di job
+MAX_RECORDED_ERRORS = 100
+
+# Kolom yang ditimpa saat name sudah ada (created_by/created_at tetap)
+UPSERT_COLUMNS = (
+    "description", "price", "stock", "low_stock_threshold", "image_url", "category_id",
+)
+
+# Nama category -> id. Dipakai bersama oleh semua job di proses ini;
+# dikosongkan saat category diubah/dihapus (routers/categories.py).
+category_id_cache = TTLCache(maxsize=10000, ttl=60)
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    name = (filename or "").lower()
+    if name.endswith(".csv") or content_type in ("text/csv", "application/csv"):
+        return "csv"
+    if name.endswith((".ndjson", ".jsonl")) or content_type in (
+        "application/x-ndjson", "application/jsonl", "application/ndjson"
+    ):
+        return "ndjson"
+    return None
+
+
+async def save_upload(upload, format: str) -> str:
+    """Salin UploadFile ke file sementara per chunk 1MB; return path-nya."""
+    fd, path = tempfile.mkstemp(prefix="product-import-", suffix=f".{format}")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while chunk := await upload.read(1024 * 1024):
+                await asyncio.to_thread(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+# ============================================================================
+# Parsing (jalan di thread)
+# ============================================================================
+def _iter_records(file, format: str) -> Iterator[Tuple[int, Any]]:
+    """(nomor baris, record mentah). NDJSON yang rusak -> record berupa Exception."""
+    if format == "csv":
+        reader = csv.DictReader(file)
+        for record in reader:
+            # Sel kosong di CSV = tidak diisi
+            yield reader.line_num, {
+                key.strip(): (value.strip() or None) if isinstance(value, str) else value
+                for key, value in record.items() if key
+            }
+        return
+
+    for line_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            yield line_number, e
+
+
+def _read_batch(records: Iterator[Tuple[int, Any]], size: int) -> List[Tuple[int, Any]]:
+    batch = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _validate(record: Any, category_id: Optional[UUID]) -> ProductCreate:
+    data = {key: value for key, value in record.items() if key != "category"}
+    if category_id is not None:
+        data["category_id"] = category_id
+    return ProductCreate.model_validate(data)
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in e.errors()
+    )
+
+
+# ============================================================================
+# Job
+# ============================================================================
+class ProductImport:
+    def __init__(self, job_id: UUID, path: str, format: str, user_id: UUID):
+        self.job_id = job_id
+        self.path = path
+        self.format = format
+        self.user_id = user_id
+
+        self.rows_processed = 0
+        self.rows_upserted = 0
+        self.rows_failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+    def _record_error(self, line: int, message: str) -> None:
+        self.rows_failed += 1
+        if len(self.errors) < MAX_RECORDED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+    async def _resolve_categories(self, session, names: Set[str]) -> Dict[str, UUID]:
+        resolved = {}
+        unknown = []
+        for name in names:
+            category_id = category_id_cache.get(name)
+            if category_id is MISSING:
+                unknown.append(name)
+            else:
+                resolved[name] = category_id
+
+        if unknown:
+            result = await session.execute(
+                select(Category.name, Category.id).where(Category.name.in_(unknown))
+            )
+            for name, category_id in result.all():
+                category_id_cache.set(name, category_id)
+                resolved[name] = category_id
+        return resolved
+
+    async def _prepare(self, session, batch: List[Tuple[int, Any]]) -> List[Tuple[int, dict]]:
+        """Validasi batch -> (baris, row insert). Error dicatat per baris."""
+        names = {
+            record["category"] for _, record in batch
+            if isinstance(record, dict) and record.get("category") and not record.get("category_id")
+        }
+        categories = await self._resolve_categories(session, names)
+
+        def validate_batch():
+            rows = []
+            for line, record in batch:
+                if isinstance(record, Exception):
+                    self._record_error(line, f"Invalid JSON: {record}")
+                    continue
+                if not isinstance(record, dict):
+                    self._record_error(line, "Row must be an object")
+                    continue
+
+                category_id = None
+                if not record.get("category_id"):
+                    category_name = record.get("category")
+                    if not category_name:
+                        self._record_error(line, "category_id or category is required")
+                        continue
+                    category_id = categories.get(category_name)
+                    if category_id is None:
+                        self._record_error(line, f"Category not found: {category_name}")
+                        continue
+
+                try:
+                    product = _validate(record, category_id)
+                except ValidationError as e:
+                    self._record_error(line, _format_validation_error(e))
+                    continue
+
+                rows.append((line, {
+                    "name": product.name,
+                    "description": product.description,
+                    "price": product.price if product.price is not None else 0,
+                    "stock": product.stock if product.stock is not None else 0,
+                    "low_stock_threshold": (
+                        product.low_stock_threshold if product.low_stock_threshold is not None else 10
+                    ),
+                    "image_url": product.image_url,
+                    "category_id": product.category_id,
+                }))
+            return rows
+
+        rows = await asyncio.to_thread(validate_batch)
+
+        # category_id eksplisit juga dicek, supaya satu id salah tidak membuat
+        # seluruh batch ditolak foreign key
+        explicit_ids = {row["category_id"] for _, row in rows} - set(categories.values())
+        if explicit_ids:
+            result = await session.execute(select(Category.id).where(Category.id.in_(explicit_ids)))
+            missing = explicit_ids - set(result.scalars())
+            if missing:
+                for line, row in rows:
+                    if row["category_id"] in missing:
+                        self._record_error(line, f"Category not found: {row['category_id']}")
+                rows = [(line, row) for line, row in rows if row["category_id"] not in missing]
+        return rows
+
+    async def _upsert(self, session, rows: List[Tuple[int, dict]]) -> None:
+        # ON CONFLICT tidak boleh menyentuh baris yang sama dua kali dalam satu
+        # statement: name duplikat di batch yang sama -> baris terakhir menang.
+        by_name: Dict[str, Tuple[int, dict]] = {}
+        for line, row in rows:
+            by_name[row["name"]] = (line, row)
+
+        now = datetime.utcnow()
+        values = [
+            {**row, "created_by": self.user_id, "created_at": now, "updated_at": now}
+            for _, row in by_name.values()
+        ]
+        if not values:
+            return
+
+        # Statement tanpa .values(): di-compile sekali (statement cache) dan
+        # dieksekusi sebagai executemany -> batch multi-row "insertmanyvalues"
+        # (RETURNING ikut di-batch)
+        statement = pg_insert(Product.__table__)
+        statement = statement.on_conflict_do_update(
+            index_elements=[Product.__table__.c.name],
+            set_={
+                **{column: statement.excluded[column] for column in UPSERT_COLUMNS},
+                "updated_at": statement.excluded.updated_at,
+            },
+        )
+
+        try:
+            # Stok lama dikunci sampai commit supaya delta di ledger tepat
+            result = await session.execute(
+                select(Product.name, Product.stock)
+                .where(Product.name.in_(list(by_name)))
+                .with_for_update()
+            )
+            old_stock = dict(result.all())
+
+            result = await session.execute(
+                statement.returning(Product.id, Product.name, Product.stock), values
+            )
+            await record_movements(session, [
+                movement(
+                    product_id, stock - old_stock.get(name, 0), stock, "import",
+                    ref=str(self.job_id), user_id=self.user_id, at=now,
+                )
+                for product_id, name, stock in result.all()
+            ])
+            # Satu event ringkasan per batch (subscriber cukup refetch)
+            await publish_events(session, [
+                {"type": "products.changed", "count": len(values), "source": "import"}
+            ])
+            await session.commit()
+            await response_cache.invalidate("products", "product")
+        except DBAPIError as e:
+            await session.rollback()
+            for line, _ in by_name.values():
+                self._record_error(line, f"Batch rejected by database: {e.orig}")
+            return
+
+        self.rows_upserted += len(values)
+
+    async def _save_progress(self, session, **fields) -> None:
+        await session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == self.job_id)
+            .values(
+                rows_processed=self.rows_processed,
+                rows_upserted=self.rows_upserted,
+                rows_failed=self.rows_failed,
+                errors=list(self.errors),
+                **fields,
+            )
+        )
+        await session.commit()
+
+    async def run(self) -> None:
+        SessionLocal = get_async_sessionmaker()
+        async with SessionLocal() as session:
+            try:
+                await self._save_progress(session, status="running", started_at=datetime.utcnow())
+
+                with open(self.path, newline="", encoding="utf-8-sig") as file:
+                    records = _iter_records(file, self.format)
+                    while True:
+                        batch = await asyncio.to_thread(
+                            _read_batch, records, settings.PRODUCT_IMPORT_BATCH_SIZE
+                        )
+                        if not batch:
+                            break
+                        rows = await self._prepare(session, batch)
+                        await self._upsert(session, rows)
+                        self.rows_processed += len(batch)
+                        await self._save_progress(session)
+
+                await self._save_progress(session, status="completed", finished_at=datetime.utcnow())
+            except asyncio.CancelledError:
+                await self._fail(session, "Import interrupted (server shutdown)")
+                raise
+            except Exception as e:
+                logger.exception("Product import %s failed", self.job_id)
+                await self._fail(session, str(e))
+            finally:
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+    async def _fail(self, session, error: str) -> None:
+        try:
+            await session.rollback()
+            await self._save_progress(
+                session, status="failed", error=error, finished_at=datetime.utcnow()
+            )
+        except Exception:
+            logger.exception("Could not mark product import %s as failed", self.job_id)
+
+
+class ImportRunner:
+    """Menyimpan referensi background task import (dibatalkan saat shutdown)."""
+
+    def __init__(self):
+        self._tasks: Set[asyncio.Task] = set()
+
+    def start(self, job: ProductImport) -> None:
+        task = asyncio.create_task(job.run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+import_runner = ImportRunner()
@@ -0,0 +1,167 @@
+"""
+Instrumentasi SQL per request.
+
+Hook engine (before/after_cursor_execute) mencatat setiap statement ke
+QueryStats milik request yang sedang berjalan (contextvar). Middleware
+membuka QueryStats per request lalu:
+- menambahkan header `Server-Timing` (jumlah statement, total waktu DB,
+  statement paling lambat, total waktu request)
+- menulis satu log line key=value per request (logger `app.sql`)
+
+Deteksi N+1 (SQL_DETECT_N_PLUS_ONE, untuk dev/test): statement dengan teks
+SQL yang sama dieksekusi SQL_N_PLUS_ONE_THRESHOLD kali dalam satu request
+-> RepeatedStatementError. Loop yang memang sengaja mengulang statement
+(chunk bulk, retry deadlock) dibungkus `repeats_expected()`.
+
+Di luar request (background task, startup) hook tidak mencatat apa pun.
+"""
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger("app.sql")
+
+# Panjang SQL statement paling lambat di log line
+SLOWEST_SQL_LOG_CHARS = 200
+
+
+class RepeatedStatementError(RuntimeError):
+    """Statement yang sama diulang dalam satu request (kemungkinan N+1)."""
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "slowest", "slowest_sql", "statements", "allow_repeats")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.slowest = 0.0
+        self.slowest_sql: Optional[str] = None
+        self.statements: Counter = Counter()
+        self.allow_repeats = 0
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if duration >= self.slowest:
+            self.slowest = duration
+            self.slowest_sql = statement
+
+        if settings.SQL_DETECT_N_PLUS_ONE and not self.allow_repeats:
+            self.statements[statement] += 1
+            repeats = self.statements[statement]
+            if repeats >= settings.SQL_N_PLUS_ONE_THRESHOLD:
+                raise RepeatedStatementError(
+                    f"Statement executed {repeats} times in one request (N+1?): "
+                    f"{statement[:SLOWEST_SQL_LOG_CHARS]}"
+                )
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def repeats_expected():
+    """Blok yang sengaja mengeksekusi statement yang sama berulang kali."""
+    stats = _current.get()
+    if stats is not None:
+        stats.allow_repeats += 1
+    try:
+        yield
+    finally:
+        if stats is not None:
+            stats.allow_repeats -= 1
+
+
+# ============================================================================
+# Engine hooks
+# ============================================================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is not None and conn.info.get("query_start"):
+        stats.record(statement, time.perf_counter() - conn.info["query_start"].pop())
+
+
+def _handle_error(context):
+    # Statement gagal tidak memanggil after_cursor_execute
+    if context.connection is not None and context.connection.info.get("query_start"):
+        context.connection.info["query_start"].pop()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Pasang hook di sync_engine (dipanggil saat engine dibuat)."""
+    if settings.SQL_INSTRUMENTATION:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+# ============================================================================
+# Middleware (ASGI murni, supaya StreamingResponse tidak di-buffer)
+# ============================================================================
+def server_timing(stats: QueryStats, total: float) -> str:
+    return ", ".join([
+        f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} statements"',
+        f"db-slowest;dur={stats.slowest * 1000:.2f}",
+        f"total;dur={total * 1000:.2f}",
+    ])
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.SQL_INSTRUMENTATION:
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    server_timing(stats, time.perf_counter() - started).encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            logger.info(
+                "method=%s path=%s status=%d statements=%d db_ms=%.2f slowest_ms=%.2f total_ms=%.2f slowest_sql=%r",
+                scope["method"],
+                scope["path"],
+                status_code,
+                stats.count,
+                stats.duration * 1000,
+                stats.slowest * 1000,
+                (time.perf_counter() - started) * 1000,
+                (stats.slowest_sql or "")[:SLOWEST_SQL_LOG_CHARS],
+            )
@@ -0,0 +1,223 @@
+"""
+Cache response read endpoint (GET /products, /products/{id}, /categories,
+/roles).
+
+Yang di-cache adalah body JSON final (bytes), jadi cache hit tidak
+menyentuh database maupun serializer.
+
+Key = namespace + role caller + query params yang dinormalisasi (None
+dibuang, urutan tidak berpengaruh) + versi setiap tag yang melekat pada
+entry. Invalidasi tidak menghapus entry satu per satu: handler create /
+update / delete memanggil `invalidate(*tags)` setelah commit, yang
+menaikkan versi tag. Entry lama tidak pernah terbaca lagi (key-nya sudah
+berbeda) dan akhirnya terbuang oleh LRU/TTL.
+
+L1 = TTLCache in-process. L2 = backend bersama opsional (CACHE_BACKEND):
+body disimpan di sana, dan versi tag juga, sehingga invalidasi di satu
+worker terlihat worker lain paling lambat RESPONSE_CACHE_TAG_SYNC_SECONDS.
+Tanpa backend bersama, versi tag hanya per worker: worker/instance lain
+baru melihat perubahan setelah entry-nya kadaluarsa (TTL). Karena itu
+cache default-nya hanya aktif kalau ada backend bersama
+(RESPONSE_CACHE_ENABLED untuk memaksa).
+
+Versi tag dibaca SEBELUM query ke database, jadi request yang sedang jalan
+saat commit hanya bisa menyimpan hasil lama di bawah versi lama, yang
+sudah tidak dipakai lagi.
+
+Entry menyimpan ETag bersama body (lihat app/utils/etag.py),
+jadi cache hit juga menjawab If-None-Match tanpa query.
+"""
+import hashlib
+import json
+import uuid
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+
+from app.config import settings
+from app.utils.cache import CacheBackend, TTLCache, shared_backend
+from app.utils.etag import is_not_modified, not_modified_response, validator_headers
+from app.utils.responses import encode
+
+# Versi tag di backend bersama hidup jauh lebih lama dari entry mana pun
+TAG_VERSION_TTL_SECONDS = 7 * 24 * 3600
+
+# ETag dari validator handler
+Validator = str
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        backend: Optional[CacheBackend] = None,
+        tag_sync: float = 1,
+        enabled: bool = True,
+    ):
+        # ttl <= 0 mematikan cache (selalu query ke DB)
+        self.enabled = enabled and ttl > 0
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+        # Tanpa backend: versi tag lokal (tidak pernah kadaluarsa).
+        # Dengan backend: salinan versi dari backend, di-refresh per tag_sync detik.
+        self._versions: Dict[str, str] = {}
+        self._synced_versions = TTLCache(maxsize=10000, ttl=tag_sync)
+        self.hits: Dict[str, int] = defaultdict(int)
+        self.misses: Dict[str, int] = defaultdict(int)
+        self.invalidations: Dict[str, int] = defaultdict(int)
+
+    # ========================================================================
+    # Keys
+    # ========================================================================
+    @staticmethod
+    def _tag_key(tag: str) -> str:
+        return f"cache:tag:{tag}"
+
+    async def _tag_version(self, tag: str) -> str:
+        if self.backend is None:
+            return self._versions.get(tag, "0")
+
+        version = self._synced_versions.get(tag, None)
+        if version is None:
+            raw = await self.backend.get(self._tag_key(tag))
+            version = raw.decode() if raw is not None else "0"
+            self._synced_versions.set(tag, version)
+        return version
+
+    async def key(self, namespace: str, tags: Iterable[str], params: Dict[str, Any], role: Optional[str]) -> str:
+        normalized = json.dumps(
+            sorted((name, value) for name, value in params.items() if value is not None),
+            default=str, separators=(",", ":"),
+        )
+        versions = ",".join([f"{tag}={await self._tag_version(tag)}" for tag in tags])
+        digest = hashlib.sha1(f"{role}|{normalized}|{versions}".encode()).hexdigest()
+        # v2: format entry ETag + body (tanpa Last-Modified)
+        return f"resp:v2:{namespace}:{digest}"
+
+    # ========================================================================
+    # Get / set / invalidate
+    # ========================================================================
+    async def get(self, namespace: str, key: str) -> Optional[bytes]:
+        body = self.local.get(key, None)
+        if body is None and self.backend is not None:
+            body = await self.backend.get(key)
+            if body is not None:
+                self.local.set(key, body)
+
+        if body is None:
+            self.misses[namespace] += 1
+        else:
+            self.hits[namespace] += 1
+        return body
+
+    async def set(self, key: str, body: bytes, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        self.local.set(key, body, ttl)
+        if self.backend is not None:
+            await self.backend.set(key, body, ttl)
+
+    async def invalidate(self, *tags: str) -> None:
+        """Dipanggil setelah write di-commit."""
+        if not self.enabled:
+            return
+
+        for tag in set(tags):
+            version = uuid.uuid4().hex[:16]
+            self.invalidations[tag] += 1
+            self._versions[tag] = version
+            self._synced_versions.set(tag, version)
+            if self.backend is not None:
+                await self.backend.set(self._tag_key(tag), version.encode(), TAG_VERSION_TTL_SECONDS)
+
+    def stats(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        return {
+            "enabled": self.enabled,
+            "backend": type(self.backend).__name__ if self.backend is not None else None,
+            "local": self.local.stats(),
+            "namespaces": {
+                namespace: {"hits": self.hits[namespace], "misses": self.misses[namespace]}
+                for namespace in namespaces
+            },
+            "invalidations": dict(self.invalidations),
+        }
+
+
+response_cache = ResponseCache(
+    maxsize=settings.RESPONSE_CACHE_MAX_SIZE,
+    ttl=settings.RESPONSE_CACHE_TTL_SECONDS,
+    backend=shared_backend,
+    tag_sync=settings.RESPONSE_CACHE_TAG_SYNC_SECONDS,
+    enabled=(
+        settings.RESPONSE_CACHE_ENABLED
+        if settings.RESPONSE_CACHE_ENABLED is not None
+        else shared_backend is not None
+    ),
+)
+
+
+# ============================================================================
+# Helper untuk handler
+# ============================================================================
+# Entry cache = ETag + body, supaya cache hit juga bisa menjawab 304 tanpa
+# query validator.
+def _pack(etag: Optional[str], body: bytes) -> bytes:
+    return f"{etag or ''}\n".encode() + body
+
+
+def _unpack(entry: bytes) -> Tuple[Optional[str], bytes]:
+    etag, body = entry.split(b"\n", 1)
+    return etag.decode() or None, body
+
+
+async def cached_json(
+    namespace: str,
+    *,
+    router: str,
+    tags: Tuple[str, ...],
+    params: Dict[str, Any],
+    role: Optional[str],
+    build: Callable[[], Awaitable[Any]],
+    ttl: Optional[float] = None,
+    request: Optional[Request] = None,
+    validator: Optional[Callable[[Any], Optional[Validator]]] = None,
+) -> Response:
+    """
+    Body JSON dari cache, atau `await build()` (model / dict / list model)
+    yang di-encode lalu disimpan. Exception dari build (mis. 404) tidak
+    di-cache. Encoder mengikuti FAST_JSON / FAST_JSON_ROUTERS untuk `router`
+    (lihat app/utils/responses.py).
+
+    Dengan `request` + `validator` (lihat app/utils/etag.py): validator
+    dihitung dari hasil build (halaman yang sudah di-fetch, tanpa query
+    tambahan), response membawa ETag, dan request kondisional
+    yang cocok dijawab 304 tanpa serialisasi.
+    """
+    key = None
+    if response_cache.enabled:
+        key = await response_cache.key(namespace, tags, params, role)
+        entry = await response_cache.get(namespace, key)
+        if entry is not None:
+            etag, body = _unpack(entry)
+            headers = {"X-Cache": "HIT", **(validator_headers(etag) if validator else {})}
+            if request is not None and validator is not None and is_not_modified(request, etag):
+                return not_modified_response(headers)
+            return Response(body, media_type="application/json", headers=headers)
+
+    result = await build()
+
+    etag = None
+    if validator is not None:
+        etag = validator(result)
+        if etag is not None and request is not None and is_not_modified(request, etag):
+            return not_modified_response(validator_headers(etag))
+
+    body = encode(result, router)
+    headers = validator_headers(etag) if validator is not None else {}
+    if key is not None:
+        await response_cache.set(key, _pack(etag, body), ttl)
+        headers["X-Cache"] = "MISS"
+    return Response(body, media_type="application/json", headers=headers)
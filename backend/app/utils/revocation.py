@@ -0,0 +1,240 @@
+"""
+Revocation store untuk token JWT (logout).
+
+Setiap access token membawa claim `jti`. Logout mencatat jti tersebut
+sampai `exp` token lewat; setelah itu entry tidak berguna lagi dan dibuang.
+
+Lapisan:
+- BloomFilter in-process: cek negatif cepat. Hampir semua request membawa
+  token yang TIDAK di-revoke; untuk mereka cukup k bit lookup, tanpa
+  menyentuh set revocation maupun database.
+- Set exact in-memory (jti -> exp): memutus false positive Bloom filter.
+  Entry yang expired dibuang oleh sweep periodik (Bloom di-rebuild).
+- Tabel `revoked_tokens` di PostgreSQL: sumber kebenaran bersama antar
+  worker dan restart. Write dikumpulkan lalu di-insert per batch; revocation
+  dari worker lain ditarik secara periodik (REVOCATION_SYNC_SECONDS).
+
+Revocation dari worker yang sama berlaku seketika; dari worker lain
+berlaku paling lambat setelah satu interval sync.
+
+`revoked_at` diisi jam database saat row benar-benar di-insert (bukan saat
+revoke() dipanggil), dan watermark refresh() juga dibaca dari jam database.
+Batch yang flush-nya gagal lalu di-insert belakangan tetap mendapat
+revoked_at baru, jadi tidak jatuh di belakang watermark worker lain.
+Overlap satu interval di refresh() menutup transaksi yang di-stamp sebelum
+watermark tapi commit sesudahnya.
+"""
+import asyncio
+import hashlib
+import logging
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from app.config import settings
+from app.database import get_async_sessionmaker
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Jam database (naive UTC, sama dengan kolom DateTime lain di repo ini)
+DB_UTC_NOW = func.timezone("UTC", func.now())
+
+
+class BloomFilter:
+    """Bloom filter sederhana (double hashing di atas blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity = max(capacity, 1)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class RevocationStore:
+    def __init__(self, sync_interval: float, bloom_capacity: int, bloom_error_rate: float):
+        self.sync_interval = sync_interval
+        self.bloom_capacity = bloom_capacity
+        self.bloom_error_rate = bloom_error_rate
+
+        self._revoked: Dict[str, float] = {}
+        self._bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+        self._pending: List[dict] = []
+        self._watermark: Optional[datetime] = None
+        self._last_sync = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+        # Metrik
+        self.checks = 0
+        self.bloom_negatives = 0
+
+    # ========================================================================
+    # Hot path (per request)
+    # ========================================================================
+    def contains(self, jti: str) -> bool:
+        self.checks += 1
+        if jti not in self._bloom:
+            self.bloom_negatives += 1
+            return False
+        exp = self._revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    async def is_revoked(self, jti: Optional[str]) -> bool:
+        # Token lama (sebelum ada jti) tidak bisa di-revoke; berlaku sampai exp.
+        if not jti:
+            return False
+        # Tanpa background task (serverless), sync dijalankan lazy paling
+        # sering sekali per interval.
+        if self._task is None and time.monotonic() - self._last_sync >= self.sync_interval:
+            await self.sync()
+        return self.contains(jti)
+
+    # ========================================================================
+    # Revoke
+    # ========================================================================
+    def _remember(self, jti: str, exp: float) -> None:
+        if jti not in self._revoked:
+            self._bloom.add(jti)
+        self._revoked[jti] = exp
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        if exp <= time.time():
+            return
+        self._remember(jti, exp)
+        self._pending.append({
+            "jti": jti,
+            "expires_at": datetime.utcfromtimestamp(exp),
+        })
+        # Tanpa background task tidak ada yang flush nanti; tulis sekarang.
+        if self._task is None:
+            await self.flush()
+
+    # ========================================================================
+    # Sync dengan PostgreSQL
+    # ========================================================================
+    async def flush(self) -> None:
+        """Insert revocation yang masih pending dalam satu batch."""
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, []
+
+        SessionLocal = get_async_sessionmaker()
+        try:
+            async with SessionLocal() as session:
+                await session.execute(
+                    pg_insert(RevokedToken)
+                    .values([{**entry, "revoked_at": DB_UTC_NOW} for entry in batch])
+                    .on_conflict_do_nothing(index_elements=["jti"])
+                )
+                await session.commit()
+        except Exception:
+            # Tetap berlaku lokal; dicoba lagi di sync berikutnya.
+            self._pending = batch + self._pending
+            logger.exception("Failed to persist %d token revocation(s)", len(batch))
+
+    async def refresh(self) -> None:
+        """Tarik revocation baru (termasuk dari worker lain) dari database."""
+        now = datetime.utcnow()
+        query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+        if self._watermark is not None:
+            # Overlap satu interval: insert yang di-stamp sebelum watermark
+            # tapi commit sesudah refresh sebelumnya
+            query = query.where(
+                RevokedToken.revoked_at >= self._watermark - timedelta(seconds=self.sync_interval)
+            )
+
+        SessionLocal = get_async_sessionmaker()
+        async with SessionLocal() as session:
+            # Watermark berikutnya dari jam database, dibaca sebelum query
+            watermark = (await session.execute(select(DB_UTC_NOW))).scalar_one()
+            rows = (await session.execute(query)).all()
+            await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            await session.commit()
+
+        for jti, expires_at in rows:
+            self._remember(jti, expires_at.replace(tzinfo=timezone.utc).timestamp())
+        self._watermark = watermark
+
+    def sweep(self) -> None:
+        """Buang entry yang sudah expired dan rebuild Bloom filter."""
+        now = time.time()
+        expired = [jti for jti, exp in self._revoked.items() if exp <= now]
+        # Rebuild juga kalau Bloom sudah melewati kapasitasnya (false positive naik)
+        if not expired and self._bloom.count <= self._bloom.capacity:
+            return
+        for jti in expired:
+            del self._revoked[jti]
+
+        bloom = BloomFilter(max(self.bloom_capacity, len(self._revoked)), self.bloom_error_rate)
+        for jti in self._revoked:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    async def sync(self) -> None:
+        self._last_sync = time.monotonic()
+        try:
+            await self.flush()
+            await self.refresh()
+        except Exception:
+            logger.exception("Token revocation sync failed")
+        self.sweep()
+
+    # ========================================================================
+    # Lifecycle (dipanggil dari lifespan)
+    # ========================================================================
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            await self.sync()
+
+    async def start(self) -> None:
+        await self.sync()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._revoked),
+            "pending_writes": len(self._pending),
+            "checks": self.checks,
+            "bloom_negatives": self.bloom_negatives,
+            "bloom_bits": self._bloom.size,
+            "bloom_hashes": self._bloom.hash_count,
+        }
+
+
+revocation_store = RevocationStore(
+    sync_interval=settings.REVOCATION_SYNC_SECONDS,
+    bloom_capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    bloom_error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+)
@@ -0,0 +1,100 @@
+"""
+Search helpers untuk products & users.
+
+Di PostgreSQL, kolom yang bisa dicari punya GIN index `gin_trgm_ops`
+(lihat app/migrations.py), sehingga `ILIKE '%term%'` maupun `ILIKE 'term%'`
+dilayani index, bukan sequential scan. Ranking memakai operator jarak
+trigram `<->` (1 - similarity).
+
+Kalau extension pg_trgm tidak tersedia (CREATE EXTENSION gagal saat
+startup, lihat app/migrations.py), filter ILIKE tetap jalan (tanpa index)
+dan ranking jatuh ke CASE sederhana: exact match → prefix match → sisanya,
+supaya operator `<->` tidak pernah dikirim ke database yang tidak
+mengenalnya.
+"""
+from typing import Sequence
+
+from sqlalchemy import Float, case, func, literal, or_
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy.sql.functions import FunctionElement
+from sqlalchemy.sql.visitors import InternalTraversal
+
+LIKE_ESCAPE = "\\"
+
+# Diisi saat startup oleh app/migrations.py. Sebelum diketahui, anggap
+# tidak ada (fallback CASE selalu valid).
+_trigram_available = False
+
+
+def set_trigram_available(available: bool) -> None:
+    global _trigram_available
+    _trigram_available = available
+
+
+def trigram_available() -> bool:
+    return _trigram_available
+
+
+def escape_like(term: str) -> str:
+    """Escape wildcard LIKE (% dan _) supaya input user dicari apa adanya."""
+    return (
+        term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+def contains(columns: Sequence[ColumnElement], term: str) -> ColumnElement:
+    """`col ILIKE '%term%'` untuk salah satu kolom (trigram-indexed di PG)."""
+    pattern = f"%{escape_like(term)}%"
+    return or_(*[column.ilike(pattern, escape=LIKE_ESCAPE) for column in columns])
+
+
+def starts_with(column: ColumnElement, term: str) -> ColumnElement:
+    """`col ILIKE 'term%'` untuk autocomplete (trigram-indexed di PG)."""
+    return column.ilike(f"{escape_like(term)}%", escape=LIKE_ESCAPE)
+
+
+class search_distance(FunctionElement):
+    """
+    Jarak relevansi antara `term` dan kolom-kolom yang dicari; makin kecil
+    makin relevan (sort asc = paling relevan dulu). Kolom NULL diabaikan.
+    """
+    type = Float()
+    name = "search_distance"
+    inherit_cache = True
+    # trigram ikut cache key: statement yang sudah di-compile tidak dipakai
+    # ulang kalau status pg_trgm berubah
+    _traverse_internals = FunctionElement._traverse_internals + [
+        ("trigram", InternalTraversal.dp_boolean),
+    ]
+
+    def __init__(self, columns: Sequence[ColumnElement], term: str):
+        # Pattern prefix sudah di-escape (dipakai fallback CASE), ikut sebagai
+        # bind parameter terpisah supaya statement tetap bisa di-cache
+        super().__init__(*columns, literal(term), literal(f"{escape_like(term)}%"))
+        self.trigram = trigram_available()
+
+
+@compiles(search_distance)
+def _search_distance_default(element, compiler, **kw):
+    *columns, term, prefix_pattern = element.clauses.clauses
+    lowered = func.lower(term)
+    prefix = func.lower(prefix_pattern)
+    expression = case(
+        (or_(*[func.lower(column) == lowered for column in columns]), 0.0),
+        (or_(*[func.lower(column).like(prefix, escape=LIKE_ESCAPE) for column in columns]), 0.5),
+        else_=1.0,
+    )
+    return compiler.process(expression, **kw)
+
+
+@compiles(search_distance, "postgresql")
+def _search_distance_postgresql(element, compiler, **kw):
+    if not element.trigram:
+        return _search_distance_default(element, compiler, **kw)
+    *columns, term, _ = element.clauses.clauses
+    distances = [column.op("<->", return_type=Float())(term) for column in columns]
+    expression = distances[0] if len(distances) == 1 else func.least(*distances)
+    return compiler.process(expression, **kw)
@@ -1,10 +1,23 @@
+import uuid
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.config import settings
+from app.utils.tokens import VerifiedTokenCache, create_token_codec
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min/max rounds = BCRYPT_ROUNDS: hash dengan cost lain dianggap perlu
+# di-rehash (lihat PasswordHasher.verify_and_update saat login)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+# Codec JWT (jose | pyjwt) + cache claims token yang sudah diverifikasi
+token_codec = create_token_codec(settings.TOKEN_CODEC, settings.SECRET_KEY, settings.ALGORITHM)
+token_cache = VerifiedTokenCache(token_codec, maxsize=settings.TOKEN_CACHE_SIZE)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -19,14 +32,17 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
 
-    to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    # jti: id unik per token, dipakai untuk revocation (logout)
+    to_encode.update({"exp": expire, "ver": settings.TOKEN_VERSION, "jti": uuid.uuid4().hex})
+    encoded_jwt = token_codec.encode(to_encode)
     return encoded_jwt
 
+def decode_access_token_claims(token: str) -> Optional[dict]:
+    return token_cache.decode(token)
+
 def decode_access_token(token: str) -> Optional[str]:
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        return username
-    except JWTError:
+    payload = decode_access_token_claims(token)
+    if payload is None:
         return None
+    username: str = payload.get("sub")
+    return username
@@ -0,0 +1,170 @@
+"""
+Stock adjustment atomik (POST /products/{id}/stock/adjust dan
+POST /products/stock/adjust).
+
+Stok diubah dengan delta dalam satu statement (movement ledger ikut
+ditulis lewat CTE di statement yang sama):
+
+    UPDATE products SET stock = stock + :delta, updated_at = :now
+    WHERE id = :id AND stock + :delta >= 0
+    RETURNING id, stock, low_stock_threshold, updated_at
+
+Tidak ada read-modify-write di Python, jadi adjustment paralel ke SKU yang
+sama tidak saling menimpa, dan row lock hanya dipegang dari UPDATE sampai
+commit (satu statement + commit). Varian batch memakai UPDATE ... FROM
+(VALUES ...) sehingga banyak SKU diubah dalam satu statement.
+
+Idempotency-Key: response adjustment yang sukses disimpan di tabel
+`stock_adjustments` dalam transaksi yang sama dengan UPDATE. Retry dengan
+key yang sama mengembalikan response tersimpan tanpa mengubah stok lagi.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Integer, column, delete, literal, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PG_UUID
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.database import get_async_sessionmaker
+from app.models.product import Product
+from app.models.stock_adjustment import StockAdjustment
+from app.utils.ledger import with_movements
+
+logger = logging.getLogger(__name__)
+
+STOCK_LEVEL_COLUMNS = (
+    Product.id,
+    Product.stock,
+    Product.low_stock_threshold,
+    Product.updated_at,
+)
+
+# SQLSTATE deadlock_detected. Batch bisa deadlock kalau dua request mengunci
+# SKU yang sama dengan urutan berbeda (urutan UPDATE ... FROM tidak dijamin).
+DEADLOCK_SQLSTATE = "40P01"
+
+
+class IdempotencyKeyReused(Exception):
+    """Idempotency-Key sudah dipakai untuk request (user/endpoint/body) lain."""
+
+
+# ============================================================================
+# UPDATE statements
+# ============================================================================
+# Movement ledger ikut ditulis di statement yang sama (lihat app/utils/ledger.py)
+def adjust_one_statement(product_id: UUID, delta: int, *, ref: Optional[str], user_id: UUID):
+    statement = (
+        update(Product)
+        .where(Product.id == product_id, Product.stock + delta >= 0)
+        .values(stock=Product.stock + delta, updated_at=datetime.utcnow())
+        .returning(*STOCK_LEVEL_COLUMNS, literal(delta, Integer).label("delta"))
+    )
+    return with_movements(statement, "adjust", ref=ref, user_id=user_id)
+
+
+def adjust_many_statement(deltas: Dict[UUID, int], *, ref: Optional[str], user_id: UUID):
+    # Diurutkan per id supaya statement (dan cache-nya) stabil untuk set SKU yang sama
+    adjustments = values(
+        column("product_id", PG_UUID(as_uuid=True)),
+        column("delta", Integer),
+        name="adjustments",
+    ).data(sorted(deltas.items()))
+
+    statement = (
+        update(Product)
+        .where(
+            Product.id == adjustments.c.product_id,
+            Product.stock + adjustments.c.delta >= 0,
+        )
+        .values(stock=Product.stock + adjustments.c.delta, updated_at=datetime.utcnow())
+        .returning(*STOCK_LEVEL_COLUMNS, adjustments.c.delta)
+    )
+    return with_movements(statement, "adjust", ref=ref, user_id=user_id)
+
+
+def merge_deltas(items) -> Dict[UUID, int]:
+    """Gabungkan item dengan product_id yang sama (UPDATE ... FROM hanya mengubah row sekali)."""
+    deltas: Dict[UUID, int] = {}
+    for item in items:
+        deltas[item.product_id] = deltas.get(item.product_id, 0) + item.delta
+    return deltas
+
+
+def is_deadlock(error: DBAPIError) -> bool:
+    orig = error.orig
+    return (getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)) == DEADLOCK_SQLSTATE
+
+
+async def current_stock(db: AsyncSession, product_ids: List[UUID]) -> Dict[UUID, int]:
+    """Stok saat ini, hanya dipakai untuk pesan error setelah adjustment ditolak."""
+    result = await db.execute(
+        select(Product.id, Product.stock).where(Product.id.in_(product_ids))
+    )
+    return {product_id: stock for product_id, stock in result.all()}
+
+
+# ============================================================================
+# Idempotency-Key
+# ============================================================================
+def request_fingerprint(user_id: UUID, endpoint: str, body: dict) -> str:
+    payload = json.dumps(
+        {"user": str(user_id), "endpoint": endpoint, "body": body},
+        sort_keys=True, default=str, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def _idempotency_cutoff() -> datetime:
+    return datetime.utcnow() - timedelta(hours=settings.STOCK_IDEMPOTENCY_TTL_HOURS)
+
+
+async def stored_response(db: AsyncSession, key: str, request_hash: str) -> Optional[dict]:
+    """
+    Response tersimpan untuk key ini, atau None kalau belum ada / sudah lewat TTL.
+    Raise IdempotencyKeyReused kalau key dipakai untuk request lain.
+    """
+    result = await db.execute(
+        select(StockAdjustment.request_hash, StockAdjustment.response, StockAdjustment.created_at)
+        .where(StockAdjustment.idempotency_key == key)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+
+    if row.created_at < _idempotency_cutoff():
+        # Key kadaluarsa boleh dipakai ulang; hapus di transaksi yang sama
+        await db.execute(delete(StockAdjustment).where(StockAdjustment.idempotency_key == key))
+        return None
+
+    if row.request_hash != request_hash:
+        raise IdempotencyKeyReused(key)
+    return row.response
+
+
+def remember_response(db: AsyncSession, key: str, request_hash: str, response: dict, user_id: UUID) -> None:
+    # Di-flush bersama commit adjustment: kalau key sudah diambil request
+    # paralel, commit gagal dengan IntegrityError dan UPDATE ikut di-rollback.
+    db.add(StockAdjustment(
+        idempotency_key=key,
+        request_hash=request_hash,
+        response=response,
+        created_by=user_id,
+    ))
+
+
+async def purge_idempotency_keys() -> None:
+    """Hapus key yang sudah lewat TTL. Dipanggil saat startup."""
+    SessionLocal = get_async_sessionmaker()
+    async with SessionLocal() as session:
+        result = await session.execute(
+            delete(StockAdjustment).where(StockAdjustment.created_at < _idempotency_cutoff())
+        )
+        await session.commit()
+    if result.rowcount:
+        logger.info("Purged %d expired stock idempotency keys", result.rowcount)
@@ -0,0 +1,155 @@
+"""
+JWT codec + cache token yang sudah diverifikasi.
+
+- TokenCodec: encode/decode JWT. JoseCodec (python-jose, default) atau
+  PyJWTCodec (PyJWT, opsional, lebih cepat). Dipilih lewat TOKEN_CODEC.
+- VerifiedTokenCache: token yang sudah lolos verifikasi signature disimpan
+  per digest SHA-256 dari token utuh, dengan TTL = sisa umur `exp`.
+  Token yang sama (header.payload.signature identik) tidak perlu di-parse
+  dan di-HMAC ulang di setiap request.
+
+Catatan keamanan: cache hanya berisi token yang sudah terverifikasi, dan
+key-nya mencakup signature, jadi token palsu tidak pernah cocok dengan
+entry mana pun dan selalu jatuh ke verifikasi penuh. Perbandingan
+signature di kedua library memakai hmac.compare_digest (constant-time);
+lookup dict hanya bergantung pada digest token, bukan pada SECRET_KEY.
+
+Modul ini sengaja tidak membaca settings; wiring ada di app/utils/security.py.
+"""
+import hashlib
+import time
+from typing import Optional
+
+from app.utils.cache import MISSING, TTLCache
+
+
+class TokenError(Exception):
+    """Token tidak valid (signature, format, atau sudah expired)."""
+
+
+class TokenCodec:
+    """Interface codec JWT (HMAC, satu secret)."""
+
+    name = "base"
+
+    def __init__(self, secret: str, algorithm: str):
+        self.secret = secret
+        self.algorithm = algorithm
+
+    def encode(self, claims: dict) -> str:
+        raise NotImplementedError
+
+    def decode(self, token: str) -> dict:
+        """Verifikasi signature + exp; raise TokenError kalau tidak valid."""
+        raise NotImplementedError
+
+
+class JoseCodec(TokenCodec):
+    name = "jose"
+
+    def __init__(self, secret: str, algorithm: str):
+        super().__init__(secret, algorithm)
+        from jose import JWTError, jwt
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self._jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+class PyJWTCodec(TokenCodec):
+    """Codec PyJWT (opsional, butuh paket `PyJWT`)."""
+
+    name = "pyjwt"
+
+    def __init__(self, secret: str, algorithm: str):
+        super().__init__(secret, algorithm)
+        try:
+            import jwt
+        except ImportError as e:
+            raise RuntimeError(
+                "TOKEN_CODEC=pyjwt requires the `PyJWT` package (pip install PyJWT)"
+            ) from e
+        self._jwt = jwt
+        self._error = jwt.PyJWTError
+
+    def encode(self, claims: dict) -> str:
+        return self._jwt.encode(claims, self.secret, algorithm=self.algorithm)
+
+    def decode(self, token: str) -> dict:
+        try:
+            return self._jwt.decode(token, self.secret, algorithms=[self.algorithm])
+        except self._error as e:
+            raise TokenError(str(e)) from e
+
+
+TOKEN_CODECS = {
+    JoseCodec.name: JoseCodec,
+    PyJWTCodec.name: PyJWTCodec,
+}
+
+
+def create_token_codec(name: str, secret: str, algorithm: str) -> TokenCodec:
+    try:
+        codec_class = TOKEN_CODECS[name.lower()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown TOKEN_CODEC {name!r} (expected one of: {', '.join(TOKEN_CODECS)})"
+        ) from None
+    return codec_class(secret, algorithm)
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+class VerifiedTokenCache:
+    """
+    Decode JWT lewat codec, dengan cache claims per token.
+
+    Entry hidup sampai `exp` token (tidak pernah lebih lama), dan jumlahnya
+    dibatasi maxsize (LRU). maxsize=0 mematikan cache.
+    """
+
+    def __init__(self, codec: TokenCodec, maxsize: int):
+        self.codec = codec
+        self.enabled = maxsize > 0
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=0)
+
+    def decode(self, token: str) -> Optional[dict]:
+        if not self.enabled:
+            return self._verify(token)
+
+        key = token_digest(token)
+        claims = self._cache.get(key)
+        if claims is not MISSING:
+            return dict(claims)
+
+        claims = self._verify(token)
+        if claims is None:
+            return None
+
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)):
+            ttl = exp - time.time()
+            if ttl > 0:
+                self._cache.set(key, dict(claims), ttl)
+        return claims
+
+    def _verify(self, token: str) -> Optional[dict]:
+        try:
+            return self.codec.decode(token)
+        except TokenError:
+            return None
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {"codec": self.codec.name, **self._cache.stats()}
@@ -0,0 +1,149 @@
+"""
+Cache principal user yang sedang login.
+
+get_current_user dipanggil di hampir setiap request; tanpa cache, setiap
+request authenticated menjalankan query users + roles sebelum query bisnis.
+Yang di-cache hanya principal kecil (id, username, is_active, role), bukan
+entity ORM, dengan key username + token version + generasi role.
+
+L1 = TTLCache in-process. L2 = backend bersama opsional (CACHE_BACKEND),
+supaya invalidasi dari satu worker terlihat worker lain setelah L1 mereka
+kadaluarsa (maksimal USER_CACHE_TTL_SECONDS).
+
+role_name ada di setiap principal (dan di key response cache), jadi rename /
+delete role tidak bisa diinvalidasi per username. `invalidate_roles()`
+menaikkan generasi role; dengan backend bersama generasi itu disimpan di
+sana dan dibaca ulang setiap `role_sync` detik, sehingga L1 maupun L2 worker
+lain yang masih memegang role lama tidak terbaca lagi (key-nya berbeda).
+Generasi dibaca SEBELUM query ke database (lihat `key()`), jadi request
+yang sedang jalan saat commit hanya bisa menyimpan role lama di bawah
+generasi lama.
+"""
+import json
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Optional
+from uuid import UUID
+
+from app.config import settings
+from app.utils.cache import CacheBackend, TTLCache, shared_backend
+
+ROLES_GENERATION_KEY = "auth:roles:generation"
+# Generasi di backend bersama hidup jauh lebih lama dari principal mana pun
+ROLES_GENERATION_TTL_SECONDS = 7 * 24 * 3600
+
+
+@dataclass(frozen=True)
+class CurrentUser:
+    """Principal user untuk dependency auth (bukan entity ORM)."""
+    id: UUID
+    username: str
+    is_active: bool
+    role_name: Optional[str] = None
+
+    @classmethod
+    def from_user(cls, user) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            is_active=bool(user.is_active),
+            role_name=user.role.name if user.role is not None else None,
+        )
+
+    def to_bytes(self) -> bytes:
+        data = asdict(self)
+        data["id"] = str(self.id)
+        return json.dumps(data).encode()
+
+    @classmethod
+    def from_bytes(cls, raw: bytes) -> "CurrentUser":
+        data = json.loads(raw)
+        data["id"] = UUID(data["id"])
+        return cls(**data)
+
+
+class UserPrincipalCache:
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        backend: Optional[CacheBackend] = None,
+        role_sync: float = 1,
+    ):
+        # ttl <= 0 mematikan cache (selalu query ke DB)
+        self.enabled = ttl > 0
+        self.ttl = ttl
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.backend = backend
+        # Tanpa backend: generasi lokal. Dengan backend: salinan dari backend,
+        # di-refresh per role_sync detik.
+        self._generation = "0"
+        self._synced_generation = TTLCache(maxsize=1, ttl=role_sync)
+
+    async def _roles_generation(self) -> str:
+        if self.backend is None:
+            return self._generation
+
+        generation = self._synced_generation.get(ROLES_GENERATION_KEY, None)
+        if generation is None:
+            raw = await self.backend.get(ROLES_GENERATION_KEY)
+            generation = raw.decode() if raw is not None else "0"
+            self._synced_generation.set(ROLES_GENERATION_KEY, generation)
+        return generation
+
+    async def key(self, username: str, token_version: int) -> str:
+        """Key principal; dibaca sebelum query DB dan dipakai lagi untuk set()."""
+        return f"auth:user:{username}:v{token_version}:r{await self._roles_generation()}"
+
+    async def get(self, key: str) -> Optional[CurrentUser]:
+        if not self.enabled:
+            return None
+
+        principal = self.local.get(key, None)
+        if principal is not None or self.backend is None:
+            return principal
+
+        raw = await self.backend.get(key)
+        if raw is None:
+            return None
+        principal = CurrentUser.from_bytes(raw)
+        self.local.set(key, principal)
+        return principal
+
+    async def set(self, key: str, principal: CurrentUser) -> None:
+        if not self.enabled:
+            return
+
+        self.local.set(key, principal)
+        if self.backend is not None:
+            await self.backend.set(key, principal.to_bytes(), self.ttl)
+
+    async def invalidate(self, *usernames: str) -> None:
+        """Dipanggil setelah user di-update/di-delete (commit sukses)."""
+        keys = [
+            await self.key(username, settings.TOKEN_VERSION)
+            for username in usernames
+            if username
+        ]
+        for key in keys:
+            self.local.delete(key)
+        if self.backend is not None:
+            await self.backend.delete(*keys)
+
+    async def invalidate_roles(self) -> None:
+        """Dipanggil setelah role di-rename/di-delete (commit sukses)."""
+        generation = uuid.uuid4().hex[:16]
+        self._generation = generation
+        self._synced_generation.set(ROLES_GENERATION_KEY, generation)
+        # Entry L1 generasi lama tidak terbaca lagi; buang supaya tidak memenuhi LRU
+        self.local.clear()
+        if self.backend is not None:
+            await self.backend.set(ROLES_GENERATION_KEY, generation.encode(), ROLES_GENERATION_TTL_SECONDS)
+
+
+user_cache = UserPrincipalCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+    backend=shared_backend,
+    role_sync=settings.USER_CACHE_ROLE_SYNC_SECONDS,
+)
@@ -0,0 +1,64 @@
+"""
+Microbenchmark decode JWT: python-jose vs PyJWT, dengan dan tanpa cache
+token terverifikasi (app/utils/tokens.py).
+
+Jalankan dari folder backend/:
+
+    python -m benchmarks.bench_jwt [--iterations 20000]
+
+Tidak butuh database; hanya butuh python-jose (dan PyJWT kalau ada).
+"""
+import argparse
+import os
+import time
+from datetime import datetime, timedelta
+
+# app.config mewajibkan POSTGRES_*; nilainya tidak dipakai di benchmark ini
+for _name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST", "POSTGRES_DB"):
+    os.environ.setdefault(_name, "bench")
+
+from app.utils.tokens import TOKEN_CODECS, VerifiedTokenCache
+
+SECRET = "bench-secret-key-at-least-32-bytes-long"
+ALGORITHM = "HS256"
+
+
+def _claims() -> dict:
+    expire = datetime.utcnow() + timedelta(minutes=240)
+    return {"sub": "bench-user", "exp": int(expire.timestamp()), "ver": 0}
+
+
+def _time(func, token: str, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(token)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'codec':<8} {'mode':<10} {'ops/s':>12} {'us/op':>10}")
+    for name, codec_class in TOKEN_CODECS.items():
+        try:
+            codec = codec_class(SECRET, ALGORITHM)
+        except RuntimeError as e:
+            print(f"{name:<8} skipped: {e}")
+            continue
+
+        token = codec.encode(_claims())
+        cached = VerifiedTokenCache(codec, maxsize=1000)
+        cached.decode(token)
+
+        for mode, func in (("verify", codec.decode), ("cached", cached.decode)):
+            elapsed = _time(func, token, args.iterations)
+            print(
+                f"{name:<8} {mode:<10} {args.iterations / elapsed:>12,.0f} "
+                f"{elapsed / args.iterations * 1e6:>10.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
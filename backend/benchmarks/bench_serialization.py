@@ -0,0 +1,107 @@
+"""
+Benchmark serialisasi halaman GET /products (default FastAPI vs fast path).
+
+- fastapi : handler mengembalikan PaginatedProductResponse, FastAPI
+            memvalidasi ulang terhadap response_model lalu JSONResponse
+            (json.dumps stdlib) - jalur default.
+- fast    : model yang sama di-render langsung oleh PydanticJSONResponse
+            (pydantic-core to_json), jalur FAST_JSON.
+
+Keduanya termasuk membangun model dari objek ORM-like (from_attributes).
+Jalankan dari folder backend/:
+
+    python -m benchmarks.bench_serialization [--rows 100] [--iterations 300]
+"""
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+# app.config mewajibkan POSTGRES_*; nilainya tidak dipakai di benchmark ini
+for _name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST", "POSTGRES_DB"):
+    os.environ.setdefault(_name, "bench")
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.schemas.pagination import PaginationMetadata
+from app.schemas.product import PaginatedProductResponse
+from app.utils.responses import PydanticJSONResponse
+
+
+def _rows(count: int) -> list:
+    now = datetime.utcnow()
+    creator = SimpleNamespace(id=uuid.uuid4(), username="bench-user")
+    category = SimpleNamespace(id=uuid.uuid4(), name="Bench Category")
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(),
+            name=f"Product {i}",
+            description="Lorem ipsum dolor sit amet " * 3,
+            price=1000.0 + i,
+            stock=i % 25,
+            low_stock_threshold=10,
+            image_url=f"https://example.com/images/{i}.png",
+            category_id=category.id,
+            creator=creator,
+            category=category,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(count)
+    ]
+
+
+def _page(rows: list) -> PaginatedProductResponse:
+    metadata = PaginationMetadata(
+        total=10_000, skip=0, limit=len(rows), page=1, total_pages=100, has_more=True
+    )
+    return PaginatedProductResponse(data=rows, metadata=metadata)
+
+
+async def _fastapi_path(field, rows: list) -> bytes:
+    content = await serialize_response(field=field, response_content=_page(rows))
+    return JSONResponse(content).body
+
+
+async def _fast_path(rows: list) -> bytes:
+    return PydanticJSONResponse(_page(rows)).body
+
+
+async def _bench(func, iterations: int) -> float:
+    await func()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await func()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=300)
+    args = parser.parse_args()
+
+    rows = _rows(args.rows)
+    field = create_response_field(name="response", type_=PaginatedProductResponse, mode="serialization")
+
+    default_body = await _fastapi_path(field, rows)
+    fast_body = await _fast_path(rows)
+    print(f"page size: {args.rows} rows, {len(fast_body):,} bytes (default {len(default_body):,})")
+
+    print(f"{'path':<10} {'ms/page':>10} {'us/row':>10}")
+    for name, func in (
+        ("fastapi", lambda: _fastapi_path(field, rows)),
+        ("fast", lambda: _fast_path(rows)),
+    ):
+        elapsed = await _bench(func, args.iterations)
+        per_page = elapsed / args.iterations
+        print(f"{name:<10} {per_page * 1e3:>10.3f} {per_page / args.rows * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,76 @@
+"""
+Fixture bersama untuk test backend.
+
+Settings dibaca saat `app` di-import, jadi env test di-set di sini, sebelum
+import apa pun dari `app`:
+- TEST_DATABASE_URL (postgresql+asyncpg://...) -> DATABASE_URL. Test yang
+  butuh PostgreSQL di-skip kalau variabel ini tidak di-set.
+- MongoDB memakai stand-in in-memory MONGODB_URL=mongomock:// (paket
+  mongomock-motor, lihat requirements-dev.txt) untuk test yang tidak
+  bergantung pada collation / $text.
+- TEST_MONGODB_URL (mongodb://...): mongod sungguhan untuk test search,
+  sort dan count /books. Di-skip kalau tidak di-set.
+
+Response cache dimatikan supaya setiap request benar-benar sampai ke
+database (jumlah statement yang diukur = load plan endpoint).
+"""
+import os
+import re
+import uuid
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL", "")
+TEST_MONGODB_URL = os.environ.get("TEST_MONGODB_URL", "")
+
+os.environ.update({
+    "DATABASE_URL": TEST_DATABASE_URL,
+    "DB_SSL": "false",
+    "MONGODB_URL": "mongomock://",
+    "MONGODB_DB_NAME": "test_books",
+    "CACHE_BACKEND": "none",
+    "RESPONSE_CACHE_ENABLED": "false",
+    "SQL_INSTRUMENTATION": "true",
+    "SQL_DETECT_N_PLUS_ONE": "true",
+    "STOCK_ROLLUP_INTERVAL_SECONDS": "0",
+})
+# Wajib di Settings, tidak dipakai kalau DATABASE_URL di-set
+for name in ("POSTGRES_USER", "POSTGRES_PASSWORD", "POSTGRES_HOST", "POSTGRES_DB"):
+    os.environ.setdefault(name, "test")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.main import app  # noqa: E402
+
+API = "/api/v1"
+
+_STATEMENTS = re.compile(r'db;[^,]*desc="(\d+) statements"')
+
+
+def statement_count(response) -> int:
+    """Jumlah statement SQL request ini, dari header Server-Timing."""
+    match = _STATEMENTS.search(response.headers.get("server-timing", ""))
+    assert match, f"no Server-Timing db entry in {response.headers!r}"
+    return int(match.group(1))
+
+
+@pytest.fixture(scope="session")
+def pg_client():
+    """TestClient dengan lifespan penuh (engine bersama, migrations, seed roles)."""
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set (postgresql+asyncpg://...)")
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def auth_headers(pg_client):
+    suffix = uuid.uuid4().hex[:8]
+    response = pg_client.post(f"{API}/auth/register", json={
+        "username": f"test_{suffix}",
+        "email": f"test_{suffix}@example.com",
+        "password": "secret123",
+        "full_name": "Test User",
+    })
+    assert response.status_code == 201, response.text
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
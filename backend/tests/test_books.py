@@ -0,0 +1,218 @@
+"""
+GET/POST/PUT/DELETE /books.
+
+Tidak butuh PostgreSQL: lifespan tidak dijalankan dan auth di-override.
+
+- `mock_client`: stand-in mongomock (MONGODB_URL=mongomock://). mongomock
+  mengabaikan collation dan tidak punya $text, jadi di sini hanya CRUD dan
+  cursor pagination yang tidak bergantung pada collation.
+- `mongo_client`: mongod sungguhan (TEST_MONGODB_URL), jalur yang sama
+  dengan production: range prefix ber-collation, sort ber-collation, count
+  dengan hint index ber-collation dan text index. Di-skip kalau tidak di-set.
+"""
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app import database
+from app.config import settings
+from app.database import get_mongodb
+from app.dependencies import get_current_active_user
+from app.main import app
+from app.migrations import ensure_mongo_indexes
+from app.utils.user_cache import CurrentUser
+from tests.conftest import API, TEST_MONGODB_URL
+
+BOOKS = [
+    ("Dune", "Frank Herbert"),
+    ("Dune Messiah", "Frank Herbert"),
+    ("dust", "Ann Other"),
+    ("Emma", "Jane Austen"),
+    ("Persuasion", "Jane Austen"),
+]
+
+
+def _test_client():
+    app.dependency_overrides[get_current_active_user] = lambda: CurrentUser(
+        id=uuid.uuid4(), username="books-test", is_active=True, role_name="user"
+    )
+    return TestClient(app)
+
+
+async def _reset(db):
+    await db.books.drop()
+    await ensure_mongo_indexes(db)
+
+
+@pytest.fixture
+def mock_client():
+    pytest.importorskip("mongomock_motor")
+    asyncio.run(_reset(database.init_mongodb()))
+    try:
+        yield _test_client()
+    finally:
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+
+@pytest.fixture
+def mongo_client():
+    if not TEST_MONGODB_URL:
+        pytest.skip("TEST_MONGODB_URL is not set (mongodb://...)")
+
+    # TestClient tanpa lifespan menjalankan setiap request di event loop
+    # baru, jadi client Motor dibuat per request (dan per setup).
+    async def reset():
+        client = AsyncIOMotorClient(TEST_MONGODB_URL)
+        try:
+            await _reset(client[settings.MONGODB_DB_NAME])
+        finally:
+            client.close()
+
+    async def real_mongodb():
+        client = AsyncIOMotorClient(TEST_MONGODB_URL)
+        try:
+            yield client[settings.MONGODB_DB_NAME]
+        finally:
+            client.close()
+
+    asyncio.run(reset())
+    app.dependency_overrides[get_mongodb] = real_mongodb
+    try:
+        yield _test_client()
+    finally:
+        app.dependency_overrides.pop(get_mongodb, None)
+        app.dependency_overrides.pop(get_current_active_user, None)
+
+
+def _create_books(client):
+    return [
+        client.post(f"{API}/books", json={"title": title, "author": author, "price": i}).json()
+        for i, (title, author) in enumerate(BOOKS)
+    ]
+
+
+@pytest.fixture
+def mock_books(mock_client):
+    return _create_books(mock_client)
+
+
+@pytest.fixture
+def mongo_books(mongo_client):
+    return _create_books(mongo_client)
+
+
+def _titles(response):
+    assert response.status_code == 200, response.text
+    return [book["title"] for book in response.json()["data"]]
+
+
+def _walk(client, query):
+    """Semua halaman cursor mode; return id sesuai urutan kunjungan."""
+    seen, cursor = [], ""
+    while True:
+        response = client.get(f"{API}/books?limit=2&{query}&cursor={cursor}")
+        assert response.status_code == 200, response.text
+        seen += [book["id"] for book in response.json()["data"]]
+        cursor = response.json()["metadata"]["next_cursor"]
+        if not cursor:
+            return seen
+
+
+# ============================================================================
+# mongomock: tanpa collation
+# ============================================================================
+def test_crud(mock_client):
+    client = mock_client
+    created = client.post(f"{API}/books", json={"title": "Dune", "author": "Frank Herbert", "price": 10})
+    assert created.status_code == 201, created.text
+    book_id = created.json()["id"]
+
+    assert client.get(f"{API}/books/{book_id}").json() == created.json()
+
+    updated = client.put(f"{API}/books/{book_id}", json={"price": 12})
+    assert updated.status_code == 200
+    assert updated.json()["price"] == 12
+
+    assert client.delete(f"{API}/books/{book_id}").status_code == 204
+    assert client.get(f"{API}/books/{book_id}").status_code == 404
+    assert client.get(f"{API}/books/not-an-id").status_code == 400
+
+
+def test_cursor_pagination_visits_every_book_once(mock_client, mock_books):
+    for sort_by in ("", "created_at"):
+        seen = _walk(mock_client, f"sort_by={sort_by}&order=desc")
+        assert sorted(seen) == sorted(book["id"] for book in mock_books), sort_by
+
+
+def test_unfiltered_count_strategies(mock_client, mock_books):
+    metadata = mock_client.get(f"{API}/books?limit=2&count=exact").json()["metadata"]
+    assert metadata["total"] == len(BOOKS)
+    assert metadata["has_more"] is True
+
+    metadata = mock_client.get(f"{API}/books?limit=2&count=estimated").json()["metadata"]
+    assert (metadata["total"], metadata["total_estimated"]) == (len(BOOKS), True)
+
+    assert mock_client.get(f"{API}/books").json()["metadata"]["total"] is None
+
+
+def test_invalid_cursor(mock_client, mock_books):
+    first = mock_client.get(f"{API}/books?limit=2&cursor=").json()["metadata"]["next_cursor"]
+    assert mock_client.get(f"{API}/books?cursor=garbage").status_code == 400
+    # Cursor terikat ke sort_by/order dan filter
+    assert mock_client.get(f"{API}/books?sort_by=title&cursor={first}").status_code == 400
+    assert mock_client.get(f"{API}/books?min_price=1&cursor={first}").status_code == 400
+    assert mock_client.get(f"{API}/books?limit=2&cursor={first}").status_code == 200
+
+
+# ============================================================================
+# mongod: collation dan text index
+# ============================================================================
+def test_prefix_search_is_case_insensitive(mongo_client, mongo_books):
+    client = mongo_client
+    assert _titles(client.get(f"{API}/books?search=du")) == ["Dune", "Dune Messiah", "dust"]
+    assert _titles(client.get(f"{API}/books?search=DUNE M")) == ["Dune Messiah"]
+    # Prefix, bukan substring
+    assert _titles(client.get(f"{API}/books?search=une")) == []
+    # Author dicocokkan juga
+    assert _titles(client.get(f"{API}/books?search=jane")) == ["Emma", "Persuasion"]
+    assert _titles(client.get(f"{API}/books?author=frank&max_price=0")) == ["Dune"]
+
+
+def test_text_search(mongo_client, mongo_books):
+    client = mongo_client
+    assert sorted(_titles(client.get(f"{API}/books?search=dune&search_mode=text"))) == ["Dune", "Dune Messiah"]
+    # Filter author di mode text: anchored regex tanpa collation
+    assert _titles(client.get(f"{API}/books?search=austen&search_mode=text&author=JANE")) == ["Emma", "Persuasion"]
+
+
+def test_sort_uses_collation(mongo_client, mongo_books):
+    # Case-insensitive: "dust" di antara "Dune Messiah" dan "Emma", bukan di akhir (urutan binary)
+    titles = ["Dune", "Dune Messiah", "dust", "Emma", "Persuasion"]
+    assert _titles(mongo_client.get(f"{API}/books?sort_by=title&limit=10")) == titles
+    assert _titles(mongo_client.get(f"{API}/books?sort_by=title&order=desc&limit=10")) == titles[::-1]
+
+
+def test_cursor_pagination_with_collation(mongo_client, mongo_books):
+    by_id = {book["id"]: book["title"] for book in mongo_books}
+    for sort_by in ("title", "author"):
+        for order in ("asc", "desc"):
+            seen = _walk(mongo_client, f"sort_by={sort_by}&order={order}")
+            assert sorted(seen) == sorted(by_id), (sort_by, order)
+
+    seen = _walk(mongo_client, "sort_by=title")
+    assert [by_id[book_id] for book_id in seen] == ["Dune", "Dune Messiah", "dust", "Emma", "Persuasion"]
+    # Search + cursor: range prefix digabung dengan range keyset
+    seen = _walk(mongo_client, "sort_by=title&search=DU")
+    assert [by_id[book_id] for book_id in seen] == ["Dune", "Dune Messiah", "dust"]
+
+
+def test_filtered_count(mongo_client, mongo_books):
+    client = mongo_client
+    # count_documents dengan hint index author ber-collation
+    assert client.get(f"{API}/books?author=JANE&count=exact").json()["metadata"]["total"] == 2
+    # Listing ber-filter: estimated jatuh ke exact
+    metadata = client.get(f"{API}/books?search=du&count=estimated").json()["metadata"]
+    assert (metadata["total"], metadata["total_estimated"]) == (3, False)
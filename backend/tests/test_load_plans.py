@@ -0,0 +1,115 @@
+"""
+Budget statement SQL per endpoint.
+
+Setiap router mendokumentasikan load plan-nya ("Statement per endpoint" di
+app/routers/*.py). Test ini memanggil endpoint lewat engine bersama dan
+membaca jumlah statement per request dari Server-Timing (QueryStats, lihat
+app/utils/query_stats.py). Endpoint yang mengeluarkan statement lebih
+banyak dari budget-nya (lazy load, N+1, query tambahan) membuat test gagal.
+
+Butuh PostgreSQL: TEST_DATABASE_URL=postgresql+asyncpg://... pytest
+"""
+import uuid
+
+import pytest
+
+from tests.conftest import API, statement_count
+
+
+@pytest.fixture(scope="module")
+def catalog(pg_client, auth_headers):
+    """Satu category + produk milik user test; dihapus setelah module selesai."""
+    suffix = uuid.uuid4().hex[:8]
+    category = pg_client.post(
+        f"{API}/categories", json={"name": f"loadplan-{suffix}"}, headers=auth_headers
+    ).json()
+    products = [
+        pg_client.post(f"{API}/products", json={
+            "name": f"loadplan-{suffix}-{i}",
+            "price": 10 + i,
+            "stock": 5,
+            "category_id": category["id"],
+        }, headers=auth_headers).json()
+        for i in range(3)
+    ]
+    # Principal user masuk user cache; request terukur tidak ikut memuatnya
+    pg_client.get(f"{API}/categories/{category['id']}", headers=auth_headers)
+
+    yield {"category": category, "products": products, "suffix": suffix}
+
+    for product in products:
+        pg_client.delete(f"{API}/products/{product['id']}", headers=auth_headers)
+    pg_client.delete(f"{API}/categories/{category['id']}", headers=auth_headers)
+
+
+def _assert_budget(response, budget: int, expected_status: int = 200) -> None:
+    assert response.status_code == expected_status, response.text
+    statements = statement_count(response)
+    assert statements <= budget, (
+        f"{response.request.method} {response.request.url.path} issued {statements} "
+        f"statements, load plan allows {budget}"
+    )
+
+
+@pytest.mark.parametrize("path, budget", [
+    ("/products?limit=10", 1),
+    ("/products?limit=10&count=none", 1),
+    ("/products?limit=10&cursor=", 2),
+    ("/products?limit=10&cursor=&count=none", 1),
+    ("/products?limit=10&search=loadplan&sort_by=relevance", 1),
+    ("/products/{product_id}", 1),
+    ("/products/stats", 1),
+    ("/categories?limit=10", 1),
+    ("/categories/{category_id}", 1),
+    ("/users?limit=10", 1),
+    ("/users?limit=10&cursor=", 2),
+])
+def test_read_endpoint_within_load_plan(pg_client, auth_headers, catalog, path, budget):
+    path = path.format(
+        product_id=catalog["products"][0]["id"], category_id=catalog["category"]["id"]
+    )
+    _assert_budget(pg_client.get(f"{API}{path}", headers=auth_headers), budget)
+
+
+def test_product_pages_cost_the_same(pg_client, auth_headers, catalog):
+    first = pg_client.get(f"{API}/products?limit=1&cursor=&count=none", headers=auth_headers)
+    _assert_budget(first, 1)
+    cursor = first.json()["metadata"]["next_cursor"]
+    assert cursor
+    _assert_budget(pg_client.get(f"{API}/products?limit=1&count=none&cursor={cursor}", headers=auth_headers), 1)
+
+
+def test_not_modified_within_load_plan(pg_client, auth_headers, catalog):
+    path = f"{API}/products/{catalog['products'][0]['id']}"
+    etag = pg_client.get(path, headers=auth_headers).headers["etag"]
+    _assert_budget(pg_client.get(path, headers={**auth_headers, "If-None-Match": etag}), 1, 304)
+
+
+def test_write_endpoints_within_load_plan(pg_client, auth_headers, catalog):
+    category = pg_client.post(
+        f"{API}/categories", json={"name": f"loadplan-write-{catalog['suffix']}"}, headers=auth_headers
+    )
+    _assert_budget(category, 2, 201)
+    category_id = category.json()["id"]
+
+    _assert_budget(pg_client.put(
+        f"{API}/categories/{category_id}",
+        json={"name": f"loadplan-write-{catalog['suffix']}-renamed"},
+        headers=auth_headers,
+    ), 3)
+
+    product = pg_client.post(f"{API}/products", json={
+        "name": f"loadplan-write-{catalog['suffix']}",
+        "price": 10,
+        "stock": 5,
+        "category_id": category_id,
+    }, headers=auth_headers)
+    _assert_budget(product, 5, 201)
+    product_id = product.json()["id"]
+
+    _assert_budget(pg_client.put(f"{API}/products/{product_id}", json={"price": 12}, headers=auth_headers), 4)
+    # +1 ledger kalau stock berubah
+    _assert_budget(pg_client.put(f"{API}/products/{product_id}", json={"stock": 7}, headers=auth_headers), 5)
+
+    _assert_budget(pg_client.delete(f"{API}/products/{product_id}", headers=auth_headers), 3, 204)
+    _assert_budget(pg_client.delete(f"{API}/categories/{category_id}", headers=auth_headers), 2, 204)
@@ -0,0 +1,109 @@
+"""
+RevocationStore tanpa database: Bloom filter, cek exact, sweep dan flush
+yang gagal lalu diulang (session di-stub, statement di-compile ke dialect
+PostgreSQL).
+"""
+import asyncio
+import time
+
+from sqlalchemy.dialects import postgresql
+
+from app.utils import revocation
+from app.utils.revocation import BloomFilter, RevocationStore
+
+
+def _store() -> RevocationStore:
+    return RevocationStore(sync_interval=5, bloom_capacity=100, bloom_error_rate=0.01)
+
+
+class _Session:
+    def __init__(self, sessions):
+        self.sessions = sessions
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, statement):
+        if self.sessions.fail:
+            raise ConnectionError("database unavailable")
+        self.sessions.statements.append(statement)
+
+    async def commit(self):
+        pass
+
+
+class _SessionMaker:
+    """Pengganti get_async_sessionmaker(): gagal selama `fail` True."""
+
+    def __init__(self):
+        self.fail = False
+        self.statements = []
+
+    def __call__(self):
+        return _Session(self)
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"jti-{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+
+    assert all(key in bloom for key in keys)
+    assert bloom.count == len(keys)
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 500
+
+
+def test_contains_checks_exact_set_and_expiry():
+    store = _store()
+    store._remember("live", time.time() + 60)
+    store._remember("expired", time.time() - 1)
+
+    assert store.contains("live")
+    assert not store.contains("expired")
+    assert not store.contains("never-revoked")
+    assert store.bloom_negatives >= 1
+
+
+def test_sweep_drops_expired_and_rebuilds_bloom():
+    store = _store()
+    store._remember("live", time.time() + 60)
+    store._remember("expired", time.time() - 1)
+
+    store.sweep()
+
+    assert set(store._revoked) == {"live"}
+    assert "live" in store._bloom
+    assert store._bloom.count == 1
+    assert store.contains("live")
+
+
+def test_failed_flush_is_retried_with_insert_time_stamp(monkeypatch):
+    sessions = _SessionMaker()
+    monkeypatch.setattr(revocation, "get_async_sessionmaker", lambda: sessions)
+    store = _store()
+    # Background task "ada": revoke() tidak flush sendiri
+    store._task = object()
+
+    sessions.fail = True
+    asyncio.run(store.revoke("jti-1", time.time() + 60))
+    asyncio.run(store.flush())
+
+    # Tetap berlaku lokal dan masih pending
+    assert store.contains("jti-1")
+    assert [entry["jti"] for entry in store._pending] == ["jti-1"]
+    assert "revoked_at" not in store._pending[0]
+
+    sessions.fail = False
+    asyncio.run(store.flush())
+
+    assert store._pending == []
+    [statement] = sessions.statements
+    compiled = statement.compile(dialect=postgresql.dialect())
+    # revoked_at diisi jam database saat insert, bukan saat revoke()
+    assert "timezone(" in str(compiled) and "now()" in str(compiled)
+    assert "jti-1" in compiled.params.values()
@@ -0,0 +1,140 @@
+"""
+Stock adjustment atomik (POST /products/{id}/stock/adjust dan
+POST /products/stock/adjust): all-or-nothing, Idempotency-Key dan ledger.
+
+Butuh PostgreSQL: TEST_DATABASE_URL=postgresql+asyncpg://... pytest
+"""
+import uuid
+
+import pytest
+
+from tests.conftest import API
+
+
+@pytest.fixture
+def products(pg_client, auth_headers):
+    """Category + dua produk (stok 5) baru per test; dihapus setelahnya."""
+    suffix = uuid.uuid4().hex[:8]
+    category = pg_client.post(
+        f"{API}/categories", json={"name": f"stock-{suffix}"}, headers=auth_headers
+    ).json()
+    products = [
+        pg_client.post(f"{API}/products", json={
+            "name": f"stock-{suffix}-{i}",
+            "price": 10,
+            "stock": 5,
+            "category_id": category["id"],
+        }, headers=auth_headers).json()
+        for i in range(2)
+    ]
+
+    yield products
+
+    for product in products:
+        pg_client.delete(f"{API}/products/{product['id']}", headers=auth_headers)
+    pg_client.delete(f"{API}/categories/{category['id']}", headers=auth_headers)
+
+
+def _stock(client, headers, product) -> int:
+    response = client.get(f"{API}/products/{product['id']}", headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["stock"]
+
+
+def _adjust_movements(client, headers, product) -> list:
+    response = client.get(f"{API}/products/{product['id']}/stock/movements?limit=200", headers=headers)
+    assert response.status_code == 200, response.text
+    return [movement for movement in response.json()["data"] if movement["reason"] == "adjust"]
+
+
+def _key() -> dict:
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+
+def test_rejected_batch_changes_no_stock(pg_client, auth_headers, products):
+    first, second = products
+    response = pg_client.post(f"{API}/products/stock/adjust", json={"items": [
+        {"product_id": first["id"], "delta": -1},
+        {"product_id": second["id"], "delta": -6},
+    ]}, headers=auth_headers)
+
+    assert response.status_code == 409, response.text
+    assert [error["product_id"] for error in response.json()["detail"]["errors"]] == [second["id"]]
+    assert [_stock(pg_client, auth_headers, product) for product in products] == [5, 5]
+    assert all(_adjust_movements(pg_client, auth_headers, product) == [] for product in products)
+
+
+def test_idempotent_retry_applies_once(pg_client, auth_headers, products):
+    first, second = products
+    headers = {**auth_headers, **_key()}
+    body = {"items": [
+        {"product_id": first["id"], "delta": -2},
+        {"product_id": second["id"], "delta": 3},
+    ]}
+
+    applied = pg_client.post(f"{API}/products/stock/adjust", json=body, headers=headers)
+    assert applied.status_code == 200, applied.text
+    assert "idempotent-replayed" not in applied.headers
+
+    replayed = pg_client.post(f"{API}/products/stock/adjust", json=body, headers=headers)
+    assert replayed.status_code == 200, replayed.text
+    assert replayed.headers["idempotent-replayed"] == "true"
+    assert replayed.json() == applied.json()
+
+    assert [_stock(pg_client, auth_headers, product) for product in products] == [3, 8]
+
+
+def test_single_adjust_idempotency(pg_client, auth_headers, products):
+    product = products[0]
+    headers = {**auth_headers, **_key()}
+    path = f"{API}/products/{product['id']}/stock/adjust"
+
+    applied = pg_client.post(path, json={"delta": -1}, headers=headers)
+    assert applied.status_code == 200, applied.text
+    assert applied.json()["stock"] == 4
+
+    replayed = pg_client.post(path, json={"delta": -1}, headers=headers)
+    assert replayed.headers["idempotent-replayed"] == "true"
+    assert replayed.json() == applied.json()
+
+    # Key yang sama untuk body lain
+    assert pg_client.post(path, json={"delta": -2}, headers=headers).status_code == 422
+    assert _stock(pg_client, auth_headers, product) == 4
+
+
+def test_zero_deltas_are_rejected(pg_client, auth_headers, products):
+    first, second = products
+    assert pg_client.post(
+        f"{API}/products/{first['id']}/stock/adjust", json={"delta": 0}, headers=auth_headers
+    ).status_code == 422
+
+    response = pg_client.post(f"{API}/products/stock/adjust", json={"items": [
+        {"product_id": first["id"], "delta": 2},
+        {"product_id": first["id"], "delta": -2},
+        {"product_id": second["id"], "delta": 1},
+    ]}, headers=auth_headers)
+    assert response.status_code == 422, response.text
+    assert [error["product_id"] for error in response.json()["detail"]["errors"]] == [first["id"]]
+
+    assert [_stock(pg_client, auth_headers, product) for product in products] == [5, 5]
+
+
+def test_ledger_records_each_applied_adjustment(pg_client, auth_headers, products):
+    first, second = products
+    path = f"{API}/products/{first['id']}/stock/adjust"
+    headers = {**auth_headers, **_key()}
+
+    assert pg_client.post(path, json={"delta": 2}, headers=headers).status_code == 200
+    # Replay dan adjustment yang ditolak tidak menulis ledger
+    assert pg_client.post(path, json={"delta": 2}, headers=headers).status_code == 200
+    assert pg_client.post(path, json={"delta": -100}, headers=auth_headers).status_code == 409
+    assert pg_client.post(f"{API}/products/stock/adjust", json={"items": [
+        {"product_id": first["id"], "delta": -1},
+        {"product_id": first["id"], "delta": -1},
+        {"product_id": second["id"], "delta": 4},
+    ]}, headers=auth_headers).status_code == 200
+
+    movements = _adjust_movements(pg_client, auth_headers, first)
+    # Terbaru dulu; item batch untuk SKU yang sama digabung jadi satu movement
+    assert [(movement["delta"], movement["stock_after"]) for movement in movements] == [(-2, 5), (2, 7)]
+    assert [movement["delta"] for movement in _adjust_movements(pg_client, auth_headers, second)] == [4]
@@ -1,4 +1,4 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import { Check, AlertCircle, Loader2, X } from 'lucide-react';
 import { productService } from '@/services/productService';
 import type { Product } from '@/types/product.types';
@@ -20,6 +20,8 @@ export const UpdateStockModal = ({
   const [stockType, setStockType] = useState<'add' | 'subtract'>('add');
   const [submitting, setSubmitting] = useState(false);
   const [error, setError] = useState<string>('');
+  // Same key for retries of one submission, so the stock change is applied once
+  const idempotencyKey = useRef<string>(crypto.randomUUID());
 
   if (!isOpen || !product) return null;
 
@@ -47,11 +49,16 @@ export const UpdateStockModal = ({
 
     setSubmitting(true);
     try {
-      await productService.update(product.id, {
-        stock: newStock,
-      });
+      // Delta, bukan stok absolut: server menjumlahkan secara atomik,
+      // jadi update paralel dari user lain tidak tertimpa
+      await productService.adjustStock(
+        product.id,
+        stockType === 'add' ? stockChange : -stockChange,
+        idempotencyKey.current
+      );
 
       // Reset and close
+      idempotencyKey.current = crypto.randomUUID();
       setStockChange(0);
       setStockType('add');
       setError('');
@@ -66,6 +73,7 @@ export const UpdateStockModal = ({
   };
 
   const handleClose = () => {
+    idempotencyKey.current = crypto.randomUUID();
     setStockChange(0);
     setStockType('add');
     setError('');
@@ -1,4 +1,5 @@
 import { useEffect, useState } from 'react';
+import { storage } from '@/utils/storage';
 
 interface SSEMessage {
   type: string;
@@ -12,8 +13,11 @@ export const useSSE = (url: string, enabled: boolean = true) => {
   useEffect(() => {
     if (!enabled) return;
 
-    const token = localStorage.getItem('token');
-    const eventSource = new EventSource(`${url}?token=${token}`);
+    // EventSource tidak bisa kirim header Authorization -> token lewat query
+    const token = storage.getTokenSync() ?? '';
+    const eventSource = new EventSource(`${url}?token=${encodeURIComponent(token)}`);
+
+    eventSource.onopen = () => setError(null);
 
     eventSource.onmessage = (event) => {
       try {
@@ -24,10 +28,10 @@ export const useSSE = (url: string, enabled: boolean = true) => {
       }
     };
 
+    // Browser reconnect otomatis (server kirim `retry:`), jadi koneksi tidak ditutup
     eventSource.onerror = (err) => {
       console.error('SSE error:', err);
       setError('Connection error');
-      eventSource.close();
     };
 
     return () => {
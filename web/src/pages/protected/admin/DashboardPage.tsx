@@ -2,7 +2,9 @@ import { useState, useEffect } from 'react';
 import { productService } from '@/services/productService';
 import { categoryService } from '@/services/categoryService';
 import { useAuthStore } from '@/store/auth';
-import type { Product } from '@/types/product.types';
+import { useSSE } from '@/hooks/useSSE';
+import { API_CONFIG } from '@/utils/constants';
+import type { Product, ProductStats, StockStatus } from '@/types/product.types';
 import type { Category } from '@/types/category.types';
 import { ProductFormModal, ProductDetailModal, UpdateStockModal } from '@/components/products';
 import { SuccessModal } from '@/components/ui/SuccessModal';
@@ -26,6 +28,7 @@ export const DashboardPage = () => {
   const [dataProducts, setProducts] = useState<Product[]>([]);
   const [totalProducts, setTotalProducts] = useState(0);
   const [categories, setCategories] = useState<Category[]>([]);
+  const [stats, setStats] = useState<ProductStats | null>(null);
 
   // Filter & Sort States
   const [searchInput, setSearchInput] = useState(''); // User input (immediate)
@@ -126,6 +129,17 @@ export const DashboardPage = () => {
     }
   };
 
+  // Ringkasan stok per status dari GET /products/stats (satu query agregat,
+  // di-cache beberapa detik di server). Tidak tersedia di mock API.
+  const fetchStats = async () => {
+    if (API_CONFIG.MOCK_API) return;
+    try {
+      setStats(await productService.getStats());
+    } catch (err: any) {
+      console.error('Error fetching product stats:', err);
+    }
+  };
+
   // Fetch categories for filter dropdown
   const fetchCategories = async (signal?: AbortSignal) => {
     try {
@@ -142,6 +156,7 @@ export const DashboardPage = () => {
   const handleProductAdded = () => {
     setShowSuccessModal(true);
     fetchProducts();
+    fetchStats();
   };
 
   const handleViewDetail = (product: Product) => {
@@ -166,6 +181,7 @@ export const DashboardPage = () => {
   const handleProductUpdated = () => {
     setShowSuccessModal(true);
     fetchProducts();
+    fetchStats();
   };
 
   // Debounce search input
@@ -186,6 +202,7 @@ export const DashboardPage = () => {
 
     fetchProducts(abortController.signal);
     fetchCategories(abortController.signal);
+    fetchStats();
 
     return () => {
       abortController.abort();
@@ -206,6 +223,23 @@ export const DashboardPage = () => {
     };
   }, [searchQuery, selectedCategory, sortBy, sortOrder, currentPage, itemsPerPage]);
 
+  // Real-time update: refetch halaman aktif saat ada event produk (debounce
+  // supaya bulk/import yang mengirim banyak event hanya memicu satu refetch)
+  const { message: productEvent } = useSSE(
+    `${API_CONFIG.BASE_URL}products/events`,
+    !API_CONFIG.MOCK_API
+  );
+
+  useEffect(() => {
+    if (!productEvent || productEvent.type === 'stream.open') return;
+
+    const timer = setTimeout(() => {
+      fetchProducts();
+      fetchStats();
+    }, 500);
+    return () => clearTimeout(timer);
+  }, [productEvent]);
+
   // Calculate total pages (API should return total count)
   const totalPages = Math.ceil(totalProducts / itemsPerPage) || 1;
 
@@ -214,6 +248,7 @@ export const DashboardPage = () => {
       try {
         await productService.delete(id);
         await fetchProducts();
+        fetchStats();
         setOpenDropdown(null);
       } catch (err) {
         console.error('Error deleting product:', err);
@@ -258,7 +293,10 @@ export const DashboardPage = () => {
           </div>
           <div className="flex gap-2 flex-wrap">
             <button
-              onClick={() => fetchProducts()}
+              onClick={() => {
+                fetchProducts();
+                fetchStats();
+              }}
               disabled={filterLoading}
               className="px-4 py-2 text-sm font-medium text-gray-700 bg-white border border-gray-300 rounded-lg hover:bg-gray-50 transition-colors flex items-center gap-2 disabled:opacity-50"
             >
@@ -276,6 +314,25 @@ export const DashboardPage = () => {
         </div>
       </div>
 
+      {/* Stock Summary */}
+      {stats && (
+        <div className="grid grid-cols-2 md:grid-cols-4 gap-3 mb-4">
+          <div className="bg-white rounded-lg shadow-sm border p-4">
+            <p className="text-sm text-gray-600">Total Produk</p>
+            <p className="text-2xl font-bold text-gray-900">{stats.total.products}</p>
+          </div>
+          {(['green', 'yellow', 'red'] as StockStatus[]).map((stockStatus) => (
+            <div key={stockStatus} className="bg-white rounded-lg shadow-sm border p-4">
+              <span className={`inline-flex items-center gap-1 px-2.5 py-1 rounded-full text-xs font-medium ${getStatusColor(stockStatus)}`}>
+                <span className="w-1.5 h-1.5 rounded-full bg-current"></span>
+                {getStockStatusLabel(stockStatus)}
+              </span>
+              <p className="text-2xl font-bold text-gray-900 mt-2">{stats.by_status[stockStatus].products}</p>
+            </div>
+          ))}
+        </div>
+      )}
+
       {/* Filters and Search */}
       <div className="bg-white rounded-lg shadow-sm border p-4 mb-4">
         <div className="flex flex-col lg:flex-row gap-3">
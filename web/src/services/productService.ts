@@ -6,6 +6,8 @@ import type {
   Product,
   CreateProductData,
   UpdateProductData,
+  StockLevel,
+  ProductStats,
   ProductQueryParams,
   PaginatedProductResponse,
 } from "@/types/product.types";
@@ -23,6 +25,14 @@ class ProductService {
     return await client.get<PaginatedProductResponse>("/products", params, config);
   }
 
+  /**
+   * Counts and stock value per status and per category (one aggregate query,
+   * cached for a few seconds on the server)
+   */
+  async getStats(): Promise<ProductStats> {
+    return await api.get<ProductStats>("/products/stats");
+  }
+
   /**
    * Get product detail by ID
    */
@@ -47,6 +57,20 @@ class ProductService {
     return await client.put<Product>(`/products/${id}`, data);
   }
 
+  /**
+   * Adjust stock by delta (atomic on the server, negative to subtract).
+   * Reuse the same idempotencyKey when retrying so the change is applied once.
+   */
+  async adjustStock(id: string, delta: number, idempotencyKey: string): Promise<StockLevel> {
+    const url = `/products/${id}/stock/adjust`;
+    if (API_CONFIG.MOCK_API) {
+      return await mockApi.post<StockLevel>(url, { delta });
+    }
+    return await api.post<StockLevel>(url, { delta }, {
+      headers: { "Idempotency-Key": idempotencyKey },
+    });
+  }
+
   /**
    * Delete product by ID
    */
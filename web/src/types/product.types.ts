@@ -54,6 +54,41 @@ export interface UpdateProductData {
   category_id?: string;
 }
 
+/** -----------------------------
+ * STOCK ADJUSTMENT RESULT
+ * ----------------------------- */
+export interface StockLevel {
+  id: string;
+  stock: number;
+  low_stock_threshold: number | null;
+  updated_at: string;
+  stock_status: 'red' | 'yellow' | 'green';
+}
+
+/** -----------------------------
+ * PRODUCT STATS (GET /products/stats)
+ * ----------------------------- */
+export type StockStatus = 'red' | 'yellow' | 'green';
+
+export interface StockTotals {
+  products: number;
+  stock_units: number;
+  stock_value: number;
+}
+
+export interface CategoryStockStats extends StockTotals {
+  category_id: string;
+  category_name: string | null;
+  by_status: Record<StockStatus, number>;
+}
+
+export interface ProductStats {
+  total: StockTotals;
+  by_status: Record<StockStatus, StockTotals>;
+  by_category: CategoryStockStats[];
+  generated_at: string;
+}
+
 /** -----------------------------
  * PRODUCT QUERY PARAMS
  * ----------------------------- */